@@ -1,13 +1,65 @@
-from fastapi import Depends
-from app.core.config import Settings
+from fastapi import Depends, HTTPException, Request
+import asyncio
+from typing import Optional
+from app.core.config import get_settings
+from app.core.container import ServiceContainer
+from app.services.admission import AdmissionController, resolve_user
 from app.services.chat_service import ChatService
+from app.services.collection_store import CollectionStore
 from app.services.document_service import DocumentProcessor
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion_queue import IngestionQueue
+from app.services.llm_gateway import LLMGateway
+from app.services.session_store import SessionStore
+from app.services.upload_store import ResumableUploadStore
+from app.services.vectorstore_registry import VectorStoreRegistry
 
-def get_settings():
-    return Settings()
+async def get_services(request: Request) -> ServiceContainer:
+    # Requests that arrive during startup wait briefly for services rather than failing
+    if request.app.state.services is None:
+        try:
+            await asyncio.wait_for(
+                request.app.state.services_ready.wait(),
+                timeout=get_settings().SERVICE_READY_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Service is starting up",
+                headers={"Retry-After": "5"}
+            )
+    return request.app.state.services
 
-def get_chat_service(settings: Settings = Depends(get_settings)):
-    return ChatService(api_key=settings.GEMINI_API_KEY)
+def get_embedding_service(services: ServiceContainer = Depends(get_services)) -> EmbeddingService:
+    return services.embedding_service
 
-def get_document_processor():
-    return DocumentProcessor()
+def get_vectorstore_registry(services: ServiceContainer = Depends(get_services)) -> VectorStoreRegistry:
+    return services.vectorstore_registry
+
+def get_chat_service(services: ServiceContainer = Depends(get_services)) -> ChatService:
+    return services.chat_service
+
+def get_document_processor(services: ServiceContainer = Depends(get_services)) -> DocumentProcessor:
+    return services.document_processor
+
+def get_ingestion_queue(services: ServiceContainer = Depends(get_services)) -> IngestionQueue:
+    return services.ingestion_queue
+
+def get_session_store(services: ServiceContainer = Depends(get_services)) -> SessionStore:
+    return services.session_store
+
+def get_collection_store(services: ServiceContainer = Depends(get_services)) -> CollectionStore:
+    return services.collection_store
+
+def get_llm_gateway(services: ServiceContainer = Depends(get_services)) -> LLMGateway:
+    return services.llm_gateway
+
+def get_upload_store(services: ServiceContainer = Depends(get_services)) -> ResumableUploadStore:
+    return services.upload_store
+
+def get_admission(services: ServiceContainer = Depends(get_services)) -> Optional[AdmissionController]:
+    return services.admission
+
+def get_user_id(request: Request) -> str:
+    # Set by AdmissionMiddleware; resolved here for apps mounted without it
+    return getattr(request.state, "user_id", None) or resolve_user(request.scope)
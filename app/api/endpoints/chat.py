@@ -1,28 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import List
-from app.models.chat import ChatMessage, ChatResponse
+import asyncio
+from app.models.chat import BatchChatRequest, ChatMessage, ChatResponse, ChatSession
 from app.services.chat_service import ChatService
-from app.core.dependencies import get_chat_service
+from app.services.collection_store import CollectionNotFoundError
+from app.services.export_service import EXPORT_FORMATS
+from app.services.llm_gateway import LLMGateway
+from app.services.session_store import SessionNotFoundError, SessionStore
+from app.services.vectorstore_registry import VectorStoreRegistry
+from app.api.dependencies import (
+    get_chat_service, get_llm_gateway, get_session_store, get_user_id, get_vectorstore_registry
+)
+from app.utils.sse_utils import stream_result_events, stream_text_events
 
 router = APIRouter()
 
 @router.post("/chat", response_model=ChatResponse)
 async def create_chat(
     message: ChatMessage,
+    user_id: str = Depends(get_user_id),
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """
     Process a chat message and return response
     """
     try:
-        response = await chat_service.get_response(
+        return await chat_service.get_response(
             message.content,
             message.conversation_history,
-            message.vectorstore_id
-        )
-        return ChatResponse(
-            content=response,
-            timestamp=datetime.now().isoformat()
+            message.vectorstore_id,
+            session_id=message.session_id,
+            level=message.level,
+            use_cache=message.use_cache,
+            collection_id=message.collection_id,
+            owner=user_id
         )
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/stream")
+async def stream_chat(
+    message: ChatMessage,
+    user_id: str = Depends(get_user_id),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """
+    Process a chat message and stream the response as server-sent events
+    """
+    metadata = {}
+    chunks = chat_service.stream_response(
+        message.content,
+        message.conversation_history,
+        message.vectorstore_id,
+        metadata=metadata,
+        session_id=message.session_id,
+        level=message.level,
+        use_cache=message.use_cache,
+        collection_id=message.collection_id,
+        owner=user_id
+    )
+    return StreamingResponse(
+        stream_text_events(chunks, metadata),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/chat/batch")
+async def batch_chat(
+    request: BatchChatRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    registry: VectorStoreRegistry = Depends(get_vectorstore_registry)
+):
+    """
+    Answer many questions about one document, streaming each answer as a server-sent event when ready
+    """
+    try:
+        if not registry.exists(request.vectorstore_id):
+            raise HTTPException(status_code=404, detail=f"Unknown vectorstore id: {request.vectorstore_id}")
+        results = chat_service.answer_batch(
+            request.questions,
+            request.vectorstore_id,
+            level=request.level,
+            use_cache=request.use_cache
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        stream_result_events(results),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/chat/cache-stats")
+async def answer_cache_stats(chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Report semantic answer cache size and hit rate
+    """
+    if chat_service.answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **chat_service.answer_cache.stats()}
+
+@router.get("/chat/llm-stats")
+async def llm_stats(llm_gateway: LLMGateway = Depends(get_llm_gateway)):
+    """
+    Report Gemini queue wait, upstream latency and retry counts
+    """
+    return llm_gateway.stats()
+
+@router.post("/sessions", response_model=ChatSession)
+async def create_session(session_store: SessionStore = Depends(get_session_store)):
+    """
+    Start a server-side chat session
+    """
+    session_id = await asyncio.to_thread(session_store.create_session)
+    return ChatSession(session_id=session_id)
+
+@router.get("/sessions/{session_id}", response_model=ChatSession)
+async def get_session(
+    session_id: str,
+    session_store: SessionStore = Depends(get_session_store)
+):
+    """
+    Return the messages of a chat session
+    """
+    try:
+        messages = await asyncio.to_thread(session_store.get_history, session_id)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ChatSession(session_id=session_id, messages=messages)
+
+@router.get("/sessions/{session_id}/export")
+async def export_session(
+    session_id: str,
+    export_format: str = Query("pdf", alias="format", pattern="^(pdf|markdown|html)$"),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """
+    Export a chat session as PDF, Markdown or HTML
+    """
+    try:
+        path = await chat_service.export_conversation(session_id, export_format)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return FileResponse(path, media_type=media_type, filename=f"chat_{session_id}.{extension}")
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from app.models.document import Collection, CollectionCreate
+from app.services.collection_store import CollectionNotFoundError, CollectionStore
+from app.services.vectorstore_registry import VectorStoreRegistry
+from app.api.dependencies import get_collection_store, get_user_id, get_vectorstore_registry
+
+router = APIRouter()
+
+def _check_documents(registry: VectorStoreRegistry, vectorstore_ids):
+    try:
+        missing = [vectorstore_id for vectorstore_id in vectorstore_ids if not registry.exists(vectorstore_id)]
+    except ValueError as e:
+        # Malformed ids are rejected by the registry before it touches the disk
+        raise HTTPException(status_code=400, detail=str(e))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Unknown vectorstore ids: {', '.join(missing)}")
+
+@router.post("/collections", response_model=Collection, status_code=201)
+async def create_collection(
+    collection: CollectionCreate,
+    user_id: str = Depends(get_user_id),
+    collection_store: CollectionStore = Depends(get_collection_store),
+    registry: VectorStoreRegistry = Depends(get_vectorstore_registry)
+):
+    """
+    Create a named collection over already uploaded documents
+
+    The collection belongs to the requesting user; other users see it as unknown.
+    """
+    _check_documents(registry, collection.vectorstore_ids)
+    return await asyncio.to_thread(
+        collection_store.create_collection, collection.name, collection.vectorstore_ids, user_id
+    )
+
+@router.get("/collections/{collection_id}", response_model=Collection)
+async def get_collection(
+    collection_id: str,
+    user_id: str = Depends(get_user_id),
+    collection_store: CollectionStore = Depends(get_collection_store)
+):
+    """
+    Return a collection and the documents it contains
+    """
+    try:
+        return await asyncio.to_thread(collection_store.get_collection, collection_id, user_id)
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.put("/collections/{collection_id}/documents/{vectorstore_id}", response_model=Collection)
+async def add_collection_document(
+    collection_id: str,
+    vectorstore_id: str,
+    user_id: str = Depends(get_user_id),
+    collection_store: CollectionStore = Depends(get_collection_store),
+    registry: VectorStoreRegistry = Depends(get_vectorstore_registry)
+):
+    """
+    Add an uploaded document to a collection without re-embedding it
+    """
+    _check_documents(registry, [vectorstore_id])
+    try:
+        return await asyncio.to_thread(collection_store.add_document, collection_id, vectorstore_id, user_id)
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.delete("/collections/{collection_id}/documents/{vectorstore_id}", response_model=Collection)
+async def remove_collection_document(
+    collection_id: str,
+    vectorstore_id: str,
+    user_id: str = Depends(get_user_id),
+    collection_store: CollectionStore = Depends(get_collection_store)
+):
+    """
+    Remove a document from a collection
+    """
+    try:
+        return await asyncio.to_thread(collection_store.remove_document, collection_id, vectorstore_id, user_id)
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.delete("/collections/{collection_id}", status_code=204)
+async def delete_collection(
+    collection_id: str,
+    user_id: str = Depends(get_user_id),
+    collection_store: CollectionStore = Depends(get_collection_store)
+):
+    """
+    Delete a collection; its documents stay available
+    """
+    try:
+        await asyncio.to_thread(collection_store.delete_collection, collection_id, user_id)
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,19 +1,146 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from app.services.document_service import DocumentProcessor
-from app.core.dependencies import get_document_processor
+from fastapi import APIRouter, UploadFile, File, Depends, Header, HTTPException, Request
+from app.models.document import IngestionJob, UploadCreate, UploadSession
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion_queue import IngestionQueue, IngestionQueueFullError, IngestionQuotaExceededError
+from app.services.upload_store import (
+    ResumableUploadStore, UploadConflictError, UploadNotFoundError, UploadTooLargeError
+)
+from app.api.dependencies import get_embedding_service, get_ingestion_queue, get_upload_store, get_user_id
 
 router = APIRouter()
 
-@router.post("/documents/upload")
+@router.post("/documents/upload", status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
-    document_processor: DocumentProcessor = Depends(get_document_processor)
+    user_id: str = Depends(get_user_id),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
 ):
     """
-    Upload and process a document
+    Upload a document and queue it for processing
+
+    The whole form is received before processing starts; large files should
+    use the resumable ``/documents/uploads`` routes instead.
     """
     try:
-        vectorstore = await document_processor.process_document(file)
-        return {"message": "Document processed successfully"}
+        job = await ingestion_queue.submit(file, owner=user_id)
+    except IngestionQuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except IngestionQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": "Document queued for processing",
+        "success": True,
+        "job_id": job.job_id,
+        "status": job.status,
+        "vectorstore_id": job.vectorstore_id
+    }
+
+@router.get("/documents/jobs/{job_id}", response_model=IngestionJob)
+async def get_upload_status(
+    job_id: str,
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
+):
+    """
+    Report the stage and progress of a document processing job
+    """
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/documents/uploads", response_model=UploadSession, status_code=201)
+async def create_upload(
+    upload: UploadCreate,
+    upload_store: ResumableUploadStore = Depends(get_upload_store)
+):
+    """
+    Start a resumable upload that is sent in parts
+    """
+    try:
+        return upload_store.create(upload.filename, upload.size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@router.get("/documents/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload(
+    upload_id: str,
+    upload_store: ResumableUploadStore = Depends(get_upload_store)
+):
+    """
+    Report how much of a resumable upload has arrived
+    """
+    try:
+        return upload_store.get(upload_id)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+@router.patch("/documents/uploads/{upload_id}", response_model=UploadSession)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_store: ResumableUploadStore = Depends(get_upload_store)
+):
+    """
+    Append the request body to a resumable upload at ``Upload-Offset``
+    """
+    length = request.headers.get("content-length")
+    try:
+        return await upload_store.append(
+            upload_id,
+            upload_offset,
+            request.stream(),
+            length=int(length) if length else None
+        )
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@router.post("/documents/uploads/{upload_id}/complete", status_code=202)
+async def complete_upload(
+    upload_id: str,
+    user_id: str = Depends(get_user_id),
+    upload_store: ResumableUploadStore = Depends(get_upload_store),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
+):
+    """
+    Finish a resumable upload and queue it for processing
+    """
+    try:
+        # Checked first, so a refused upload stays open and completing can be retried
+        ingestion_queue.check_capacity(user_id)
+        file_path, filename, vectorstore_id = upload_store.complete(upload_id)
+        job = ingestion_queue.submit_saved(file_path, filename, vectorstore_id, owner=user_id)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except IngestionQuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except IngestionQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": "Document queued for processing",
+        "success": True,
+        "job_id": job.job_id,
+        "status": job.status,
+        "vectorstore_id": job.vectorstore_id
+    }
+
+@router.get("/documents/embedding-stats")
+async def embedding_stats(
+    embedding_service: EmbeddingService = Depends(get_embedding_service)
+):
+    """
+    Report embedding queue depth and throughput
+    """
+    return embedding_service.stats()
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Report that the process is up and serving requests
+    """
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness(request: Request):
+    """
+    Report whether services are built and warmed up
+    """
+    if request.app.state.services is None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "error": request.app.state.startup_profile.error},
+            headers={"Retry-After": "5"}
+        )
+    return {"status": "ready"}
+
+@router.get("/health/startup")
+async def startup_profile(request: Request):
+    """
+    Report per-module import time and per-service initialization time
+    """
+    return request.app.state.startup_profile.as_dict()
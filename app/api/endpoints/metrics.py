@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.api.dependencies import get_admission
+from app.core.metrics import REGISTRY, recent_traces
+from app.services.admission import AdmissionController
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Export request, stage, cache and queue metrics in Prometheus text format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/traces")
+async def traces():
+    """
+    Return the stage spans of recently sampled requests
+    """
+    return recent_traces()
+
+@router.get("/admission")
+async def admission_stats(admission: Optional[AdmissionController] = Depends(get_admission)):
+    """
+    Report admission slots, queue lengths and estimated waits per work class
+    """
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.stats()}
@@ -1,26 +1,41 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import Depends, FastAPI, File, Header, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict
-import google.generativeai as genai
-from datetime import datetime
-import os
+from fastapi.responses import FileResponse, StreamingResponse
 from dotenv import load_dotenv
+import asyncio
 
-from app.services.document_service import DocumentProcessor
+from app.api.endpoints import collections, health, metrics
+from app.api.dependencies import (
+    get_chat_service, get_embedding_service, get_ingestion_queue, get_llm_gateway, get_session_store,
+    get_upload_store, get_user_id, get_vectorstore_registry
+)
+from app.core.container import lifespan
+from app.core.metrics import TimingMiddleware
+from app.services.admission import AdmissionMiddleware
 from app.services.chat_service import ChatService
-from app.models.chat import ChatMessage, ChatResponse
-from app.config import Settings
+from app.services.collection_store import CollectionNotFoundError
+from app.services.embedding_service import EmbeddingService
+from app.services.export_service import EXPORT_FORMATS
+from app.services.ingestion_queue import IngestionQueue, IngestionQueueFullError, IngestionQuotaExceededError
+from app.services.llm_gateway import LLMGateway
+from app.services.session_store import SessionNotFoundError, SessionStore
+from app.services.upload_store import (
+    ResumableUploadStore, UploadConflictError, UploadNotFoundError, UploadSizeLimitMiddleware, UploadTooLargeError
+)
+from app.services.vectorstore_registry import VectorStoreRegistry
+from app.models.chat import BatchChatRequest, ChatMessage, ChatResponse, ChatSession
+from app.models.document import IngestionJob, UploadCreate, UploadSession
+from app.utils.sse_utils import stream_result_events, stream_text_events
 
 # Load environment variables
 load_dotenv()
-settings = Settings()
 
-# Initialize FastAPI app
+# Initialize FastAPI app; services are built once in the lifespan handler
 app = FastAPI(
     title="Efiko API",
     description="Backend API for Efiko - Your Study Companion",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -32,44 +47,250 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-document_processor = DocumentProcessor()
-chat_service = ChatService(api_key=settings.GEMINI_API_KEY)
+# Per-user quotas, fair scheduling and load shedding for chat and ingestion
+app.add_middleware(AdmissionMiddleware)
+
+# One-shot uploads are cut off at MAX_FILE_SIZE before the whole form is received
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Per-route latency, request ids and sampled tracing (TRACE_SAMPLE_RATE)
+app.add_middleware(TimingMiddleware)
 
-@app.post("/api/upload-document")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process a document"""
+app.include_router(health.router, tags=["health"])
+app.include_router(metrics.router, tags=["metrics"])
+app.include_router(collections.router, prefix="/api", tags=["collections"])
+
+@app.post("/api/upload-document", status_code=202)
+async def upload_document(
+    file: UploadFile = File(...),
+    user_id: str = Depends(get_user_id),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
+):
+    """Upload a document and queue it for processing; large files should use /api/uploads"""
     try:
-        vectorstore = await document_processor.process_document(file)
-        return {"message": "Document processed successfully"}
+        job = await ingestion_queue.submit(file, owner=user_id)
+    except IngestionQuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except IngestionQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": "Document queued for processing",
+        "success": True,
+        "job_id": job.job_id,
+        "status": job.status,
+        "vectorstore_id": job.vectorstore_id
+    }
+
+@app.get("/api/upload-status/{job_id}", response_model=IngestionJob)
+async def upload_status(
+    job_id: str,
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
+):
+    """Report the stage and progress of a document processing job"""
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/api/uploads", response_model=UploadSession, status_code=201)
+async def create_upload(
+    upload: UploadCreate,
+    upload_store: ResumableUploadStore = Depends(get_upload_store)
+):
+    """Start a resumable upload that is sent in parts"""
+    try:
+        return upload_store.create(upload.filename, upload.size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@app.get("/api/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload(
+    upload_id: str,
+    upload_store: ResumableUploadStore = Depends(get_upload_store)
+):
+    """Report how much of a resumable upload has arrived"""
+    try:
+        return upload_store.get(upload_id)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+@app.patch("/api/uploads/{upload_id}", response_model=UploadSession)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_store: ResumableUploadStore = Depends(get_upload_store)
+):
+    """Append the request body to a resumable upload at ``Upload-Offset``"""
+    length = request.headers.get("content-length")
+    try:
+        return await upload_store.append(
+            upload_id,
+            upload_offset,
+            request.stream(),
+            length=int(length) if length else None
+        )
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@app.post("/api/uploads/{upload_id}/complete", status_code=202)
+async def complete_upload(
+    upload_id: str,
+    user_id: str = Depends(get_user_id),
+    upload_store: ResumableUploadStore = Depends(get_upload_store),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
+):
+    """Finish a resumable upload and queue it for processing"""
+    try:
+        # Checked first, so a refused upload stays open and completing can be retried
+        ingestion_queue.check_capacity(user_id)
+        file_path, filename, vectorstore_id = upload_store.complete(upload_id)
+        job = ingestion_queue.submit_saved(file_path, filename, vectorstore_id, owner=user_id)
+    except UploadNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except IngestionQuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except IngestionQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": "Document queued for processing",
+        "success": True,
+        "job_id": job.job_id,
+        "status": job.status,
+        "vectorstore_id": job.vectorstore_id
+    }
+
+@app.get("/api/embedding-stats")
+async def embedding_stats(
+    embedding_service: EmbeddingService = Depends(get_embedding_service)
+):
+    """Report embedding queue depth and throughput"""
+    return embedding_service.stats()
+
+@app.get("/api/answer-cache-stats")
+async def answer_cache_stats(chat_service: ChatService = Depends(get_chat_service)):
+    """Report semantic answer cache size and hit rate"""
+    if chat_service.answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **chat_service.answer_cache.stats()}
+
+@app.get("/api/llm-stats")
+async def llm_stats(llm_gateway: LLMGateway = Depends(get_llm_gateway)):
+    """Report Gemini queue wait, upstream latency and retry counts"""
+    return llm_gateway.stats()
 
 @app.post("/api/chat")
-async def chat(message: ChatMessage):
+async def chat(
+    message: ChatMessage,
+    user_id: str = Depends(get_user_id),
+    chat_service: ChatService = Depends(get_chat_service)
+):
     """Process a chat message and return response"""
     try:
-        response = await chat_service.get_response(
+        return await chat_service.get_response(
             message.content,
             message.conversation_history,
-            message.vectorstore_id
-        )
-        return ChatResponse(
-            content=response,
-            timestamp=datetime.now().isoformat()
+            message.vectorstore_id,
+            session_id=message.session_id,
+            level=message.level,
+            use_cache=message.use_cache,
+            collection_id=message.collection_id,
+            owner=user_id
         )
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/export-chat/{chat_id}")
-async def export_chat(chat_id: str):
-    """Export chat history as PDF"""
+@app.post("/api/chat/stream")
+async def chat_stream(
+    message: ChatMessage,
+    user_id: str = Depends(get_user_id),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """Process a chat message and stream the response as server-sent events"""
+    metadata = {}
+    chunks = chat_service.stream_response(
+        message.content,
+        message.conversation_history,
+        message.vectorstore_id,
+        metadata=metadata,
+        session_id=message.session_id,
+        level=message.level,
+        use_cache=message.use_cache,
+        collection_id=message.collection_id,
+        owner=user_id
+    )
+    return StreamingResponse(
+        stream_text_events(chunks, metadata),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/chat/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    registry: VectorStoreRegistry = Depends(get_vectorstore_registry)
+):
+    """Answer many questions about one document, streaming each answer as a server-sent event when ready"""
     try:
-        pdf_bytes = await chat_service.export_conversation(chat_id)
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=chat_{chat_id}.pdf"}
+        if not registry.exists(request.vectorstore_id):
+            raise HTTPException(status_code=404, detail=f"Unknown vectorstore id: {request.vectorstore_id}")
+        results = chat_service.answer_batch(
+            request.questions,
+            request.vectorstore_id,
+            level=request.level,
+            use_cache=request.use_cache
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        stream_result_events(results),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/sessions", response_model=ChatSession)
+async def create_session(session_store: SessionStore = Depends(get_session_store)):
+    """Start a server-side chat session"""
+    session_id = await asyncio.to_thread(session_store.create_session)
+    return ChatSession(session_id=session_id)
+
+@app.get("/api/sessions/{session_id}", response_model=ChatSession)
+async def get_session(
+    session_id: str,
+    session_store: SessionStore = Depends(get_session_store)
+):
+    """Return the messages of a chat session"""
+    try:
+        messages = await asyncio.to_thread(session_store.get_history, session_id)
+    except SessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ChatSession(session_id=session_id, messages=messages)
+
+@app.get("/api/export-chat/{chat_id}")
+async def export_chat(
+    chat_id: str,
+    export_format: str = Query("pdf", alias="format", pattern="^(pdf|markdown|html)$"),
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """Export chat history as PDF, Markdown or HTML"""
+    try:
+        path = await chat_service.export_conversation(chat_id, export_format)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return FileResponse(path, media_type=media_type, filename=f"chat_{chat_id}.{extension}")
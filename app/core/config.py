@@ -13,11 +13,113 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Seconds a request waits for services during startup before a 503
+    SERVICE_READY_TIMEOUT: float = 30.0
+    
+    # Share of requests whose stage spans are traced (0 disables tracing)
+    TRACE_SAMPLE_RATE: float = 0.0
+    
+    # Admission control, per user (JWT subject, or client address without a token).
+    # Off by default: without tokens every user behind the frontend shares one address.
+    # Requests from ADMISSION_TRUSTED_PROXIES (such as the frontend server) are told
+    # apart by their X-Client-Id header, or else by X-Forwarded-For
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_TRUSTED_PROXIES: list = []
+    ADMISSION_MAX_CONCURRENCY: int = 16
+    ADMISSION_MAX_QUEUED_PER_USER: int = 4
+    ADMISSION_CHAT_WEIGHT: float = 4
+    ADMISSION_CHAT_LATENCY_TARGET: float = 5.0  # seconds of queueing before shedding
+    ADMISSION_CHAT_USER_CONCURRENCY: int = 2
+    ADMISSION_CHAT_USER_PER_MINUTE: float = 30
+    ADMISSION_CHAT_USER_BURST: int = 5
+    ADMISSION_BATCH_WEIGHT: float = 1
+    ADMISSION_BATCH_LATENCY_TARGET: float = 60.0
+    ADMISSION_BATCH_USER_CONCURRENCY: int = 1
+    ADMISSION_BATCH_USER_PER_MINUTE: float = 4
+    ADMISSION_BATCH_USER_BURST: int = 2
+    ADMISSION_INGEST_WEIGHT: float = 1
+    ADMISSION_INGEST_LATENCY_TARGET: float = 30.0
+    ADMISSION_INGEST_USER_CONCURRENCY: int = 1
+    ADMISSION_INGEST_USER_PER_MINUTE: float = 10
+    ADMISSION_INGEST_USER_BURST: int = 3
+    
     # CORS
     BACKEND_CORS_ORIGINS: list = ["*"]
     
     # File Upload
     MAX_FILE_SIZE: int = 15 * 1024 * 1024  # 15MB
+    UPLOAD_DIR: str = "data/uploads"  # parts of resumable uploads
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # part size suggested to clients
+    UPLOAD_SESSION_TTL: int = 60 * 60  # seconds before an idle upload is dropped
+    EXTRACTION_WORKERS: int = 2
+    INGESTION_WORKERS: int = 2
+    INGESTION_MAX_PENDING: int = 32
+    INGESTION_MAX_PENDING_PER_USER: int = 4
+    
+    # Summary tree (chunk -> section -> document) for long documents, built in the
+    # background after ingestion; costs about one LLM call per SUMMARY_SECTION_CHUNKS chunks
+    SUMMARY_TREE_ENABLED: bool = False
+    SUMMARY_MIN_CHUNKS: int = 16
+    SUMMARY_SECTION_CHUNKS: int = 8
+    SUMMARY_FAN_IN: int = 8
+    SUMMARY_CONCURRENCY: int = 4  # LLM calls at a time per document
+    SUMMARY_WORKERS: int = 1  # documents summarized at a time
+    
+    # Vectorstores
+    VECTORSTORE_DIR: str = "data/vectorstores"
+    VECTORSTORE_CACHE_SIZE: int = 8
+    VECTORSTORE_MMAP: bool = True
+    
+    # FAISS index selection ("auto" picks by corpus size)
+    FAISS_INDEX_TYPE: str = "auto"
+    FAISS_FLAT_MAX_VECTORS: int = 20_000
+    FAISS_PQ_MIN_VECTORS: int = 500_000
+    FAISS_NPROBE: int = 16
+    FAISS_EF_SEARCH: int = 64
+    
+    # Embedding micro-batching
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_WAIT_MS: float = 10
+    EMBEDDING_WORKERS: int = 1
+    # Chunk embeddings reused across re-uploads; None disables the cache
+    EMBEDDING_CACHE_PATH: Optional[str] = "data/embeddings.db"
+    
+    # Chat sessions
+    DATABASE_URL: str = "sqlite:///data/efiko.db"
+    SESSION_CACHE_SIZE: int = 256
+    COLLECTION_CACHE_TTL: float = 5.0  # seconds another worker's collection edits may go unseen
+    
+    # Conversation exports
+    EXPORT_CACHE_DIR: str = "data/exports"
+    EXPORT_CACHE_MAX_MB: int = 256
+    EXPORT_SEGMENT_MESSAGES: int = 100  # messages per cached PDF segment
+    
+    # Gemini gateway
+    LLM_REQUESTS_PER_MINUTE: float = 60
+    LLM_BURST: Optional[int] = None  # defaults to LLM_MAX_CONCURRENCY
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_RETRIES: int = 4
+    
+    # Chat context gathering (seconds)
+    CONTEXT_SOURCE_TIMEOUT: float = 2.0
+    CONTEXT_DEADLINE: float = 3.0
+    PROMPT_TOKEN_BUDGET: int = 6000
+    PROMPT_RECENT_TURNS: int = 6
+    
+    # Batch chat: questions per request and answers generated at once per batch
+    BATCH_MAX_QUESTIONS: int = 100
+    BATCH_MAX_CONCURRENCY: int = 8
+    
+    # Semantic answer cache
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_TTL: int = 24 * 60 * 60  # seconds
+    SEMANTIC_CACHE_SIZE: int = 5000
+    
+    # Web search cache
+    SEARCH_CACHE_TTL: int = 600  # seconds
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_PATH: Optional[str] = None
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,263 @@
+from fastapi import FastAPI
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+import logging
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import QUEUE_DEPTH
+from app.core.startup_profile import HEAVY_MODULES, StartupProfile
+from app.services.admission import BATCH, CHAT, INGEST, AdmissionController, WorkClass
+from app.services.chat_service import ChatService
+from app.services.collection_store import CollectionStore
+from app.services.context_assembler import ContextAssembler
+from app.services.document_service import DocumentProcessor
+from app.services.embedding_cache import ChunkEmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.export_service import ConversationExporter
+from app.services.faiss_index import IndexPolicy
+from app.services.ingestion_queue import IngestionQueue
+from app.services.llm_gateway import LLMGateway
+from app.services.semantic_cache import SemanticAnswerCache
+from app.services.session_store import SessionStore
+from app.services.summary_tree import SummaryTreeBuilder
+from app.services.upload_store import ResumableUploadStore
+from app.services.vectorstore_registry import VectorStoreRegistry
+from app.services.web_search import WebSearchTool
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TIMEOUT = 10  # seconds
+
+class ServiceContainer:
+    """Services built once per application and shared by every request"""
+
+    def __init__(self, settings: Settings, profile: Optional[StartupProfile] = None):
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        self.settings = settings
+        self.profile = profile or StartupProfile()
+        with self.profile.stage("embedding_service"):
+            embeddings = HuggingFaceEmbeddings()
+            self.embedding_service = EmbeddingService(
+                embeddings,
+                max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+                workers=settings.EMBEDDING_WORKERS,
+                # Sentence-transformers models add no query instruction
+                symmetric=True
+            )
+            self.embedding_cache = None
+            if settings.EMBEDDING_CACHE_PATH:
+                self.embedding_cache = ChunkEmbeddingCache(
+                    settings.EMBEDDING_CACHE_PATH,
+                    model_id=embeddings.model_name
+                )
+        with self.profile.stage("vectorstore_registry"):
+            self.vectorstore_registry = VectorStoreRegistry(
+                self.embedding_service,
+                storage_dir=settings.VECTORSTORE_DIR,
+                max_cached=settings.VECTORSTORE_CACHE_SIZE,
+                mmap=settings.VECTORSTORE_MMAP
+            )
+        with self.profile.stage("llm_gateway"):
+            self.llm_gateway = LLMGateway(
+                settings.GEMINI_API_KEY,
+                requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                burst=settings.LLM_BURST,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                max_retries=settings.LLM_MAX_RETRIES
+            )
+        with self.profile.stage("document_processor"):
+            self.extraction_pool = ProcessPoolExecutor(max_workers=settings.EXTRACTION_WORKERS)
+            summarizer = None
+            if settings.SUMMARY_TREE_ENABLED:
+                summarizer = SummaryTreeBuilder(
+                    self.llm_gateway,
+                    section_chunks=settings.SUMMARY_SECTION_CHUNKS,
+                    fan_in=settings.SUMMARY_FAN_IN,
+                    min_chunks=settings.SUMMARY_MIN_CHUNKS,
+                    concurrency=settings.SUMMARY_CONCURRENCY
+                )
+            self.document_processor = DocumentProcessor(
+                registry=self.vectorstore_registry,
+                extraction_pool=self.extraction_pool,
+                index_policy=IndexPolicy(
+                    index_type=settings.FAISS_INDEX_TYPE,
+                    flat_max_vectors=settings.FAISS_FLAT_MAX_VECTORS,
+                    pq_min_vectors=settings.FAISS_PQ_MIN_VECTORS,
+                    nprobe=settings.FAISS_NPROBE,
+                    ef_search=settings.FAISS_EF_SEARCH
+                ),
+                embedding_cache=self.embedding_cache,
+                max_file_size=settings.MAX_FILE_SIZE,
+                summarizer=summarizer
+            )
+            self.upload_store = ResumableUploadStore(
+                settings.UPLOAD_DIR,
+                max_size=settings.MAX_FILE_SIZE,
+                chunk_size=settings.UPLOAD_CHUNK_SIZE,
+                ttl=settings.UPLOAD_SESSION_TTL
+            )
+            self.ingestion_queue = IngestionQueue(
+                self.document_processor,
+                workers=settings.INGESTION_WORKERS,
+                max_pending=settings.INGESTION_MAX_PENDING,
+                max_pending_per_owner=settings.INGESTION_MAX_PENDING_PER_USER,
+                summary_workers=settings.SUMMARY_WORKERS
+            )
+        with self.profile.stage("session_store"):
+            self.session_store = SessionStore(
+                settings.DATABASE_URL,
+                max_cached_sessions=settings.SESSION_CACHE_SIZE
+            )
+            self.exporter = ConversationExporter(
+                settings.EXPORT_CACHE_DIR,
+                executor=self.extraction_pool,
+                segment_messages=settings.EXPORT_SEGMENT_MESSAGES,
+                max_bytes=settings.EXPORT_CACHE_MAX_MB * 2 ** 20
+            )
+        with self.profile.stage("collection_store"):
+            self.collection_store = CollectionStore(
+                settings.DATABASE_URL,
+                cache_ttl=settings.COLLECTION_CACHE_TTL
+            )
+        with self.profile.stage("chat_service"):
+            self.answer_cache = None
+            if settings.SEMANTIC_CACHE_ENABLED:
+                self.answer_cache = SemanticAnswerCache(
+                    self.embedding_service,
+                    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                    ttl=settings.SEMANTIC_CACHE_TTL,
+                    max_entries=settings.SEMANTIC_CACHE_SIZE
+                )
+            self.search_tool = WebSearchTool(
+                max_results=3,
+                cache_ttl=settings.SEARCH_CACHE_TTL,
+                cache_size=settings.SEARCH_CACHE_SIZE,
+                cache_path=settings.SEARCH_CACHE_PATH
+            )
+            self.chat_service = ChatService(
+                api_key=settings.GEMINI_API_KEY,
+                registry=self.vectorstore_registry,
+                search_tool=self.search_tool,
+                session_store=self.session_store,
+                context_assembler=ContextAssembler(
+                    token_budget=settings.PROMPT_TOKEN_BUDGET,
+                    recent_turns=settings.PROMPT_RECENT_TURNS
+                ),
+                answer_cache=self.answer_cache,
+                collection_store=self.collection_store,
+                gateway=self.llm_gateway,
+                exporter=self.exporter,
+                source_timeout=settings.CONTEXT_SOURCE_TIMEOUT,
+                context_deadline=settings.CONTEXT_DEADLINE,
+                batch_concurrency=settings.BATCH_MAX_CONCURRENCY,
+                batch_max_questions=settings.BATCH_MAX_QUESTIONS
+            )
+        with self.profile.stage("admission"):
+            self.admission = None
+            if settings.ADMISSION_ENABLED:
+                self.admission = AdmissionController(
+                    [
+                        WorkClass(
+                            CHAT,
+                            weight=settings.ADMISSION_CHAT_WEIGHT,
+                            latency_target=settings.ADMISSION_CHAT_LATENCY_TARGET,
+                            user_concurrency=settings.ADMISSION_CHAT_USER_CONCURRENCY,
+                            user_per_minute=settings.ADMISSION_CHAT_USER_PER_MINUTE,
+                            user_burst=settings.ADMISSION_CHAT_USER_BURST
+                        ),
+                        WorkClass(
+                            BATCH,
+                            weight=settings.ADMISSION_BATCH_WEIGHT,
+                            latency_target=settings.ADMISSION_BATCH_LATENCY_TARGET,
+                            user_concurrency=settings.ADMISSION_BATCH_USER_CONCURRENCY,
+                            user_per_minute=settings.ADMISSION_BATCH_USER_PER_MINUTE,
+                            user_burst=settings.ADMISSION_BATCH_USER_BURST
+                        ),
+                        WorkClass(
+                            INGEST,
+                            weight=settings.ADMISSION_INGEST_WEIGHT,
+                            latency_target=settings.ADMISSION_INGEST_LATENCY_TARGET,
+                            user_concurrency=settings.ADMISSION_INGEST_USER_CONCURRENCY,
+                            user_per_minute=settings.ADMISSION_INGEST_USER_PER_MINUTE,
+                            user_burst=settings.ADMISSION_INGEST_USER_BURST
+                        )
+                    ],
+                    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+                    max_queued_per_user=settings.ADMISSION_MAX_QUEUED_PER_USER
+                )
+
+    def register_metrics(self):
+        """Expose internal queue depths as gauges read at scrape time"""
+        QUEUE_DEPTH.set_function(self.ingestion_queue.queue_depth, queue="ingestion")
+        QUEUE_DEPTH.set_function(
+            lambda: self.embedding_service.stats()["query_queue_depth"], queue="embedding_query"
+        )
+        QUEUE_DEPTH.set_function(
+            lambda: self.embedding_service.stats()["document_queue_depth"], queue="embedding_document"
+        )
+        QUEUE_DEPTH.set_function(lambda: self.llm_gateway.stats()["queued"], queue="llm")
+        if self.admission is not None:
+            QUEUE_DEPTH.set_function(self.admission.queue_depth, queue="admission")
+
+    async def warm_up(self):
+        """Pay one-off model costs before the first request does"""
+        with self.profile.stage("embedding_warm_up"):
+            try:
+                await asyncio.to_thread(self.embedding_service.embed_query, "warm up")
+            except Exception as e:
+                logger.warning("Embedding warm-up failed: %s", e)
+        with self.profile.stage("gemini_handshake"):
+            try:
+                await asyncio.wait_for(self.chat_service.check_connection(), timeout=WARM_UP_TIMEOUT)
+            except Exception as e:
+                logger.warning("Gemini handshake failed: %s", e)
+
+    async def shutdown(self):
+        """Stop background workers and release pools"""
+        await self.ingestion_queue.close()
+        self.extraction_pool.shutdown(wait=False, cancel_futures=True)
+        self.embedding_service.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+        self.search_tool.cache.close()
+        self.session_store.close()
+        self.collection_store.close()
+
+async def _start_services(app: FastAPI, profile: StartupProfile):
+    def build() -> ServiceContainer:
+        for module in HEAVY_MODULES:
+            profile.import_module(module)
+        services = ServiceContainer(get_settings(), profile)
+        services.register_metrics()
+        return services
+
+    try:
+        # Heavy imports and model loading block, so keep them off the event loop
+        services = await asyncio.to_thread(build)
+        await services.warm_up()
+    except Exception as e:
+        logger.exception("Service startup failed")
+        profile.error = str(e)
+        return
+    app.state.services = services
+    app.state.services_ready.set()
+    profile.mark_ready()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start serving liveness checks immediately; services come up in the background
+    app.state.services = None
+    app.state.services_ready = asyncio.Event()
+    app.state.startup_profile = StartupProfile()
+    startup = asyncio.create_task(_start_services(app, app.state.startup_profile))
+    try:
+        yield
+    finally:
+        startup.cancel()
+        await asyncio.gather(startup, return_exceptions=True)
+        if app.state.services is not None:
+            await app.state.services.shutdown()
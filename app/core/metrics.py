@@ -0,0 +1,293 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import logging
+import random
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans the fast cache paths up to slow model calls and big uploads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+TRACE_BUFFER_SIZE = 100
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values
+        ]
+
+class Gauge(_Metric):
+    """Gauge whose values are read from callbacks at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], **labels: str):
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def render(self) -> List[str]:
+        with self._lock:
+            functions = sorted(self._functions.items())
+        lines = super().render()
+        for key, function in functions:
+            try:
+                value = float(function())
+            except Exception as e:
+                logger.debug("Gauge %s%s failed: %s", self.name, key, e)
+                continue
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (last slot is +Inf), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = super().render()
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "efiko_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "efiko_http_request_duration_seconds", "HTTP request latency by route", ["method", "route"]
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "efiko_stage_duration_seconds", "Latency of pipeline stages", ["component", "stage"]
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "efiko_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+))
+BYTES_PROCESSED = REGISTRY.register(Counter(
+    "efiko_bytes_processed_total", "Bytes read or produced by component", ["component"]
+))
+ADMISSION_DECISIONS = REGISTRY.register(Counter(
+    "efiko_admission_decisions_total", "Admission decisions by work class and outcome", ["work_class", "outcome"]
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "efiko_queue_depth", "Items waiting in internal queues", ["queue"]
+))
+
+class Trace:
+    """Spans recorded for one sampled request"""
+
+    def __init__(self, request_id: str, sampled: bool):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+
+    def add_span(self, component: str, stage: str, started: float, duration: float):
+        self.spans.append({
+            "component": component,
+            "stage": stage,
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3)
+        })
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("efiko_trace", default=None)
+_recent_traces: Deque[dict] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+def recent_traces() -> List[dict]:
+    return list(_recent_traces)
+
+def record_stage(component: str, stage: str, started: float, duration: float):
+    """Record an already measured stage in the histogram and the current trace"""
+    STAGE_DURATION.observe(duration, component=component, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None and trace.sampled:
+        trace.add_span(component, stage, started, duration)
+
+@contextmanager
+def stage(component: str, name: str) -> Iterator[None]:
+    """Time a block as a pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(component, name, started, time.perf_counter() - started)
+
+class StageTimer:
+    """Accumulates the time of a stage that runs in interleaved pieces, recorded once"""
+
+    def __init__(self, component: str, name: str):
+        self.component = component
+        self.name = name
+        self.started = time.perf_counter()
+        self.total = 0.0
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.total += time.perf_counter() - started
+
+    def record(self):
+        record_stage(self.component, self.name, self.started, self.total)
+
+class TimingMiddleware:
+    """ASGI middleware timing every request and tagging it with a request id
+
+    The id comes from the ``X-Request-ID`` header or is generated, and is
+    echoed on the response. A ``sample_rate`` share of requests (by default
+    ``TRACE_SAMPLE_RATE``) record their stage spans, which are logged and kept
+    for ``/traces``.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if self.sample_rate is None:
+            from app.core.config import get_settings
+            self.sample_rate = get_settings().TRACE_SAMPLE_RATE
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex
+        trace = Trace(request_id, sampled=random.random() < self.sample_rate)
+        token = _current_trace.set(trace)
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration = time.perf_counter() - trace.started
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=str(status))
+            HTTP_DURATION.observe(duration, method=method, route=route_path)
+            if trace.sampled:
+                summary = {
+                    "request_id": request_id,
+                    "route": f"{method} {route_path}",
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 3),
+                    "spans": trace.spans
+                }
+                _recent_traces.append(summary)
+                logger.info("Trace %s", summary)
+            _current_trace.reset(token)
@@ -25,3 +25,11 @@ def create_access_token(
         algorithm="HS256"
     )
     return encoded_jwt
+
+def decode_access_token(token: str, settings: Settings) -> Optional[str]:
+    """Return the subject of a valid access token, or None"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except JWTError:
+        return None
+    return payload.get("sub")
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from typing import Dict, Optional
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Imported explicitly during startup so their cost is measured instead of landing on a request
+HEAVY_MODULES = [
+    "google.generativeai",
+    "langchain.embeddings",
+    "langchain.vectorstores",
+    "langchain.text_splitter",
+    "duckduckgo_search",
+    "sqlalchemy",
+]
+
+class StartupProfile:
+    """Records how long each heavy import and service initialization took at startup"""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.services: Dict[str, float] = {}
+        self.ready_after_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def import_module(self, name: str):
+        """Import a module and record the time it took in milliseconds"""
+        started = time.perf_counter()
+        importlib.import_module(name)
+        self.imports[name] = (time.perf_counter() - started) * 1000
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of service initialization"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.services[name] = (time.perf_counter() - started) * 1000
+
+    def mark_ready(self):
+        self.ready_after_ms = (time.perf_counter() - self._started) * 1000
+        logger.info("Startup profile: %s", self.as_dict())
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready_after_ms is not None,
+            "ready_after_ms": self.ready_after_ms,
+            "error": self.error,
+            "imports_ms": self.imports,
+            "services_ms": self.services
+        }
@@ -0,0 +1,87 @@
+import streamlit as st
+import zlib
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+# Shorter messages gain nothing from compression
+COMPRESS_MIN_CHARS = 256
+
+# (role, content), content zlib-compressed when long
+CompactMessage = Tuple[str, Union[str, bytes]]
+
+@lru_cache(maxsize=512)
+def _decode(content: Union[str, bytes]) -> str:
+    # Stored messages are the same objects on every rerun, whose hashes Python caches
+    if isinstance(content, bytes):
+        return zlib.decompress(content).decode("utf-8")
+    return content
+
+class ChatHistory:
+    """Chat transcript kept compactly in session state and rendered as a window
+
+    Only the newest ``window`` messages are rendered on a rerun; older ones
+    are shown a page at a time on request, so reruns cost the same however
+    long the conversation gets. Past ``max_messages`` the oldest messages are
+    dropped from the browser session; the server-side chat session and its
+    export still hold the full history.
+    """
+
+    def __init__(
+        self,
+        key: str = "messages",
+        window: int = 20,
+        page_size: int = 20,
+        max_messages: int = 500
+    ):
+        self.key = key
+        self.window = window
+        self.page_size = page_size
+        self.max_messages = max_messages
+        self._shown_key = f"{key}_shown"
+        self._dropped_key = f"{key}_dropped"
+        if key not in st.session_state:
+            st.session_state[key] = []
+        if self._shown_key not in st.session_state:
+            st.session_state[self._shown_key] = window
+        if self._dropped_key not in st.session_state:
+            st.session_state[self._dropped_key] = 0
+
+    @property
+    def messages(self) -> List[CompactMessage]:
+        return st.session_state[self.key]
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(self, role: str, content: str):
+        """Store a message, compressing long ones and trimming the oldest"""
+        stored = content
+        if len(content) >= COMPRESS_MIN_CHARS:
+            stored = zlib.compress(content.encode("utf-8"))
+        messages = self.messages
+        messages.append((role, stored))
+        excess = len(messages) - self.max_messages
+        if excess > 0:
+            del messages[:excess]
+            st.session_state[self._dropped_key] += excess
+        # Back to the cheap default window once the conversation moves on
+        st.session_state[self._shown_key] = self.window
+
+    def render(self):
+        """Render the newest messages, with a button to page in earlier ones"""
+        messages = self.messages
+        hidden = len(messages) - st.session_state[self._shown_key]
+        if hidden > 0 and st.button(
+            f"Show {min(hidden, self.page_size)} earlier messages",
+            key=f"{self.key}_load_earlier"
+        ):
+            st.session_state[self._shown_key] += self.page_size
+            hidden -= self.page_size
+
+        if hidden <= 0 and st.session_state[self._dropped_key]:
+            st.caption(
+                f"{st.session_state[self._dropped_key]} older messages are only in the exported chat."
+            )
+        for role, content in messages[max(0, hidden):]:
+            with st.chat_message(role):
+                st.markdown(_decode(content))
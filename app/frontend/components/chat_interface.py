@@ -1,40 +1,35 @@
 import streamlit as st
-from datetime import datetime
+from components.chat_history import ChatHistory
 from utils.api_client import APIClient
 
 class ChatInterface:
     def __init__(self, api_client: APIClient):
         self.api_client = api_client
-        self.initialize_session_state()
+        self.history = ChatHistory()
         self.render()
 
-    def initialize_session_state(self):
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-
     def render(self):
         st.title("Chat with Efiko")
 
-        # Display chat history
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(f"{message['content']}")
+        # Display the most recent chat history
+        self.history.render()
 
         # Chat input
         if prompt := st.chat_input("Ask me anything..."):
             # Add user message to chat
-            st.session_state.messages.append({
-                "role": "user",
-                "content": prompt,
-                "timestamp": datetime.now().isoformat()
-            })
+            self.history.append("user", prompt)
+
+            with st.chat_message("user"):
+                st.markdown(prompt)
 
-            # Get AI response
-            response = self.api_client.send_message(prompt)
+            # Stream AI response
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                content = ""
+                for chunk in self.api_client.stream_message(prompt):
+                    content += chunk
+                    placeholder.markdown(content + "▌")
+                placeholder.markdown(content)
             
             # Add AI response to chat
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": response.content,
-                "timestamp": response.timestamp
-            })
+            self.history.append("assistant", content)
@@ -1,6 +1,7 @@
 import streamlit as st
 from datetime import datetime
 from utils.api_client import APIClient
+from utils.resources import file_digest, processed_uploads
 
 class FileUpload:
     def __init__(self, api_client: APIClient):
@@ -16,16 +17,31 @@ class FileUpload:
         
         if uploaded_file:
             if self._validate_file(uploaded_file):
-                with st.spinner("Processing document..."):
-                    try:
-                        response = self.api_client.upload_document(uploaded_file)
-                        if response.get("success"):
-                            self._update_upload_history(uploaded_file.name)
-                            st.success("Document processed successfully!")
-                        else:
-                            st.error("Error processing document")
-                    except Exception as e:
-                        st.error(f"Upload failed: {str(e)}")
+                uploads = processed_uploads()
+                digest = file_digest(uploaded_file)
+                if digest in uploads:
+                    # Already processed on an earlier rerun
+                    return uploads[digest]
+                try:
+                    job = self.api_client.upload_document(uploaded_file)
+                    progress_bar = st.progress(0, text="Queued for processing...")
+                    job = self.api_client.wait_for_upload(
+                        job,
+                        on_progress=lambda status: progress_bar.progress(
+                            int(status["progress"]),
+                            text=f"{status['stage'].title()}..."
+                        )
+                    )
+                    progress_bar.empty()
+                    if job.get("status") == "completed":
+                        uploads[digest] = job
+                        self._update_upload_history(uploaded_file.name)
+                        st.success("Document processed successfully!")
+                    else:
+                        st.error(f"Error processing document: {job.get('error')}")
+                    return job
+                except Exception as e:
+                    st.error(f"Upload failed: {str(e)}")
     
     def _validate_file(self, file):
         """Validate file size and type"""
@@ -1,9 +1,10 @@
 import streamlit as st
 from datetime import datetime
 import os
+from components.chat_history import ChatHistory
 from components.chat_interface import ChatInterface
 from components.file_upload import FileUpload
-from utils.api_client import APIClient
+from utils.resources import file_digest, get_api_client, load_asset, processed_uploads
 import google.generativeai as genai
 from dotenv import load_dotenv
 
@@ -21,19 +22,21 @@ st.set_page_config(
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "conversation_history" not in st.session_state:
-        st.session_state.conversation_history = []
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = None
     if "current_document" not in st.session_state:
         st.session_state.current_document = None
     if "vectorstore_id" not in st.session_state:
         st.session_state.vectorstore_id = None
+    if "session_future" not in st.session_state:
+        # Open the chat session in the background so the first message doesn't wait for it
+        api_client = get_api_client(API_URL)
+        st.session_state.session_future = api_client.submit(api_client.create_session)
 
 def display_sidebar():
     """Display sidebar with file upload and settings"""
     with st.sidebar:
-        st.image("efiko.jpg", width=150)
+        st.image(load_asset("efiko.jpg"), width=150)
         st.markdown("### Welcome to Efiko!")
         
         # File upload section
@@ -54,15 +57,33 @@ def display_sidebar():
 def process_uploaded_file(file):
     """Process uploaded document"""
     try:
-        with st.spinner("Processing document..."):
-            api_client = APIClient(base_url=API_URL)
-            response = api_client.upload_document(file)
-            if response.get("success"):
-                st.session_state.current_document = file.name
-                st.session_state.vectorstore_id = response.get("vectorstore_id")
+        uploads = processed_uploads()
+        digest = file_digest(file)
+        job = uploads.get(digest)
+        if job is None:
+            api_client = get_api_client(API_URL)
+            job = api_client.upload_document(file)
+            progress_bar = st.progress(0, text="Queued for processing...")
+            job = api_client.wait_for_upload(
+                job,
+                on_progress=lambda status: progress_bar.progress(
+                    int(status["progress"]),
+                    text=f"{status['stage'].title()}..."
+                )
+            )
+            progress_bar.empty()
+            uploads[digest] = job
+            if job.get("status") == "completed":
                 st.success("Document processed successfully!")
-            else:
-                st.error("Error processing document")
+
+        if job.get("status") == "completed":
+            st.session_state.current_document = file.name
+            st.session_state.vectorstore_id = job.get("vectorstore_id")
+        else:
+            st.error(f"Error processing document: {job.get('error')}")
+            if st.button("Retry upload"):
+                del uploads[digest]
+                st.rerun()
     except Exception as e:
         st.error(f"Error: {str(e)}")
 
@@ -70,58 +91,68 @@ def display_chat_interface():
     """Display main chat interface"""
     st.title("Chat with Efiko")
     
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display the most recent chat messages
+    history = ChatHistory()
+    history.render()
     
     # Chat input
     if prompt := st.chat_input("Ask me anything..."):
         # Add user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        history.append("user", prompt)
+        with st.chat_message("user"):
+            st.markdown(prompt)
         
-        # Get AI response
+        # Stream AI response, rendering tokens as they arrive
         try:
-            api_client = APIClient(base_url=API_URL)
-            response = api_client.send_message(
-                content=prompt,
-                conversation_history=st.session_state.conversation_history,
-                vectorstore_id=st.session_state.vectorstore_id
-            )
+            api_client = get_api_client(API_URL)
+            if st.session_state.session_id is None:
+                try:
+                    st.session_state.session_id = st.session_state.session_future.result()
+                except Exception:
+                    st.session_state.session_id = api_client.create_session()
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                placeholder.markdown("▌")
+                content = ""
+                for chunk in api_client.stream_message(
+                    content=prompt,
+                    vectorstore_id=st.session_state.vectorstore_id,
+                    session_id=st.session_state.session_id
+                ):
+                    content += chunk
+                    placeholder.markdown(content + "▌")
+                placeholder.markdown(content)
             
             # Add AI response
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": response["content"]
-            })
-            
-            # Update conversation history
-            st.session_state.conversation_history.append({
-                "role": "user",
-                "content": prompt
-            })
-            st.session_state.conversation_history.append({
-                "role": "assistant",
-                "content": response["content"]
-            })
+            history.append("assistant", content)
             
         except Exception as e:
             st.error(f"Error: {str(e)}")
 
+# Label -> (format parameter, file extension, MIME type)
+EXPORT_FORMATS = {
+    "PDF": ("pdf", "pdf", "application/pdf"),
+    "Markdown": ("markdown", "md", "text/markdown"),
+    "HTML": ("html", "html", "text/html")
+}
+
 def add_export_option():
     """Add option to export chat history"""
-    if st.session_state.messages:
+    if ChatHistory().messages and st.session_state.session_id:
+        label = st.sidebar.selectbox("Export format", list(EXPORT_FORMATS))
+        export_format, extension, mime = EXPORT_FORMATS[label]
         if st.sidebar.button("Export Chat"):
             try:
-                api_client = APIClient(base_url=API_URL)
-                pdf_bytes = api_client.export_chat(
-                    chat_id=datetime.now().strftime("%Y%m%d_%H%M%S")
+                api_client = get_api_client(API_URL)
+                data = api_client.export_chat(
+                    chat_id=st.session_state.session_id,
+                    export_format=export_format
                 )
                 st.sidebar.download_button(
-                    label="Download PDF",
-                    data=pdf_bytes,
-                    file_name="chat_export.pdf",
-                    mime="application/pdf"
+                    label=f"Download {label}",
+                    data=data,
+                    file_name=f"chat_export.{extension}",
+                    mime=mime
                 )
             except Exception as e:
                 st.sidebar.error(f"Error exporting chat: {str(e)}")
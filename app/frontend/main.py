@@ -2,7 +2,7 @@ import streamlit as st
 import os
 from components.chat_interface import ChatInterface
 from components.file_upload import FileUpload
-from utils.api_client import APIClient
+from utils.resources import get_api_client, load_asset
 
 # Configure API endpoint based on environment
 API_URL = os.getenv('API_URL', 'http://localhost:8000')  # Default to local backend
@@ -21,12 +21,12 @@ def main():
         initial_sidebar_state="expanded"
     )
 
-    # Initialize API client with correct endpoint
-    api_client = APIClient(base_url=API_URL)
+    # Shared API client with a pooled, keep-alive connection to the backend
+    api_client = get_api_client(API_URL)
 
     # Sidebar
     with st.sidebar:
-        st.image("efiko.jpg", width=150)
+        st.image(load_asset("efiko.jpg"), width=150)
         st.markdown("### Welcome to Efiko!")
         
         # File upload component
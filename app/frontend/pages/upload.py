@@ -1,13 +1,13 @@
 import streamlit as st
 from components.file_upload import FileUpload
-from utils.api_client import APIClient
+from utils.resources import get_api_client
 
 def upload_page():
     st.title("Document Upload")
     st.markdown("### Upload your study materials")
     
-    # Initialize API client
-    api_client = APIClient(base_url="http://localhost:8000")
+    # Shared API client
+    api_client = get_api_client("http://localhost:8000")
     
     # Use the FileUpload component
     FileUpload(api_client=api_client)
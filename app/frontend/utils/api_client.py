@@ -0,0 +1,307 @@
+import copy
+import json
+import time
+import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Iterator, List, Optional
+from urllib3.util.retry import Retry
+
+class _ClientSession:
+    """A shared ``requests.Session`` that tags each request with one user's client id"""
+
+    def __init__(self, session: requests.Session, client_id: str):
+        self._session = session
+        self.client_id = client_id
+
+    def request(self, method: str, url: str, headers: Optional[dict] = None, **kwargs):
+        return self._session.request(method, url, headers={**(headers or {}), "X-Client-Id": self.client_id}, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def close(self):
+        # The connection pool belongs to the client it was borrowed from
+        pass
+
+class APIClient:
+    """Client for the Efiko backend
+
+    Requests go through one ``requests.Session`` whose connection pool keeps
+    connections to the backend alive between calls. Connection failures and
+    overload responses are retried with backoff; non-idempotent requests are
+    only retried when they never reached the server. ``submit`` runs any call
+    on a small worker pool and returns a future, so the UI need not block.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 120,
+        connect_timeout: float = 5,
+        max_retries: int = 3,
+        pool_size: int = 20,
+        max_workers: int = 4
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, timeout)
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="efiko-api")
+
+    def for_client(self, client_id: str) -> "APIClient":
+        """Return a view of this client that identifies its requests as one user's
+
+        The view shares the connection pool and worker pool. The backend tells
+        users behind this server apart by the ``X-Client-Id`` header when the
+        server is listed in its ``ADMISSION_TRUSTED_PROXIES``.
+        """
+        view = copy.copy(self)
+        view.session = _ClientSession(self.session, client_id)
+        return view
+
+    def submit(self, call: Callable, *args, **kwargs) -> Future:
+        """Run ``call`` (usually a method of this client) in the background"""
+        return self._executor.submit(call, *args, **kwargs)
+
+    def close(self):
+        if isinstance(self.session, _ClientSession):
+            return
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def upload_document(self, file, max_part_failures: int = 5) -> dict:
+        """Upload a Streamlit UploadedFile in resumable parts and return its processing job
+
+        After a dropped connection the client asks the server how much arrived
+        and continues from there instead of starting over. Dropped connections
+        and offset conflicts both back off, and more than ``max_part_failures``
+        in a row abort the upload.
+        """
+        data = file.getvalue()
+        response = self.session.post(
+            f"{self.base_url}/api/uploads",
+            json={"filename": file.name, "size": len(data)},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        upload = response.json()
+        upload_url = f"{self.base_url}/api/uploads/{upload['upload_id']}"
+
+        offset = 0
+        failures = 0
+        while offset < len(data):
+            try:
+                response = self.session.patch(
+                    upload_url,
+                    data=data[offset:offset + upload["chunk_size"]],
+                    headers={
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream"
+                    },
+                    timeout=self.timeout
+                )
+                if response.status_code == 409:
+                    # The server has a different idea of how much arrived; a conflict
+                    # that keeps repeating counts as a failure rather than spinning
+                    offset = int(response.headers["Upload-Offset"])
+                    failures += 1
+                    if failures > max_part_failures:
+                        response.raise_for_status()
+                    time.sleep(min(8, 0.5 * 2 ** failures))
+                    continue
+                response.raise_for_status()
+                offset = response.json()["offset"]
+                failures = 0
+            except (requests.ConnectionError, requests.Timeout):
+                failures += 1
+                if failures > max_part_failures:
+                    raise
+                time.sleep(min(8, 0.5 * 2 ** failures))
+                try:
+                    offset = self.session.get(upload_url, timeout=self.timeout).json()["offset"]
+                except (requests.RequestException, ValueError, KeyError):
+                    pass
+
+        response = self.session.post(f"{upload_url}/complete", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def get_upload_status(self, job_id: str) -> dict:
+        """Fetch the stage and progress of a document processing job"""
+        response = self.session.get(
+            f"{self.base_url}/api/upload-status/{job_id}",
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def wait_for_upload(
+        self,
+        job: dict,
+        on_progress: Optional[Callable[[dict], None]] = None,
+        poll_interval: float = 1.0
+    ) -> dict:
+        """Poll a processing job until it completes or fails"""
+        while job.get("status") not in ("completed", "failed"):
+            time.sleep(poll_interval)
+            job = self.get_upload_status(job["job_id"])
+            if on_progress:
+                on_progress(job)
+        return job
+
+    def create_session(self) -> str:
+        """Start a server-side chat session and return its id"""
+        response = self.session.post(f"{self.base_url}/api/sessions", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["session_id"]
+
+    def create_collection(self, name: str, vectorstore_ids: Optional[List[str]] = None) -> dict:
+        """Create a named collection over uploaded documents"""
+        response = self.session.post(
+            f"{self.base_url}/api/collections",
+            json={"name": name, "vectorstore_ids": vectorstore_ids or []},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def add_to_collection(self, collection_id: str, vectorstore_id: str) -> dict:
+        """Add an uploaded document to a collection"""
+        response = self.session.put(
+            f"{self.base_url}/api/collections/{collection_id}/documents/{vectorstore_id}",
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def send_message(
+        self,
+        content: str,
+        conversation_history: Optional[List[dict]] = None,
+        vectorstore_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        collection_id: Optional[str] = None
+    ) -> dict:
+        """Send a chat message and wait for the full response"""
+        response = self.session.post(
+            f"{self.base_url}/api/chat",
+            json=self._chat_payload(
+                content, conversation_history, vectorstore_id, session_id, collection_id
+            ),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def stream_message(
+        self,
+        content: str,
+        conversation_history: Optional[List[dict]] = None,
+        vectorstore_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        collection_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """Send a chat message and yield response text as it is generated"""
+        with self.session.post(
+            f"{self.base_url}/api/chat/stream",
+            json=self._chat_payload(
+                content, conversation_history, vectorstore_id, session_id, collection_id
+            ),
+            stream=True,
+            timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            for event, data in self._iter_events(response):
+                if event == "done":
+                    return
+                yield data.get("content", "")
+
+    def stream_batch(
+        self,
+        questions: List[str],
+        vectorstore_id: str,
+        level: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Ask many questions about one document and yield each result as it is answered
+
+        Results arrive in completion order; each carries the ``index`` of its question.
+        """
+        with self.session.post(
+            f"{self.base_url}/api/chat/batch",
+            json={"questions": questions, "vectorstore_id": vectorstore_id, "level": level},
+            stream=True,
+            timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            for event, data in self._iter_events(response):
+                if event == "done":
+                    return
+                yield data
+
+    def export_chat(self, chat_id: str, export_format: str = "pdf") -> bytes:
+        """Download a chat session's export as PDF, Markdown or HTML bytes"""
+        response = self.session.get(
+            f"{self.base_url}/api/export-chat/{chat_id}",
+            params={"format": export_format},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.content
+
+    @staticmethod
+    def _iter_events(response) -> Iterator[tuple]:
+        # Yields (event, data) for each server-sent event, raising on an error event
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                event = None
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+                continue
+            if not line.startswith("data:"):
+                continue
+
+            data = json.loads(line[len("data:"):].strip())
+            if event == "error":
+                raise Exception(data.get("detail", "Streaming failed"))
+            yield event, data
+
+    def _chat_payload(
+        self,
+        content: str,
+        conversation_history: Optional[List[dict]],
+        vectorstore_id: Optional[str],
+        session_id: Optional[str] = None,
+        collection_id: Optional[str] = None
+    ) -> dict:
+        # With a session the server already holds the history, so only the new message is sent
+        return {
+            "content": content,
+            "conversation_history": [] if session_id else conversation_history or [],
+            "vectorstore_id": vectorstore_id,
+            "collection_id": collection_id,
+            "session_id": session_id
+        }
@@ -0,0 +1,42 @@
+import hashlib
+import uuid
+import streamlit as st
+from utils.api_client import APIClient
+
+@st.cache_resource(show_spinner=False)
+def _shared_api_client(base_url: str) -> APIClient:
+    return APIClient(base_url=base_url)
+
+def get_api_client(base_url: str) -> APIClient:
+    """Return this session's view of the API client shared by the server process
+
+    The connection pool is shared; requests carry the session's client id so
+    the backend's admission quotas apply per user.
+    """
+    return _shared_api_client(base_url).for_client(client_id())
+
+def client_id() -> str:
+    """Return a random id for this browser session, sent so the backend can tell users apart"""
+    if "client_id" not in st.session_state:
+        st.session_state.client_id = uuid.uuid4().hex
+    return st.session_state.client_id
+
+@st.cache_data(show_spinner=False)
+def load_asset(path: str) -> bytes:
+    """Read a static file once per server process"""
+    with open(path, "rb") as f:
+        return f.read()
+
+def file_digest(file) -> str:
+    """Return the SHA-256 of an uploaded file's contents"""
+    return hashlib.sha256(file.getvalue()).hexdigest()
+
+def processed_uploads() -> dict:
+    """Return this session's finished upload jobs keyed by file digest
+
+    ``st.file_uploader`` hands back the same file on every rerun; checking
+    here first keeps it from being uploaded and processed again.
+    """
+    if "processed_uploads" not in st.session_state:
+        st.session_state.processed_uploads = {}
+    return st.session_state.processed_uploads
@@ -0,0 +1,39 @@
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from dotenv import load_dotenv
+
+from app.api.endpoints import chat, collections, documents, health, metrics
+from app.core.config import get_settings
+from app.core.container import lifespan
+from app.core.metrics import TimingMiddleware
+from app.services.admission import AdmissionMiddleware
+from app.services.upload_store import UploadSizeLimitMiddleware
+
+# Load environment variables
+load_dotenv()
+settings = get_settings()
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    description="Backend API for Efiko - Your Study Companion",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.BACKEND_CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(TimingMiddleware, sample_rate=settings.TRACE_SAMPLE_RATE)
+
+app.include_router(health.router, tags=["health"])
+app.include_router(metrics.router, tags=["metrics"])
+app.include_router(chat.router, prefix=settings.API_V1_STR, tags=["chat"])
+app.include_router(documents.router, prefix=settings.API_V1_STR, tags=["documents"])
+app.include_router(collections.router, prefix=settings.API_V1_STR, tags=["collections"])
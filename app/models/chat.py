@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+class ConversationTurn(BaseModel):
+    role: str
+    content: str
+
+class ChatMessage(BaseModel):
+    content: str
+    conversation_history: List[ConversationTurn] = []
+    vectorstore_id: Optional[str] = None
+    collection_id: Optional[str] = None
+    session_id: Optional[str] = None
+    level: Optional[str] = None
+    use_cache: bool = True
+
+class ContextTiming(BaseModel):
+    source: str
+    latency_ms: float
+    status: str
+
+class ChatResponse(BaseModel):
+    content: str
+    timestamp: str
+    context_timings: List[ContextTiming] = []
+    prompt_tokens: Dict[str, int] = {}
+    cached: bool = False
+    session_id: Optional[str] = None
+
+class ChatSession(BaseModel):
+    session_id: str
+    messages: List[ConversationTurn] = []
+
+class BatchChatRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1)
+    vectorstore_id: str
+    level: Optional[str] = None
+    use_cache: bool = True
+
+class BatchChatResult(BaseModel):
+    index: int
+    question: str
+    content: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
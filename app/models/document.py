@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class Document(BaseModel):
     id: str
@@ -12,3 +12,42 @@ class Document(BaseModel):
     file_type: str
     processed: bool
     error: Optional[str] = None
+
+class IngestionJob(BaseModel):
+    job_id: str
+    filename: str
+    status: str = "queued"  # queued, running, completed, failed
+    stage: str = "queued"
+    progress: float = 0.0
+    vectorstore_id: Optional[str] = None
+    error: Optional[str] = None
+    # Summary tree, built after the job completes: pending, running, completed, skipped, failed
+    summary_status: Optional[str] = None
+    summary_progress: float = 0.0
+    created_at: datetime
+    updated_at: datetime
+
+class UploadCreate(BaseModel):
+    filename: str
+    size: Optional[int] = None  # total bytes, if known up front
+
+class UploadSession(BaseModel):
+    upload_id: str
+    filename: str
+    size: Optional[int] = None
+    offset: int = 0  # bytes received so far; the next part starts here
+    chunk_size: int
+    max_size: int
+    created_at: datetime
+    updated_at: datetime
+
+class Collection(BaseModel):
+    collection_id: str
+    name: str
+    vectorstore_ids: List[str] = []
+    created_at: datetime
+    updated_at: datetime
+
+class CollectionCreate(BaseModel):
+    name: str
+    vectorstore_ids: List[str] = []
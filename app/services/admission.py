@@ -0,0 +1,333 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Pattern, Sequence, Set, Tuple
+import asyncio
+import math
+import re
+import time
+
+from app.core.metrics import ADMISSION_DECISIONS, record_stage
+
+CHAT = "chat"
+BATCH = "batch"
+INGEST = "ingest"
+
+# (path pattern, methods, work class, counts against the rate quota)
+ROUTE_CLASSES: List[Tuple[Pattern, Set[str], str, bool]] = [
+    (re.compile(r"/chat(/stream)?$"), {"POST"}, CHAT, True),
+    # Batches run for minutes; their own class keeps them out of interactive chat's service time
+    (re.compile(r"/chat/batch$"), {"POST"}, BATCH, True),
+    (re.compile(r"/(upload-document|documents/upload|uploads)$"), {"POST"}, INGEST, True),
+    # Parts and completion of a resumable upload already paid at creation
+    (re.compile(r"/uploads/[^/]+(/complete)?$"), {"PATCH", "POST"}, INGEST, False)
+]
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is refused, with the status and Retry-After to send"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class RateLimit:
+    """Non-blocking token bucket refilled at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take a token and return 0, or return the seconds until one is available"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+class WorkClass:
+    """Scheduling parameters and queue state for one kind of work"""
+
+    def __init__(
+        self,
+        name: str,
+        weight: float = 1,
+        latency_target: float = 5.0,
+        user_concurrency: int = 2,
+        user_per_minute: float = 30,
+        user_burst: Optional[int] = None
+    ):
+        self.name = name
+        self.weight = weight
+        self.latency_target = latency_target
+        self.user_concurrency = user_concurrency
+        self.user_per_minute = user_per_minute
+        self.user_burst = user_burst or max(1, user_concurrency)
+        # Waiting requests per user, served round-robin
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.queued = 0
+        self.active = 0
+        self.pass_value = 0.0
+        self.service_time = 0.0  # moving average, seconds
+
+class AdmissionController:
+    """Per-user quotas and weighted fair scheduling in front of expensive routes
+
+    At most ``max_concurrency`` requests run at once. Each user gets a rate
+    quota and a concurrency cap per work class; requests over the cap wait.
+    When every slot is busy, work classes share freed slots in proportion to
+    their weights (stride scheduling), and users within a class take turns.
+    A request whose expected queueing time exceeds its class's latency target
+    is shed immediately with a Retry-After rather than queued.
+    """
+
+    def __init__(
+        self,
+        classes: Sequence[WorkClass],
+        max_concurrency: int = 16,
+        max_queued_per_user: int = 4,
+        max_tracked_users: int = 10_000
+    ):
+        self.classes: Dict[str, WorkClass] = {work_class.name: work_class for work_class in classes}
+        self.max_concurrency = max_concurrency
+        self.max_queued_per_user = max_queued_per_user
+        self.max_tracked_users = max_tracked_users
+        self._active = 0
+        self._virtual_time = 0.0
+        self._user_active: Dict[Tuple[str, str], int] = {}
+        self._limits: "OrderedDict[Tuple[str, str], RateLimit]" = OrderedDict()
+
+    async def acquire(self, user: str, work_class: str, rate_limited: bool = True):
+        """Wait for a slot, or raise ``AdmissionRejectedError``"""
+        cls = self.classes[work_class]
+        if rate_limited:
+            retry_after = self._limit(user, cls).try_acquire()
+            if retry_after > 0:
+                self._reject(cls, 429, "Request rate limit exceeded", retry_after, "rate_limited")
+        queue = cls.waiting.get(user)
+        if queue is not None and len(queue) >= self.max_queued_per_user:
+            self._reject(cls, 429, "Too many requests waiting", cls.service_time or 1, "user_queue_full")
+
+        if self._active < self.max_concurrency and self._user_active.get((user, cls.name), 0) < cls.user_concurrency:
+            self._start(user, cls)
+            ADMISSION_DECISIONS.inc(work_class=cls.name, outcome="admitted")
+            return
+
+        estimate = self._estimate_wait(cls)
+        if estimate > cls.latency_target:
+            self._reject(cls, 503, "Server is busy, try again shortly", estimate, "shed")
+
+        future = asyncio.get_running_loop().create_future()
+        if not cls.queued:
+            # A class that was idle must not bank credit from the time it had no work
+            cls.pass_value = max(cls.pass_value, self._virtual_time)
+        cls.waiting.setdefault(user, deque()).append(future)
+        cls.queued += 1
+        started = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # A slot handed over just as we were cancelled must be passed on
+                self.release(user, work_class)
+            else:
+                self._remove_waiter(user, cls, future)
+            raise
+        ADMISSION_DECISIONS.inc(work_class=cls.name, outcome="queued")
+        record_stage("admission", cls.name, started, time.perf_counter() - started)
+
+    def release(self, user: str, work_class: str, service_time: Optional[float] = None):
+        """Free a slot taken by ``acquire`` and hand it to the next waiter"""
+        cls = self.classes[work_class]
+        key = (user, cls.name)
+        self._active -= 1
+        cls.active -= 1
+        self._user_active[key] -= 1
+        if not self._user_active[key]:
+            del self._user_active[key]
+        if service_time is not None:
+            cls.service_time = service_time if not cls.service_time else 0.8 * cls.service_time + 0.2 * service_time
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """Return slot usage, queue lengths and service times per class"""
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "classes": {
+                cls.name: {
+                    "active": cls.active,
+                    "queued": cls.queued,
+                    "waiting_users": len(cls.waiting),
+                    "service_time_ms": cls.service_time * 1000,
+                    "estimated_wait_ms": self._estimate_wait(cls) * 1000
+                }
+                for cls in self.classes.values()
+            }
+        }
+
+    def queue_depth(self) -> int:
+        return sum(cls.queued for cls in self.classes.values())
+
+    def _start(self, user: str, cls: WorkClass):
+        key = (user, cls.name)
+        self._active += 1
+        cls.active += 1
+        self._user_active[key] = self._user_active.get(key, 0) + 1
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency:
+            picked = None
+            for cls in sorted(self.classes.values(), key=lambda c: c.pass_value):
+                if not cls.queued:
+                    continue
+                user = next((
+                    user for user in cls.waiting
+                    if self._user_active.get((user, cls.name), 0) < cls.user_concurrency
+                ), None)
+                if user is not None:
+                    picked = (cls, user)
+                    break
+            if picked is None:
+                return
+
+            cls, user = picked
+            self._virtual_time = cls.pass_value
+            cls.pass_value += 1 / cls.weight
+            queue = cls.waiting[user]
+            future = queue.popleft()
+            cls.queued -= 1
+            if queue:
+                cls.waiting.move_to_end(user)
+            else:
+                del cls.waiting[user]
+            if future.cancelled():
+                continue
+            self._start(user, cls)
+            future.set_result(None)
+
+    def _estimate_wait(self, cls: WorkClass) -> float:
+        # Queued work ahead, drained at this class's weighted share of all slots
+        busy_weight = sum(c.weight for c in self.classes.values() if c.queued or c.active or c is cls)
+        share = cls.weight / busy_weight
+        return (cls.queued + 1) * cls.service_time / (self.max_concurrency * share)
+
+    def _limit(self, user: str, cls: WorkClass) -> RateLimit:
+        key = (user, cls.name)
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = RateLimit(cls.user_per_minute / 60, cls.user_burst)
+            # Forgetting a quiet user only hands them a fresh quota
+            while len(self._limits) > self.max_tracked_users:
+                self._limits.popitem(last=False)
+        else:
+            self._limits.move_to_end(key)
+        return limit
+
+    def _remove_waiter(self, user: str, cls: WorkClass, future: asyncio.Future):
+        queue = cls.waiting.get(user)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        cls.queued -= 1
+        if not queue:
+            del cls.waiting[user]
+
+    @staticmethod
+    def _reject(cls: WorkClass, status_code: int, detail: str, retry_after: float, outcome: str):
+        ADMISSION_DECISIONS.inc(work_class=cls.name, outcome=outcome)
+        raise AdmissionRejectedError(status_code, detail, retry_after)
+
+def classify(method: str, path: str) -> Optional[Tuple[str, bool]]:
+    """Return the work class of a request and whether it counts against the rate quota"""
+    for pattern, methods, work_class, rate_limited in ROUTE_CLASSES:
+        if method in methods and pattern.search(path):
+            return work_class, rate_limited
+    return None
+
+def resolve_user(scope) -> str:
+    """Return the JWT subject of a request, or its client address without a valid token
+
+    Forwarded identities are only believed from trusted proxies: their
+    ``X-Client-Id`` header, or else the nearest untrusted address in
+    ``X-Forwarded-For``.
+    """
+    from app.core.config import get_settings
+    from app.core.security import decode_access_token
+
+    settings = get_settings()
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.lower().startswith("bearer "):
+        subject = decode_access_token(authorization[7:].strip(), settings)
+        if subject:
+            return f"user:{subject}"
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    trusted = settings.ADMISSION_TRUSTED_PROXIES
+    if address in trusted:
+        client_id = headers.get(b"x-client-id", b"").decode("latin-1").strip()
+        if client_id:
+            return f"client:{client_id[:128]}"
+        forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1").split(",")
+        # Walk back from the nearest hop; the first one not added by a trusted proxy is the client
+        for hop in reversed([hop.strip() for hop in forwarded if hop.strip()]):
+            address = hop
+            if hop not in trusted:
+                break
+    return f"address:{address}"
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the app's admission controller to chat and ingestion
+
+    The request's user id is stored on ``request.state.user_id`` for every
+    request. Streaming responses keep their slot until the body is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        user = resolve_user(scope)
+        scope.setdefault("state", {})["user_id"] = user
+        rule = classify(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+        state = scope["app"].state
+        ready = getattr(state, "services_ready", None)
+        if getattr(state, "services", None) is None and ready is not None:
+            # Like get_services: requests during startup wait for the controller
+            from app.core.config import get_settings
+
+            try:
+                await asyncio.wait_for(ready.wait(), timeout=get_settings().SERVICE_READY_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        controller = getattr(getattr(state, "services", None), "admission", None)
+        if controller is None:
+            return await self.app(scope, receive, send)
+
+        work_class, rate_limited = rule
+        try:
+            await controller.acquire(user, work_class, rate_limited)
+        except AdmissionRejectedError as e:
+            from fastapi.responses import JSONResponse
+
+            response = JSONResponse(
+                {"detail": str(e)},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            return await response(scope, receive, send)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(user, work_class, time.perf_counter() - started)
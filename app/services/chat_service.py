@@ -1,30 +1,528 @@
-import google.generativeai as genai
-from typing import List, Optional
-from app.models.chat import ChatMessage
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import time
+from app.core.metrics import record_stage, stage
+from app.models.chat import BatchChatResult, ChatResponse, ContextTiming, ConversationTurn
+from app.services.collection_store import CollectionStore
+from app.services.context_assembler import ContextAssembler
+from app.services.export_service import ConversationExporter
+from app.services.llm_gateway import BATCH_PRIORITY, LLMGateway
 from app.services.web_search import WebSearchTool
+from app.services.semantic_cache import SemanticAnswerCache
+from app.services.summary_tree import is_broad_question, summary_index_id
+from app.services.session_store import SessionStore
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are Efiko, a friendly and patient study companion. "
+    "Explain concepts clearly, adapt to the student's level and "
+    "use the provided context when it is relevant."
+)
 
 class ChatService:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        self.search_tool = WebSearchTool(max_results=3)
+    def __init__(
+        self,
+        api_key: str,
+        registry: Optional[VectorStoreRegistry] = None,
+        search_tool: Optional[WebSearchTool] = None,
+        session_store: Optional[SessionStore] = None,
+        context_assembler: Optional[ContextAssembler] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        collection_store: Optional[CollectionStore] = None,
+        gateway: Optional[LLMGateway] = None,
+        exporter: Optional[ConversationExporter] = None,
+        source_timeout: float = 2.0,
+        context_deadline: float = 3.0,
+        batch_concurrency: int = 8,
+        batch_max_questions: int = 100
+    ):
+        self.gateway = gateway or LLMGateway(api_key, model_name='gemini-pro')
+        self.model_name = self.gateway.model_name
+        self.search_tool = search_tool or WebSearchTool(max_results=3)
+        self.registry = registry
+        self.session_store = session_store
+        self.context_assembler = context_assembler or ContextAssembler()
+        self.answer_cache = answer_cache
+        self.collection_store = collection_store
+        self.exporter = exporter
+        self.source_timeout = source_timeout
+        self.context_deadline = context_deadline
+        self.batch_concurrency = batch_concurrency
+        self.batch_max_questions = batch_max_questions
 
     async def get_response(
         self,
         message: str,
-        conversation_history: List[ChatMessage],
-        vectorstore_id: Optional[str] = None
-    ) -> str:
-        """Generate response using Gemini API"""
-        context = self._build_context(message, conversation_history)
-        search_results = await self._get_search_results(message)
-        
-        if vectorstore_id:
-            doc_context = await self._get_document_context(vectorstore_id, message)
-            context = f"{context}\n{search_results}\n{doc_context}"
+        conversation_history: List[ConversationTurn],
+        vectorstore_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        level: Optional[str] = None,
+        use_cache: bool = True,
+        collection_id: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> ChatResponse:
+        """Generate response using Gemini API
+
+        With a ``session_id`` the history is loaded from the session store and the
+        new exchange is appended to it, so ``conversation_history`` is ignored. With a
+        ``collection_id`` every document in the collection is searched; given an
+        ``owner``, only that user's collections can be used.
+        """
+        with stage("chat", "resolve"):
+            history = await self._resolve_history(conversation_history, session_id)
+            document_ids = await self._resolve_documents(vectorstore_id, collection_id, owner)
+        with stage("chat", "answer_cache"):
+            cached, cache_key = await self._lookup_answer(message, history, document_ids, level, use_cache)
+        if cached is not None:
+            await self._record_exchange(session_id, message, cached)
+            return ChatResponse(
+                content=cached,
+                timestamp=datetime.now().isoformat(),
+                cached=True,
+                session_id=session_id
+            )
+
+        context, timings, prompt_tokens = await self._prepare_prompt(
+            message, history, document_ids, session_id, level
+        )
         
         try:
-            response = await self.model.generate_content(context)
-            return response.text
+            with stage("chat", "llm"):
+                content = await self.gateway.generate(context)
+        except Exception as e:
+            raise Exception(f"Failed to generate response: {str(e)}")
+
+        await self._store_answer(cache_key, message, content)
+        await self._record_exchange(session_id, message, content)
+        return ChatResponse(
+            content=content,
+            timestamp=datetime.now().isoformat(),
+            context_timings=timings,
+            prompt_tokens=prompt_tokens,
+            session_id=session_id
+        )
+
+    async def stream_response(
+        self,
+        message: str,
+        conversation_history: List[ConversationTurn],
+        vectorstore_id: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        session_id: Optional[str] = None,
+        level: Optional[str] = None,
+        use_cache: bool = True,
+        collection_id: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Generate response using Gemini API, yielding text chunks as they arrive
+
+        If given, ``metadata`` is filled with the per-source context timings, prompt
+        size and whether the answer came from the semantic cache.
+        """
+        if metadata is None:
+            metadata = {}
+        metadata["session_id"] = session_id
+
+        with stage("chat", "resolve"):
+            history = await self._resolve_history(conversation_history, session_id)
+            document_ids = await self._resolve_documents(vectorstore_id, collection_id, owner)
+        with stage("chat", "answer_cache"):
+            cached, cache_key = await self._lookup_answer(message, history, document_ids, level, use_cache)
+        metadata["cached"] = cached is not None
+        if cached is not None:
+            yield cached
+            await self._record_exchange(session_id, message, cached)
+            return
+
+        context, timings, prompt_tokens = await self._prepare_prompt(
+            message, history, document_ids, session_id, level
+        )
+        metadata["context_timings"] = [timing.model_dump() for timing in timings]
+        metadata["prompt_tokens"] = prompt_tokens
+
+        chunks = []
+        started = time.perf_counter()
+        try:
+            async for text in self.gateway.stream(context):
+                if not chunks:
+                    record_stage("chat", "llm_first_chunk", started, time.perf_counter() - started)
+                chunks.append(text)
+                yield text
         except Exception as e:
             raise Exception(f"Failed to generate response: {str(e)}")
+
+        record_stage("chat", "llm_stream", started, time.perf_counter() - started)
+        # Only completed answers become part of the session or the cache
+        content = "".join(chunks)
+        await self._store_answer(cache_key, message, content)
+        await self._record_exchange(session_id, message, content)
+
+    def answer_batch(
+        self,
+        questions: List[str],
+        vectorstore_id: str,
+        level: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[BatchChatResult]:
+        """Answer many standalone questions about one document, yielding results as they complete
+
+        The index is loaded once and every question is embedded in one batch.
+        Generation runs at most ``batch_concurrency`` prompts at a time at batch
+        priority, so interactive chat keeps going first. Web search is skipped.
+        A question that fails is reported in its result without ending the batch.
+        """
+        if len(questions) > self.batch_max_questions:
+            raise ValueError(f"A batch holds at most {self.batch_max_questions} questions")
+        if self.registry is None:
+            raise ValueError("Document search is not available")
+        return self._answer_batch(questions, vectorstore_id, level, use_cache)
+
+    async def export_conversation(self, session_id: str, export_format: str = "pdf") -> str:
+        """Render a session's conversation and return the path of the export file"""
+        if self.session_store is None:
+            raise ValueError("Chat sessions are not enabled")
+        if self.exporter is None:
+            raise ValueError("Chat export is not enabled")
+        history = await asyncio.to_thread(self.session_store.get_history, session_id)
+        return await self.exporter.export(
+            [turn.model_dump() for turn in history],
+            export_format
+        )
+
+    async def check_connection(self):
+        """Verify the API key and model by fetching the model's metadata"""
+        await self.gateway.check_connection()
+
+    async def _answer_batch(
+        self,
+        questions: List[str],
+        vectorstore_id: str,
+        level: Optional[str],
+        use_cache: bool,
+        k: int = 6
+    ) -> AsyncIterator[BatchChatResult]:
+        with stage("batch", "embed"):
+            vectors = await asyncio.to_thread(self._embed_queries, questions)
+
+        cache_keys: List[Optional[tuple]] = [None] * len(questions)
+        cached_results: List[BatchChatResult] = []
+        pending = list(range(len(questions)))
+        if use_cache and self.answer_cache is not None:
+            with stage("batch", "answer_cache"):
+                if self.answer_cache.embeddings is self.registry.embeddings:
+                    cache_vectors = [self.answer_cache.normalize(vector) for vector in vectors]
+                else:
+                    cache_vectors = await asyncio.to_thread(
+                        lambda: [self.answer_cache.embed(question) for question in questions]
+                    )
+                scope = self.answer_cache.scope(vectorstore_id, level)
+                pending = []
+                for index, vector in enumerate(cache_vectors):
+                    cached = self.answer_cache.lookup(vector, scope)
+                    if cached is not None:
+                        cached_results.append(
+                            BatchChatResult(index=index, question=questions[index], content=cached, cached=True)
+                        )
+                    else:
+                        cache_keys[index] = (vector, scope)
+                        pending.append(index)
+        for result in cached_results:
+            yield result
+        if not pending:
+            return
+
+        with stage("batch", "retrieve"):
+            contexts = await asyncio.to_thread(
+                self._search_document_batch,
+                vectorstore_id,
+                [questions[index] for index in pending],
+                [vectors[index] for index in pending],
+                k
+            )
+
+        system_prompt = self._system_prompt(level)
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def answer(index: int, chunks: List[str]) -> BatchChatResult:
+            question = questions[index]
+            async with semaphore:
+                prompt, _ = self.context_assembler.assemble(system_prompt, question, [], document_chunks=chunks)
+                try:
+                    with stage("batch", "llm"):
+                        content = await self.gateway.generate(prompt, priority=BATCH_PRIORITY)
+                except Exception as e:
+                    logger.warning("Batch question %s failed: %s", index, e)
+                    return BatchChatResult(index=index, question=question, error=f"Failed to generate response: {e}")
+            await self._store_answer(cache_keys[index], question, content)
+            return BatchChatResult(index=index, question=question, content=content)
+
+        tasks = [asyncio.create_task(answer(index, chunks)) for index, chunks in zip(pending, contexts)]
+        try:
+            for result in asyncio.as_completed(tasks):
+                yield await result
+        finally:
+            # A client that disconnects mid-batch stops the remaining generation
+            for task in tasks:
+                task.cancel()
+
+    def _embed_queries(self, questions: List[str]) -> List[List[float]]:
+        embeddings = self.registry.embeddings
+        if hasattr(embeddings, "embed_queries"):
+            return embeddings.embed_queries(questions)
+        return [embeddings.embed_query(question) for question in questions]
+
+    async def _lookup_answer(
+        self,
+        message: str,
+        history: List[ConversationTurn],
+        document_ids: List[str],
+        level: Optional[str],
+        use_cache: bool
+    ) -> Tuple[Optional[str], Optional[tuple]]:
+        """Return a cached answer (or None) and the key to store a fresh answer under"""
+        # Follow-up questions depend on the conversation, so only standalone questions are cached
+        if not use_cache or self.answer_cache is None or history:
+            return None, None
+        # Scoping by the exact document set keeps answers fresh as collections change
+        scope = self.answer_cache.scope(",".join(sorted(document_ids)), level)
+        try:
+            vector = await asyncio.to_thread(self.answer_cache.embed, message)
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed: %s", e)
+            return None, None
+        return self.answer_cache.lookup(vector, scope), (vector, scope)
+
+    async def _store_answer(self, cache_key: Optional[tuple], message: str, answer: str):
+        if cache_key is None or not answer:
+            return
+        vector, scope = cache_key
+        self.answer_cache.store(vector, scope, message, answer)
+
+    async def _resolve_documents(
+        self,
+        vectorstore_id: Optional[str],
+        collection_id: Optional[str],
+        owner: Optional[str] = None
+    ) -> List[str]:
+        """Return the ids of the document indexes a question should search"""
+        if collection_id:
+            if self.collection_store is None:
+                raise ValueError("Collections are not available")
+            collection = await asyncio.to_thread(self.collection_store.get_collection, collection_id, owner)
+            return collection.vectorstore_ids
+        return [vectorstore_id] if vectorstore_id else []
+
+    async def _resolve_history(
+        self,
+        conversation_history: List[ConversationTurn],
+        session_id: Optional[str]
+    ) -> List[ConversationTurn]:
+        if session_id is None:
+            return conversation_history
+        if self.session_store is None:
+            raise ValueError("Chat sessions are not enabled")
+        return await asyncio.to_thread(self.session_store.get_history, session_id)
+
+    async def _record_exchange(self, session_id: Optional[str], message: str, answer: str):
+        if session_id is None or self.session_store is None:
+            return
+        await asyncio.to_thread(
+            self.session_store.append_turns,
+            session_id,
+            [
+                ConversationTurn(role="user", content=message),
+                ConversationTurn(role="assistant", content=answer)
+            ]
+        )
+
+    async def _prepare_prompt(
+        self,
+        message: str,
+        conversation_history: List[ConversationTurn],
+        document_ids: Sequence[str] = (),
+        session_id: Optional[str] = None,
+        level: Optional[str] = None
+    ) -> Tuple[str, List[ContextTiming], Dict[str, int]]:
+        """Assemble the full prompt sent to the model within the token budget"""
+        sources = {"search": lambda: self._get_search_results(message)}
+        if len(document_ids) == 1:
+            sources["document"] = lambda: self._get_document_context(document_ids[0], message)
+        elif document_ids:
+            sources["document"] = lambda: self._get_collection_context(document_ids, message)
+        results, timings = await self._gather_context(sources)
+
+        with stage("chat", "prompt_build"):
+            prompt, prompt_tokens = self.context_assembler.assemble(
+                self._system_prompt(level),
+                message,
+                conversation_history,
+                search_results=results.get("search"),
+                document_chunks=results.get("document"),
+                session_id=session_id
+            )
+        logger.info("Prompt size: %s", prompt_tokens)
+        return prompt, timings, prompt_tokens
+
+    @staticmethod
+    def _system_prompt(level: Optional[str]) -> str:
+        if level:
+            return f"{SYSTEM_PROMPT} The student's level is: {level}."
+        return SYSTEM_PROMPT
+
+    async def _gather_context(
+        self,
+        sources: Dict[str, Callable[[], Awaitable[Any]]]
+    ) -> Tuple[Dict[str, Any], List[ContextTiming]]:
+        """Fetch context sources concurrently, dropping any that miss their timeout or the deadline"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        async def fetch(name: str, source: Callable[[], Awaitable[Any]]):
+            source_started = loop.time()
+            try:
+                result = await asyncio.wait_for(source(), timeout=self.source_timeout)
+                status = "ok"
+            except asyncio.TimeoutError:
+                result, status = None, "timeout"
+            except Exception as e:
+                logger.warning("Context source %s failed: %s", name, e)
+                result, status = None, "error"
+            latency = loop.time() - source_started
+            record_stage("chat", f"context_{name}", time.perf_counter() - latency, latency)
+            return result, ContextTiming(
+                source=name,
+                latency_ms=latency * 1000,
+                status=status
+            )
+
+        tasks = {
+            asyncio.create_task(fetch(name, source)): name
+            for name, source in sources.items()
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.context_deadline)
+
+        results: Dict[str, Any] = {}
+        timings: List[ContextTiming] = []
+        for task in done:
+            result, timing = task.result()
+            if result is not None:
+                results[tasks[task]] = result
+            timings.append(timing)
+        for task in pending:
+            task.cancel()
+            timings.append(ContextTiming(
+                source=tasks[task],
+                latency_ms=(loop.time() - started) * 1000,
+                status="deadline"
+            ))
+
+        timings.sort(key=lambda timing: timing.source)
+        logger.info(
+            "Context gathered: %s",
+            ", ".join(f"{t.source}={t.latency_ms:.0f}ms ({t.status})" for t in timings)
+        )
+        return results, timings
+
+    async def _get_search_results(self, message: str) -> List[dict]:
+        """Fetch web search results in rank order"""
+        # DuckDuckGo search is blocking, keep it off the event loop
+        return await asyncio.to_thread(self.search_tool.search, message)
+
+    async def _get_document_context(self, vectorstore_id: str, message: str, k: int = 6) -> List[str]:
+        """Retrieve relevant, mutually diverse chunks of an uploaded document"""
+        if self.registry is None:
+            return []
+        return await asyncio.to_thread(self._search_document, vectorstore_id, message, k)
+
+    async def _get_collection_context(self, vectorstore_ids: List[str], message: str, k: int = 6) -> List[str]:
+        """Search every document of a collection in parallel and merge the closest chunks"""
+        if self.registry is None:
+            return []
+        # One query embedding is shared by all shards, which use the same model
+        vector = await asyncio.to_thread(self.registry.embeddings.embed_query, message)
+        shard_results = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._search_shard, vectorstore_id, vector, k)
+                for vectorstore_id in vectorstore_ids
+            ),
+            return_exceptions=True
+        )
+
+        scored = []
+        for vectorstore_id, result in zip(vectorstore_ids, shard_results):
+            if isinstance(result, Exception):
+                logger.warning("Search of document %s failed: %s", vectorstore_id, result)
+                continue
+            scored.extend(result)
+        scored.sort(key=lambda item: item[1])
+        return [content for content, _ in scored[:k]]
+
+    def _search_shard(self, vectorstore_id: str, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        vectorstore = self.registry.get(vectorstore_id)
+        if vectorstore is None:
+            raise ValueError(f"Unknown vectorstore id: {vectorstore_id}")
+        results = vectorstore.similarity_search_with_score_by_vector(vector, k=k)
+        return [(document.page_content, float(score)) for document, score in results]
+
+    def _search_document(self, vectorstore_id: str, message: str, k: int) -> List[str]:
+        vectorstore = self.registry.get(vectorstore_id)
+        if vectorstore is None:
+            raise ValueError(f"Unknown vectorstore id: {vectorstore_id}")
+        if is_broad_question(message):
+            vector = self.registry.embeddings.embed_query(message)
+            return self._search_summaries(vectorstore_id, vector, k) or self._mmr_by_vector(vectorstore, vector, k)
+        # MMR trades a little relevance for diversity, so overlapping chunks don't crowd the budget
+        documents = vectorstore.max_marginal_relevance_search(message, k=k, fetch_k=k * 4)
+        return [document.page_content for document in documents]
+
+    def _search_document_batch(
+        self,
+        vectorstore_id: str,
+        questions: List[str],
+        vectors: List[List[float]],
+        k: int
+    ) -> List[List[str]]:
+        vectorstore = self.registry.get(vectorstore_id)
+        if vectorstore is None:
+            raise ValueError(f"Unknown vectorstore id: {vectorstore_id}")
+        return [
+            (is_broad_question(question) and self._search_summaries(vectorstore_id, vector, k))
+            or self._mmr_by_vector(vectorstore, vector, k)
+            for question, vector in zip(questions, vectors)
+        ]
+
+    def _search_summaries(self, vectorstore_id: str, vector: List[float], k: int) -> List[str]:
+        """Return the document summary and the closest section summaries in document order
+
+        Empty when the document has no summary tree.
+        """
+        summaries = self.registry.get(summary_index_id(vectorstore_id))
+        if summaries is None:
+            return []
+        # The document summary is always stored first
+        root = summaries.docstore.search(summaries.index_to_docstore_id[0])
+        documents = []
+        for document in summaries.similarity_search_by_vector(vector, k=k * 2):
+            first, last = document.metadata["first_chunk"], document.metadata["last_chunk"]
+            # A part summary already covers its sections, and the other way round
+            if document.metadata["kind"] == "document" or any(
+                first <= kept.metadata["last_chunk"] and kept.metadata["first_chunk"] <= last
+                for kept in documents
+            ):
+                continue
+            documents.append(document)
+            if len(documents) == k - 1:
+                break
+        documents.sort(key=lambda document: document.metadata["first_chunk"])
+        return [f"Summary of the whole document:\n{root.page_content}"] + [
+            f"Summary of a part of the document:\n{document.page_content}" for document in documents
+        ]
+
+    @staticmethod
+    def _mmr_by_vector(vectorstore, vector: List[float], k: int) -> List[str]:
+        documents = vectorstore.max_marginal_relevance_search_by_vector(vector, k=k, fetch_k=k * 4)
+        return [document.page_content for document in documents]
@@ -0,0 +1,194 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+import os
+import threading
+import time
+import uuid
+
+from app.models.document import Collection
+
+class CollectionNotFoundError(KeyError):
+    """Raised when a collection id is unknown or belongs to another user"""
+
+class CollectionStore:
+    """Named collections of per-document indexes, persisted with SQLAlchemy
+
+    A collection only references vectorstore ids, so adding or removing a
+    document never touches the indexes themselves. Collections are cached for
+    ``cache_ttl`` seconds, which bounds how long a change made by another
+    worker can go unseen; this worker's own writes are visible at once.
+
+    Each collection records the user who created it. Methods given an
+    ``owner`` treat another user's collection as unknown; without one the
+    check is skipped, for callers that have already authorized the request.
+    """
+
+    def __init__(self, database_url: str, max_cached_collections: int = 256, cache_ttl: float = 5.0):
+        # SQLAlchemy is heavy to import, so load it when the store is built
+        from sqlalchemy import (
+            Column, DateTime, ForeignKey, MetaData, PrimaryKeyConstraint, String, Table, create_engine, inspect, text
+        )
+
+        self.max_cached_collections = max_cached_collections
+        self.cache_ttl = cache_ttl
+        # Collection id -> (time cached, owner, collection)
+        self._cache: "OrderedDict[str, Tuple[float, Optional[str], Collection]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        metadata = MetaData()
+        self._collections = Table(
+            "collections",
+            metadata,
+            Column("id", String(32), primary_key=True),
+            Column("name", String(255), nullable=False),
+            Column("owner", String(255), index=True),
+            Column("created_at", DateTime, nullable=False),
+            Column("updated_at", DateTime, nullable=False)
+        )
+        self._members = Table(
+            "collection_documents",
+            metadata,
+            Column("collection_id", String(32), ForeignKey("collections.id"), nullable=False),
+            Column("vectorstore_id", String(64), nullable=False),
+            Column("added_at", DateTime, nullable=False),
+            PrimaryKeyConstraint("collection_id", "vectorstore_id")
+        )
+
+        connect_args = {}
+        if database_url.startswith("sqlite:///"):
+            connect_args = {"check_same_thread": False}
+            directory = os.path.dirname(database_url[len("sqlite:///"):])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._engine = create_engine(database_url, connect_args=connect_args)
+        metadata.create_all(self._engine)
+        if "owner" not in {column["name"] for column in inspect(self._engine).get_columns("collections")}:
+            # Databases from before owners were recorded; their collections stay unowned
+            with self._engine.begin() as connection:
+                connection.execute(text("ALTER TABLE collections ADD COLUMN owner VARCHAR(255)"))
+
+    def create_collection(
+        self,
+        name: str,
+        vectorstore_ids: Sequence[str] = (),
+        owner: Optional[str] = None
+    ) -> Collection:
+        """Create a collection over the given documents, owned by ``owner``"""
+        collection_id = uuid.uuid4().hex
+        now = datetime.now()
+        with self._engine.begin() as connection:
+            connection.execute(
+                self._collections.insert().values(
+                    id=collection_id, name=name, owner=owner, created_at=now, updated_at=now
+                )
+            )
+            if vectorstore_ids:
+                connection.execute(
+                    self._members.insert(),
+                    [
+                        {"collection_id": collection_id, "vectorstore_id": vectorstore_id, "added_at": now}
+                        for vectorstore_id in dict.fromkeys(vectorstore_ids)
+                    ]
+                )
+        return self.get_collection(collection_id)
+
+    def get_collection(self, collection_id: str, owner: Optional[str] = None) -> Collection:
+        """Return the collection and its documents in the order they were added"""
+        with self._lock:
+            cached = self._cache.get(collection_id)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self._cache.move_to_end(collection_id)
+                return self._authorize(collection_id, cached[1], cached[2], owner)
+
+        from sqlalchemy import select
+
+        with self._engine.connect() as connection:
+            row = connection.execute(
+                select(self._collections).where(self._collections.c.id == collection_id)
+            ).first()
+            if row is None:
+                raise CollectionNotFoundError(f"Unknown collection: {collection_id}")
+            members = connection.execute(
+                select(self._members.c.vectorstore_id)
+                .where(self._members.c.collection_id == collection_id)
+                .order_by(self._members.c.added_at, self._members.c.vectorstore_id)
+            ).scalars().all()
+
+        collection = Collection(
+            collection_id=row.id,
+            name=row.name,
+            vectorstore_ids=list(members),
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
+        with self._lock:
+            self._cache[collection_id] = (time.monotonic(), row.owner, collection)
+            self._cache.move_to_end(collection_id)
+            while len(self._cache) > self.max_cached_collections:
+                self._cache.popitem(last=False)
+        return self._authorize(collection_id, row.owner, collection, owner)
+
+    def add_document(self, collection_id: str, vectorstore_id: str, owner: Optional[str] = None) -> Collection:
+        """Add a document to the collection; adding it twice is a no-op"""
+        # Another worker may have changed the collection since it was cached
+        collection = self._reload(collection_id, owner)
+        if vectorstore_id in collection.vectorstore_ids:
+            return collection
+        now = datetime.now()
+        with self._engine.begin() as connection:
+            connection.execute(
+                self._members.insert().values(
+                    collection_id=collection_id, vectorstore_id=vectorstore_id, added_at=now
+                )
+            )
+            self._touch(connection, collection_id, now)
+        return self._reload(collection_id)
+
+    def remove_document(self, collection_id: str, vectorstore_id: str, owner: Optional[str] = None) -> Collection:
+        """Remove a document from the collection; its index is left in place"""
+        self.get_collection(collection_id, owner)
+        now = datetime.now()
+        with self._engine.begin() as connection:
+            connection.execute(
+                self._members.delete()
+                .where(self._members.c.collection_id == collection_id)
+                .where(self._members.c.vectorstore_id == vectorstore_id)
+            )
+            self._touch(connection, collection_id, now)
+        return self._reload(collection_id)
+
+    def delete_collection(self, collection_id: str, owner: Optional[str] = None):
+        """Delete the collection without deleting any document indexes"""
+        self.get_collection(collection_id, owner)
+        with self._engine.begin() as connection:
+            connection.execute(
+                self._members.delete().where(self._members.c.collection_id == collection_id)
+            )
+            connection.execute(
+                self._collections.delete().where(self._collections.c.id == collection_id)
+            )
+        with self._lock:
+            self._cache.pop(collection_id, None)
+
+    def close(self):
+        self._engine.dispose()
+
+    def _touch(self, connection, collection_id: str, now: datetime):
+        connection.execute(
+            self._collections.update()
+            .where(self._collections.c.id == collection_id)
+            .values(updated_at=now)
+        )
+
+    def _reload(self, collection_id: str, owner: Optional[str] = None) -> Collection:
+        with self._lock:
+            self._cache.pop(collection_id, None)
+        return self.get_collection(collection_id, owner)
+
+    @staticmethod
+    def _authorize(collection_id: str, collection_owner: Optional[str], collection: Collection, owner: Optional[str]):
+        # Another user's collection looks the same as one that does not exist
+        if owner is not None and collection_owner != owner:
+            raise CollectionNotFoundError(f"Unknown collection: {collection_id}")
+        return collection
@@ -0,0 +1,204 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import re
+import threading
+
+from app.models.chat import ConversationTurn
+
+# (existing summary, newly compacted turns) -> updated summary
+Summarizer = Callable[[str, List[ConversationTurn]], str]
+
+CHARS_PER_TOKEN = 4
+SECTION_SHARES = {"history": 0.35, "summary": 0.1, "document": 0.35, "search": 0.2}
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (about four characters per token)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_to_tokens(text: str, tokens: int, keep_end: bool = False) -> str:
+    """Trim text to roughly ``tokens`` tokens, keeping the start (or the end)"""
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    if limit <= 1:
+        return ""
+    return "…" + text[-(limit - 1):] if keep_end else text[:limit - 1] + "…"
+
+def extractive_summary(summary: str, turns: List[ConversationTurn], max_tokens: int = 600) -> str:
+    """Append one short line per turn to the summary, dropping the oldest lines beyond max_tokens"""
+    lines = summary.splitlines() if summary else []
+    for turn in turns:
+        first_sentence = re.split(r"(?<=[.!?])\s", turn.content.strip(), maxsplit=1)[0]
+        speaker = "Student asked" if turn.role == "user" else "Efiko explained"
+        lines.append(f"- {speaker}: {truncate_to_tokens(first_sentence, 40)}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+class ContextAssembler:
+    """Builds prompts that fit a token budget
+
+    Recent turns are kept verbatim; older turns are folded into a summary that
+    is cached per session and only extended with turns that newly left the
+    recent window. Document chunks are deduplicated and search snippets are
+    trimmed in rank order until their share of the budget is used.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 6000,
+        recent_turns: int = 6,
+        summarizer: Optional[Summarizer] = None,
+        max_cached_summaries: int = 1024
+    ):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summarizer = summarizer or extractive_summary
+        self.max_cached_summaries = max_cached_summaries
+        self._summaries: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def assemble(
+        self,
+        system_prompt: str,
+        message: str,
+        history: List[ConversationTurn],
+        search_results: Optional[List[dict]] = None,
+        document_chunks: Optional[List[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        """Return the prompt and the estimated token count of each section"""
+        question = f"Student: {message}\nEfiko:"
+        # Each section separator costs a token on top of the section itself
+        available = max(
+            self.token_budget - estimate_tokens(system_prompt) - estimate_tokens(question) - 5,
+            0
+        )
+
+        split = self._history_split(history)
+        older, recent = history[:split], history[split:]
+        candidates = {
+            "history": bool(recent),
+            "summary": bool(older),
+            "document": bool(document_chunks),
+            "search": bool(search_results)
+        }
+        # Share the budget only among sections that have content
+        total_share = sum(SECTION_SHARES[name] for name, present in candidates.items() if present) or 1
+        budgets = {
+            name: int(available * SECTION_SHARES[name] / total_share) if present else 0
+            for name, present in candidates.items()
+        }
+
+        sections = {
+            "summary": self._summary_section(older, session_id, budgets["summary"]),
+            "history": self._history_section(recent, budgets["history"]),
+            "search": self._search_section(search_results or [], budgets["search"]),
+            "document": self._document_section(document_chunks or [], budgets["document"])
+        }
+
+        parts = [system_prompt]
+        parts.extend(
+            sections[name] for name in ("summary", "history", "search", "document") if sections[name]
+        )
+        parts.append(question)
+        prompt = "\n\n".join(parts)
+
+        section_tokens = {name: estimate_tokens(text) for name, text in sections.items()}
+        section_tokens["total"] = estimate_tokens(prompt)
+        return prompt, section_tokens
+
+    def _history_split(self, history: List[ConversationTurn]) -> int:
+        """Index of the first turn kept verbatim"""
+        return max(len(history) - self.recent_turns, 0)
+
+    def _summary_section(self, older: List[ConversationTurn], session_id: Optional[str], budget: int) -> str:
+        if not older or budget <= 0:
+            return ""
+        summary = self._summarize(older, session_id)
+        if not summary:
+            return ""
+        header = "Earlier in this conversation:\n"
+        return header + truncate_to_tokens(summary, budget - estimate_tokens(header), keep_end=True)
+
+    def _summarize(self, older: List[ConversationTurn], session_id: Optional[str]) -> str:
+        if session_id is None:
+            return self.summarizer("", older)
+
+        with self._lock:
+            summarized, summary = self._summaries.get(session_id, (0, ""))
+        if summarized > len(older):
+            # History was rewritten or shortened; start over
+            summarized, summary = 0, ""
+        if summarized < len(older):
+            summary = self.summarizer(summary, older[summarized:])
+        with self._lock:
+            self._summaries[session_id] = (len(older), summary)
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def _history_section(self, recent: List[ConversationTurn], budget: int) -> str:
+        header = "Conversation so far:\n"
+        lines: List[str] = []
+        used = estimate_tokens(header)
+        # Newest turns are the most relevant, so fill the budget from the end
+        for turn in reversed(recent):
+            speaker = "Student" if turn.role == "user" else "Efiko"
+            line = f"{speaker}: {turn.content}"
+            remaining = budget - used
+            if remaining <= 0:
+                break
+            line = truncate_to_tokens(line, remaining)
+            lines.append(line)
+            used += estimate_tokens(line) + 1
+        if not lines:
+            return ""
+        return header + "\n".join(reversed(lines))
+
+    def _search_section(self, results: List[dict], budget: int) -> str:
+        header = "Web search results:\n"
+        lines: List[str] = []
+        used = estimate_tokens(header)
+        # Results arrive in rank order; later ones are trimmed first
+        for result in results:
+            remaining = budget - used
+            if remaining <= 10:
+                break
+            line = truncate_to_tokens(
+                f"- {result['title']}: {result['snippet']} ({result['link']})",
+                remaining
+            )
+            lines.append(line)
+            used += estimate_tokens(line) + 1
+        if not lines:
+            return ""
+        return header + "\n".join(lines)
+
+    def _document_section(self, chunks: List[str], budget: int) -> str:
+        header = "Relevant document excerpts:\n"
+        selected: List[str] = []
+        used = estimate_tokens(header)
+        for chunk in deduplicate_chunks(chunks):
+            remaining = budget - used
+            if remaining <= 10:
+                break
+            chunk = truncate_to_tokens(chunk, remaining)
+            selected.append(chunk)
+            used += estimate_tokens(chunk) + 1
+        if not selected:
+            return ""
+        return header + "\n\n".join(selected)
+
+def deduplicate_chunks(chunks: List[str]) -> List[str]:
+    """Drop chunks that repeat, or are contained in, a higher-ranked chunk"""
+    kept: List[str] = []
+    normalized_kept: List[str] = []
+    for chunk in chunks:
+        normalized = " ".join(chunk.lower().split())
+        if not normalized or any(normalized in other for other in normalized_kept):
+            continue
+        kept.append(chunk)
+        normalized_kept.append(normalized)
+    return kept
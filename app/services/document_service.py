@@ -1,34 +1,317 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
-from typing import List, Optional
+from fastapi import UploadFile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List, Optional, Tuple
+import asyncio
+import hashlib
 import tempfile
 import os
 
+from app.core.config import get_settings
+from app.core.metrics import StageTimer, stage
+from app.services.embedding_cache import ChunkEmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.faiss_index import IndexPolicy
+from app.services.summary_tree import SummaryTreeBuilder, ordered_chunks, summary_index_id
+from app.services.upload_store import UploadTooLargeError, stream_to_file
+from app.services.vectorstore_registry import VectorStoreRegistry
+from app.utils.text_extraction import count_pdf_pages, extract_docx_paragraphs, extract_pdf_pages
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+PDF_PAGES_PER_TASK = 8
+TEXT_READ_SIZE = 64 * 1024
+INGEST_BATCH_SIZE = 32
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Called with the current stage name and overall percent complete
+ProgressCallback = Callable[[str, float], None]
+
 class DocumentProcessor:
-    def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings()
+    def __init__(
+        self,
+        registry: Optional[VectorStoreRegistry] = None,
+        extraction_pool: Optional[Executor] = None,
+        index_policy: Optional[IndexPolicy] = None,
+        embedding_cache: Optional[ChunkEmbeddingCache] = None,
+        max_file_size: int = 15 * 1024 * 1024,
+        summarizer: Optional[SummaryTreeBuilder] = None
+    ):
+        # LangChain is heavy to import, so load it when a processor is built
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        if registry is None:
+            from langchain.embeddings import HuggingFaceEmbeddings
+
+            settings = get_settings()
+            embeddings = EmbeddingService(
+                HuggingFaceEmbeddings(),
+                max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+                workers=settings.EMBEDDING_WORKERS
+            )
+            registry = VectorStoreRegistry(
+                embeddings,
+                storage_dir=settings.VECTORSTORE_DIR,
+                max_cached=settings.VECTORSTORE_CACHE_SIZE
+            )
+        self.registry = registry
+        self.embeddings = registry.embeddings
+        self._owns_pool = extraction_pool is None
+        self.extraction_pool = extraction_pool or ProcessPoolExecutor(
+            max_workers=get_settings().EXTRACTION_WORKERS
+        )
+        self.index_policy = index_policy or IndexPolicy()
+        self.embedding_cache = embedding_cache
+        self.max_file_size = max_file_size
+        self.summarizer = summarizer
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
         
-    async def process_document(self, file: UploadFile) -> str:
-        """Process uploaded document and create vectorstore"""
-        if file.size > 15 * 1024 * 1024:  # 15MB limit
-            raise ValueError("File size exceeds 15MB limit")
+    async def process_document(
+        self,
+        file: UploadFile,
+        progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """Process uploaded document and return the id of its vectorstore"""
+        temp_file_path, vectorstore_id = await self.save_upload(file)
+        return await self.process_saved_file(
+            temp_file_path, file.filename, vectorstore_id, progress
+        )
+
+    async def save_upload(self, file: UploadFile) -> Tuple[str, str]:
+        """Stream an upload to a temporary file and return its path and vectorstore id
+
+        The file is written and hashed a chunk at a time and rejected once it
+        passes ``max_file_size``. Starlette has already spooled a multipart
+        ``UploadFile`` by then, so routes taking one rely on
+        ``UploadSizeLimitMiddleware`` to cut off oversized bodies; only the
+        resumable upload routes stream from the network.
+        """
+        if file.size is not None and file.size > self.max_file_size:
+            raise UploadTooLargeError(self.max_file_size)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+        with stage("ingest", "save"):
+            hasher = hashlib.sha256()
+            temp_file = tempfile.NamedTemporaryFile(delete=False)
+            try:
+                with temp_file:
+                    await stream_to_file(chunks(), temp_file, hasher, self.max_file_size)
+            except BaseException:
+                os.unlink(temp_file.name)
+                raise
+            return temp_file.name, hasher.hexdigest()
+
+    async def process_saved_file(
+        self,
+        temp_file_path: str,
+        filename: str,
+        vectorstore_id: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """Build (or reuse) the vectorstore for a saved upload, then remove the file
+
+        The summary tree is not built here; see ``build_summaries``.
+        """
+        report = progress or (lambda stage, percent: None)
+
+        async def build() -> "FAISS":
+            pages = self._iter_text(temp_file_path, filename, report)
+            return await self._create_vectorstore(self._split_incrementally(pages), report)
 
-        temp_file_path = await self._save_temp_file(file)
         try:
-            texts = await self._extract_text(temp_file_path, file.filename)
-            vectorstore = await self._create_vectorstore(texts)
-            return vectorstore
+            # Identical uploads share one index and are only embedded once
+            vectorstore = await self.registry.get_or_build(vectorstore_id, build)
         finally:
             os.unlink(temp_file_path)
+        report("done", 100)
+        return vectorstore_id
+
+    def close(self):
+        """Shut down the extraction pool if this processor created it"""
+        if self._owns_pool:
+            self.extraction_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _iter_text(
+        self,
+        file_path: str,
+        filename: str,
+        report: ProgressCallback
+    ) -> AsyncIterator[str]:
+        """Yield the document's text page by page (or paragraph by paragraph) as it is parsed
+
+        Extraction progress is reported on a 0-80% scale; embedding overlaps with it.
+        """
+        extension = os.path.splitext(filename or "")[1].lower()
+        loop = asyncio.get_running_loop()
+        # Only time spent waiting on parsing counts, not time the consumer holds the generator
+        timer = StageTimer("ingest", "extract")
+
+        try:
+            if extension == ".pdf":
+                with timer.measure():
+                    page_count = await loop.run_in_executor(self.extraction_pool, count_pdf_pages, file_path)
+                futures = [
+                    loop.run_in_executor(
+                        self.extraction_pool,
+                        extract_pdf_pages,
+                        file_path,
+                        start,
+                        min(start + PDF_PAGES_PER_TASK, page_count)
+                    )
+                    for start in range(0, page_count, PDF_PAGES_PER_TASK)
+                ]
+                try:
+                    # Page ranges parse in parallel but are yielded in document order
+                    for index, future in enumerate(futures):
+                        with timer.measure():
+                            pages = await future
+                        for page in pages:
+                            yield page
+                        report("extracting", 80 * (index + 1) / len(futures))
+                finally:
+                    for future in futures:
+                        future.cancel()
+            elif extension == ".docx":
+                with timer.measure():
+                    paragraphs = await loop.run_in_executor(
+                        self.extraction_pool, extract_docx_paragraphs, file_path
+                    )
+                report("extracting", 80)
+                for paragraph in paragraphs:
+                    yield paragraph + "\n"
+            elif extension == ".txt":
+                total_size = os.path.getsize(file_path) or 1
+                with open(file_path, "rb") as f:
+                    while True:
+                        with timer.measure():
+                            block = await asyncio.to_thread(f.read, TEXT_READ_SIZE)
+                        if not block:
+                            break
+                        yield block.decode("utf-8", errors="ignore")
+                        report("extracting", 80 * f.tell() / total_size)
+            else:
+                raise ValueError(f"Unsupported file type: {extension or filename}")
+        finally:
+            timer.record()
+
+    async def _split_incrementally(self, pages: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Split streamed text into chunks, holding back only the trailing partial chunk"""
+        timer = StageTimer("ingest", "split")
+        buffer = ""
+        try:
+            async for page in pages:
+                buffer = f"{buffer}\n{page}" if buffer else page
+                with timer.measure():
+                    chunks = self.text_splitter.split_text(buffer)
+                if len(chunks) > 1:
+                    for chunk in chunks[:-1]:
+                        yield chunk
+                    # Keep the raw text from the last chunk on, so the whitespace that
+                    # separates it from the next page still counts as a boundary
+                    buffer = buffer[buffer.rfind(chunks[-1]):]
+            if buffer.strip():
+                with timer.measure():
+                    chunks = self.text_splitter.split_text(buffer)
+                for chunk in chunks:
+                    yield chunk
+        finally:
+            timer.record()
+
+    def _embed_chunks(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunks, reusing cached vectors for text seen in earlier uploads"""
+        with stage("ingest", "embed_batch"):
+            if self.embedding_cache is None:
+                return self.embeddings.embed_documents(texts)
+            return self.embedding_cache.embed_documents(texts, self.embeddings.embed_documents)
+
+    async def _create_vectorstore(
+        self,
+        chunks: AsyncIterator[str],
+        report: ProgressCallback
+    ) -> "FAISS":
+        """Embed streamed chunks into a FAISS vectorstore while later pages are still parsing"""
+        texts: List[str] = []
+        batch: List[str] = []
+        embedding_tasks = []
+
+        def flush():
+            embedding_tasks.append(asyncio.create_task(
+                asyncio.to_thread(self._embed_chunks, list(batch))
+            ))
+            texts.extend(batch)
+            batch.clear()
+
+        try:
+            async for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    flush()
+            if batch:
+                flush()
+            report("embedding", 80)
+            # Embedding overlaps extraction; this is only the wait left once parsing is done
+            with stage("ingest", "embed_wait"):
+                vector_batches = await asyncio.gather(*embedding_tasks)
+        except BaseException:
+            for task in embedding_tasks:
+                task.cancel()
+            await asyncio.gather(*embedding_tasks, return_exceptions=True)
+            raise
+
+        if not texts:
+            raise ValueError("No text could be extracted from the document")
+
+        vectors = [vector for vectors in vector_batches for vector in vectors]
+        report("indexing", 95)
+        with stage("ingest", "index"):
+            return await asyncio.to_thread(
+                self.index_policy.build_vectorstore,
+                texts,
+                vectors,
+                self.embeddings
+            )
+
+    async def build_summaries(
+        self,
+        vectorstore_id: str,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> bool:
+        """Index the summary tree of an indexed document next to its chunks
+
+        Returns whether the document has a summary tree; short documents and
+        processors without a ``summarizer`` go without. The chunk index stays
+        usable if this raises.
+        """
+        if self.summarizer is None:
+            return False
+        summary_id = summary_index_id(vectorstore_id)
+        if self.registry.exists(summary_id):
+            return True
+        vectorstore = await asyncio.to_thread(self.registry.get, vectorstore_id)
+        if vectorstore is None:
+            raise ValueError(f"Document {vectorstore_id} is not indexed")
+        if len(vectorstore.index_to_docstore_id) < self.summarizer.min_chunks:
+            return False
+
+        async def build() -> "FAISS":
+            summaries = await self.summarizer.summarize(ordered_chunks(vectorstore), progress)
+            texts = [summary.text for summary in summaries]
+            vectors = await asyncio.to_thread(self._embed_chunks, texts)
+            return await asyncio.to_thread(
+                self.index_policy.build_vectorstore,
+                texts,
+                vectors,
+                self.embeddings,
+                [summary.metadata for summary in summaries]
+            )
 
-    async def _save_temp_file(self, file: UploadFile) -> str:
-        """Save uploaded file to temporary location"""
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            return temp_file.name
+        with stage("ingest", "summarize"):
+            await self.registry.get_or_build(summary_id, build)
+        return True
@@ -0,0 +1,107 @@
+from typing import Callable, List, Optional, Sequence
+import hashlib
+import os
+import sqlite3
+import threading
+
+from app.core.metrics import CACHE_LOOKUPS
+
+class ChunkEmbeddingCache:
+    """Persistent cache of chunk embeddings keyed by content hash and model id
+
+    Vectors are stored as float16 blobs in SQLite, half the size of the float32
+    originals, which is well within the precision similarity search needs.
+    Re-ingesting an edited document then only embeds chunks whose text changed.
+    """
+
+    def __init__(self, path: str, model_id: str):
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings "
+            "(key BLOB PRIMARY KEY, vector BLOB) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def key(self, text: str) -> bytes:
+        """Return the cache key for a chunk under this cache's model"""
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Return the cached vector for each text, or None where it is missing"""
+        import numpy as np
+
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            found = {}
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._db.execute(
+                    "SELECT key, vector FROM chunk_embeddings WHERE key IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                found.update(rows)
+            vectors = [
+                np.frombuffer(found[key], dtype="float16").astype("float32").tolist()
+                if key in found else None
+                for key in keys
+            ]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+            CACHE_LOOKUPS.inc(hits, cache="chunk_embeddings", result="hit")
+            CACHE_LOOKUPS.inc(len(vectors) - hits, cache="chunk_embeddings", result="miss")
+            return vectors
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors for the given texts"""
+        import numpy as np
+
+        rows = [
+            (self.key(text), np.asarray(vector, dtype="float16").tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunk_embeddings (key, vector) VALUES (?, ?)", rows
+            )
+            self._db.commit()
+
+    def embed_documents(
+        self,
+        texts: Sequence[str],
+        embed: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """Return vectors for all texts, calling ``embed`` only for uncached ones"""
+        vectors = self.get_many(texts)
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[index] for index in missing]
+            fresh = embed(missing_texts)
+            self.put_many(missing_texts, fresh)
+            for index, vector in zip(missing, fresh):
+                vectors[index] = vector
+        return vectors
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of stored vectors"""
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
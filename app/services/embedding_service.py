@@ -0,0 +1,158 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import itertools
+import queue
+import threading
+import time
+
+QUERY_PRIORITY = 0
+DOCUMENT_PRIORITY = 1
+_SHUTDOWN_PRIORITY = 2
+
+_registered = False
+
+def _register_as_embeddings():
+    # Deferred to the first construction so importing this module never loads LangChain
+    global _registered
+    if not _registered:
+        from langchain.embeddings.base import Embeddings
+        Embeddings.register(EmbeddingService)
+        _registered = True
+
+class EmbeddingService:
+    """Embeddings wrapper that micro-batches texts from concurrent callers
+
+    Texts submitted by any thread are queued and grouped into batches of up to
+    ``max_batch_size`` texts, waiting at most ``max_wait_ms`` for a batch to
+    fill. Batches run on a dedicated worker pool. Query embeddings are always
+    dequeued ahead of bulk document ingestion. With ``symmetric`` set, the model
+    embeds queries and documents alike, so a batch of queries is encoded in one
+    ``embed_documents`` call instead of one call per query.
+
+    It implements the LangChain ``Embeddings`` interface and registers itself as
+    a virtual subclass when first constructed, so importing this module stays cheap.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10,
+        workers: int = 1,
+        symmetric: bool = False
+    ):
+        _register_as_embeddings()
+
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.symmetric = symmetric
+        self._queue: "queue.PriorityQueue[Tuple[int, int, Optional[str], Optional[Future]]]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embedding")
+        self._worker_slots = threading.Semaphore(workers)
+        self._stats_lock = threading.Lock()
+        self._pending = {QUERY_PRIORITY: 0, DOCUMENT_PRIORITY: 0}
+        self._texts_embedded = 0
+        self._batches = 0
+        self._busy_seconds = 0.0
+        self._closed = False
+        self._dispatcher = threading.Thread(
+            target=self._dispatch,
+            name="embedding-dispatcher",
+            daemon=True
+        )
+        self._dispatcher.start()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks as part of shared ingestion batches"""
+        futures = [self._submit(text, DOCUMENT_PRIORITY) for text in texts]
+        return [future.result() for future in futures]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query ahead of any queued ingestion work"""
+        return self._submit(text, QUERY_PRIORITY).result()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several search queries, queued together so they share batches"""
+        futures = [self._submit(text, QUERY_PRIORITY) for text in texts]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        """Return queue depth and throughput counters"""
+        with self._stats_lock:
+            return {
+                "query_queue_depth": self._pending[QUERY_PRIORITY],
+                "document_queue_depth": self._pending[DOCUMENT_PRIORITY],
+                "texts_embedded": self._texts_embedded,
+                "batches": self._batches,
+                "average_batch_size": self._texts_embedded / self._batches if self._batches else 0.0,
+                "texts_per_second": self._texts_embedded / self._busy_seconds if self._busy_seconds else 0.0
+            }
+
+    def close(self):
+        """Stop the dispatcher once queued work has been handed to workers"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_SHUTDOWN_PRIORITY, next(self._sequence), None, None))
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, text: str, priority: int) -> Future:
+        if self._closed:
+            raise RuntimeError("Embedding service is closed")
+        future: Future = Future()
+        with self._stats_lock:
+            self._pending[priority] += 1
+        self._queue.put((priority, next(self._sequence), text, future))
+        return future
+
+    def _dispatch(self):
+        while True:
+            # Wait for a free worker before dequeuing, so later queries can still overtake
+            self._worker_slots.acquire()
+            item = self._queue.get()
+            if item[0] == _SHUTDOWN_PRIORITY:
+                self._worker_slots.release()
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    next_item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                # Never mix queries with ingestion or swallow the shutdown marker
+                if next_item[0] != item[0]:
+                    self._queue.put(next_item)
+                    break
+                batch.append(next_item)
+
+            with self._stats_lock:
+                self._pending[item[0]] -= len(batch)
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[int, int, str, Future]]):
+        started = time.monotonic()
+        try:
+            texts = [text for _, _, text, _ in batch]
+            if batch[0][0] == QUERY_PRIORITY and not self.symmetric:
+                vectors = [self.embeddings.embed_query(text) for text in texts]
+            else:
+                vectors = self.embeddings.embed_documents(texts)
+            for (_, _, _, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            with self._stats_lock:
+                self._texts_embedded += len(batch)
+                self._batches += 1
+                self._busy_seconds += time.monotonic() - started
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+        finally:
+            self._worker_slots.release()
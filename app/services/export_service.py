@@ -0,0 +1,179 @@
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Sequence
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+from app.core.metrics import BYTES_PROCESSED, CACHE_LOOKUPS, stage
+from app.utils.export_utils import write_html_from_chat, write_markdown_from_chat
+from app.utils.pdf_utils import merge_pdfs, write_pdf_from_chat
+
+logger = logging.getLogger(__name__)
+
+# Format name -> (media type, file extension)
+EXPORT_FORMATS = {
+    "pdf": ("application/pdf", "pdf"),
+    "markdown": ("text/markdown; charset=utf-8", "md"),
+    "html": ("text/html; charset=utf-8", "html")
+}
+
+# Bump whenever rendering changes so stale cached exports are not served
+RENDER_VERSION = "1"
+
+_WRITERS: Dict[str, Callable[[Sequence[dict], str], None]] = {
+    "pdf": write_pdf_from_chat,
+    "markdown": write_markdown_from_chat,
+    "html": write_html_from_chat
+}
+
+class ConversationExporter:
+    """Renders conversations to files cached on disk by content hash
+
+    Rendering runs in ``executor`` (the app passes its process pool), keeping
+    it off the event loop, and identical exports in progress are shared.
+    PDFs of long conversations are built from fixed-size segments of messages:
+    complete segments never change, so each is rendered once and cached, and
+    a conversation that has grown only renders its new tail before the parts
+    are concatenated. Each segment starts on a new page. The cache is kept
+    under ``max_bytes`` by evicting the least recently used files, except that
+    files used in the last ``min_age`` seconds are kept so a path just handed
+    to a response (by this or another worker) is still there when it is sent.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        executor: Optional[Executor] = None,
+        segment_messages: int = 100,
+        max_bytes: int = 256 * 2 ** 20,
+        min_age: float = 60
+    ):
+        self.cache_dir = cache_dir
+        self.segment_dir = os.path.join(cache_dir, "segments")
+        self.executor = executor
+        self.segment_messages = segment_messages
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+    async def export(self, messages: Sequence[dict], export_format: str = "pdf") -> str:
+        """Return the path of the rendered export, rendering it unless cached"""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        messages = [{"role": m["role"], "content": m["content"]} for m in messages]
+        path = self._path(self.cache_dir, messages, export_format)
+        if self._touch(path):
+            CACHE_LOOKUPS.inc(cache="exports", result="hit")
+            return path
+        CACHE_LOOKUPS.inc(cache="exports", result="miss")
+
+        future = self._in_flight.get(path)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[path] = future
+        try:
+            with stage("export", export_format):
+                if export_format == "pdf":
+                    await self._render_pdf(messages, path)
+                else:
+                    await self._render(_WRITERS[export_format], messages, path)
+            BYTES_PROCESSED.inc(os.path.getsize(path), component="export")
+            await asyncio.to_thread(self._evict, path)
+            future.set_result(path)
+            return path
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Followers see the error; don't warn that nobody retrieved it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[path]
+
+    async def _render_pdf(self, messages: List[dict], path: str):
+        size = self.segment_messages
+        complete = len(messages) - len(messages) % size
+        if complete == 0:
+            await self._render(write_pdf_from_chat, messages, path)
+            return
+
+        parts = list(await asyncio.gather(*(
+            self._render_segment(messages[start:start + size])
+            for start in range(0, complete, size)
+        )))
+        tail_path = None
+        if complete < len(messages):
+            tail_path = f"{path}.{uuid.uuid4().hex}.tail"
+            await self._run(write_pdf_from_chat, messages[complete:], tail_path)
+            parts.append(tail_path)
+        try:
+            await self._render(merge_pdfs, parts, path)
+        finally:
+            if tail_path is not None and os.path.exists(tail_path):
+                os.remove(tail_path)
+
+    async def _render_segment(self, messages: List[dict]) -> str:
+        path = self._path(self.segment_dir, messages, "pdf")
+        if self._touch(path):
+            CACHE_LOOKUPS.inc(cache="export_segments", result="hit")
+        else:
+            CACHE_LOOKUPS.inc(cache="export_segments", result="miss")
+            await self._render(write_pdf_from_chat, messages, path)
+        return path
+
+    async def _render(self, writer: Callable, source, path: str):
+        """Run a writer into a temporary file and move it into place"""
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            await self._run(writer, source, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def _run(self, function: Callable, *args):
+        await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    @staticmethod
+    def _path(directory: str, messages: List[dict], export_format: str) -> str:
+        payload = json.dumps([RENDER_VERSION, export_format, messages], ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return os.path.join(directory, f"{digest}.{EXPORT_FORMATS[export_format][1]}")
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """Mark a cached file as just used, returning False if it does not exist"""
+        # Modification time doubles as last use for eviction
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def _evict(self, keep: str):
+        recent = time.time() - self.min_age
+        files = []
+        for directory in (self.cache_dir, self.segment_dir):
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.endswith(tuple(ext for _, ext in EXPORT_FORMATS.values())):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep or mtime > recent:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                logger.debug("Could not evict export %s: %s", path, e)
@@ -0,0 +1,224 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+import math
+import os
+import pickle
+import time
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+INDEX_TYPES = ("flat", "hnsw_sq", "ivf_sq", "ivf_pq")
+TRAINING_SAMPLE_SIZE = 100_000
+
+class IndexPolicy:
+    """Chooses and builds the FAISS index for a corpus based on its size
+
+    Small corpora get an exact flat index. Medium ones get HNSW over 8-bit
+    scalar-quantized vectors, and large ones an IVF index with product
+    quantization, trading a little recall for memory and search time.
+    """
+
+    def __init__(
+        self,
+        index_type: str = "auto",
+        flat_max_vectors: int = 20_000,
+        pq_min_vectors: int = 500_000,
+        nprobe: int = 16,
+        ef_search: int = 64
+    ):
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+        self.index_type = index_type
+        self.flat_max_vectors = flat_max_vectors
+        self.pq_min_vectors = pq_min_vectors
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+
+    def choose(self, count: int) -> str:
+        """Return the index type to use for ``count`` vectors"""
+        if self.index_type != "auto":
+            return self.index_type
+        if count <= self.flat_max_vectors:
+            return "flat"
+        if count < self.pq_min_vectors:
+            return "hnsw_sq"
+        return "ivf_pq"
+
+    def factory_string(self, index_type: str, count: int, dim: int) -> str:
+        """Return the ``faiss.index_factory`` description for an index type"""
+        # IVF needs roughly 39 training points per list to place centroids well
+        nlist = max(1, min(int(4 * math.sqrt(count)), count // 39))
+        if index_type == "flat":
+            return "Flat"
+        if index_type == "hnsw_sq":
+            return "HNSW32,SQ8"
+        if index_type == "ivf_sq":
+            return f"IVF{nlist},SQ8"
+        # Sub-quantizers must divide the dimension; ~4 dims per byte keeps recall usable
+        subquantizers = max(m for m in range(1, dim // 4 + 1) if dim % m == 0)
+        return f"IVF{nlist},PQ{subquantizers}x8"
+
+    def build_index(self, vectors, index_type: Optional[str] = None):
+        """Train (if needed) and fill a FAISS index with the given float32 vectors"""
+        import faiss
+        import numpy as np
+
+        count, dim = vectors.shape
+        index_type = index_type or self.choose(count)
+        index = faiss.index_factory(dim, self.factory_string(index_type, count, dim))
+        if not index.is_trained:
+            # Quantizers converge on a sample; training on millions of vectors only adds time
+            sample = vectors
+            if count > TRAINING_SAMPLE_SIZE:
+                rows = np.random.default_rng(0).choice(count, TRAINING_SAMPLE_SIZE, replace=False)
+                sample = vectors[rows]
+            index.train(sample)
+        index.add(vectors)
+
+        if index_type.startswith("ivf"):
+            ivf = faiss.extract_index_ivf(index)
+            ivf.nprobe = self.nprobe
+            # MMR re-ranking reconstructs candidate vectors by id
+            ivf.make_direct_map()
+        elif index_type == "hnsw_sq":
+            index.hnsw.efSearch = self.ef_search
+        return index
+
+    def build_vectorstore(
+        self,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        embeddings,
+        metadatas: Optional[Sequence[dict]] = None
+    ) -> "FAISS":
+        """Build a LangChain FAISS vectorstore over precomputed embeddings"""
+        import uuid
+
+        import numpy as np
+        from langchain.docstore.document import Document
+        from langchain.docstore.in_memory import InMemoryDocstore
+        from langchain.vectorstores import FAISS
+
+        index = self.build_index(np.asarray(vectors, dtype="float32"))
+        ids = [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        })
+        return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+def load_vectorstore(path: str, embeddings, mmap: bool = True) -> "FAISS":
+    """Load a vectorstore saved with ``FAISS.save_local``
+
+    With ``mmap`` the index's vector codes are memory-mapped read-only, so
+    processes serving the same index share those pages instead of each
+    holding a copy. Loaded indexes must not be modified.
+    """
+    import faiss
+    from langchain.vectorstores import FAISS
+
+    index_path = os.path.join(path, "index.faiss")
+    index = None
+    if mmap:
+        # IO_FLAG_MMAP_IFC maps flat and HNSW codes in place; plain IO_FLAG_MMAP only
+        # maps IVF inverted lists and copies everything else into memory
+        flags = [faiss.IO_FLAG_MMAP]
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            flags.insert(0, faiss.IO_FLAG_MMAP_IFC)
+        for flag in flags:
+            try:
+                index = faiss.read_index(index_path, flag | faiss.IO_FLAG_READ_ONLY)
+                break
+            except RuntimeError:
+                # Not every FAISS build can map every index type this way
+                continue
+    if index is None:
+        index = faiss.read_index(index_path)
+
+    with open(os.path.join(path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+def recall_latency_report(
+    vectors,
+    queries,
+    k: int = 10,
+    index_types: Sequence[str] = INDEX_TYPES,
+    policy: Optional[IndexPolicy] = None
+) -> List[Dict[str, float]]:
+    """Measure recall@k against exact search, query latency and size per index type"""
+    import faiss
+    import numpy as np
+
+    policy = policy or IndexPolicy()
+    vectors = np.asarray(vectors, dtype="float32")
+    queries = np.asarray(queries, dtype="float32")
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    report = []
+    for index_type in index_types:
+        started = time.perf_counter()
+        index = policy.build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        found = np.empty_like(truth)
+        for row, query in enumerate(queries):
+            started = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found[row] = ids[0]
+
+        hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+        report.append({
+            "index_type": index_type,
+            "factory": policy.factory_string(index_type, len(vectors), vectors.shape[1]),
+            "build_s": round(build_seconds, 3),
+            "recall_at_k": hits / truth.size,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "size_mb": faiss.serialize_index(index).nbytes / 2 ** 20
+        })
+    return report
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Compare FAISS index types on recall and latency")
+    parser.add_argument("--vectorstore", help="Directory of a saved vectorstore to sample vectors from")
+    parser.add_argument("--vectors", type=int, default=50_000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768, help="Synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    if args.vectorstore:
+        import faiss
+
+        index = faiss.read_index(os.path.join(args.vectorstore, "index.faiss"))
+        vectors = index.reconstruct_n(0, index.ntotal)
+    else:
+        # Clustered data behaves more like real embeddings than uniform noise
+        centers = rng.normal(size=(max(1, args.vectors // 500), args.dim))
+        vectors = centers[rng.integers(len(centers), size=args.vectors)]
+        vectors = vectors + 0.3 * rng.normal(size=vectors.shape)
+    vectors = np.asarray(vectors, dtype="float32")
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype("float32")
+
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, recall@{args.k}")
+    print(f"{'index':<10}{'factory':<20}{'build s':>9}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'MB':>9}")
+    for row in recall_latency_report(vectors, queries, k=args.k):
+        print(
+            f"{row['index_type']:<10}{row['factory']:<20}{row['build_s']:>9.2f}"
+            f"{row['recall_at_k']:>9.3f}{row['p50_ms']:>9.3f}{row['p95_ms']:>9.3f}{row['size_mb']:>9.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+from fastapi import UploadFile
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import uuid
+
+from app.models.document import IngestionJob
+from app.services.document_service import DocumentProcessor
+
+logger = logging.getLogger(__name__)
+
+class IngestionQueueFullError(Exception):
+    """Raised when the ingestion backlog is at capacity"""
+
+class IngestionQuotaExceededError(IngestionQueueFullError):
+    """Raised when one owner already has their maximum of documents in the backlog"""
+
+class IngestionQueue:
+    """Bounded background queue that turns uploads into vectorstores off the request path
+
+    Jobs are grouped by owner and workers take them round-robin across owners,
+    so one user's pile of textbooks does not hold up everyone else's notes.
+    A job completes as soon as its chunks are searchable; the summary tree is
+    then built in a background task outside the workers, at most
+    ``summary_workers`` documents at a time, and tracked in ``summary_status``.
+    """
+
+    def __init__(
+        self,
+        document_processor: DocumentProcessor,
+        workers: int = 2,
+        max_pending: int = 32,
+        max_jobs: int = 1000,
+        max_pending_per_owner: Optional[int] = None,
+        summary_workers: int = 1
+    ):
+        self.document_processor = document_processor
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.max_pending_per_owner = max_pending_per_owner
+        # Queued (job id, file path) per owner, in round-robin order
+        self._pending: "OrderedDict[str, Deque[Tuple[str, str]]]" = OrderedDict()
+        self._pending_count = 0
+        self._ready = asyncio.Semaphore(0)
+        # Queued or running jobs per owner
+        self._owner_jobs: Dict[str, int] = {}
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._summary_slots = asyncio.Semaphore(summary_workers)
+        self._summary_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, file: UploadFile, owner: str = "anonymous") -> IngestionJob:
+        """Save an upload and queue it for processing, returning its job immediately"""
+        self._ensure_workers()
+        self.check_capacity(owner)
+
+        temp_file_path, vectorstore_id = await self.document_processor.save_upload(file)
+        return self.submit_saved(temp_file_path, file.filename, vectorstore_id, owner)
+
+    def submit_saved(
+        self,
+        temp_file_path: str,
+        filename: str,
+        vectorstore_id: str,
+        owner: str = "anonymous"
+    ) -> IngestionJob:
+        """Queue an already saved file for processing; the queue takes ownership of it"""
+        self._ensure_workers()
+        now = datetime.now()
+        job = IngestionJob(
+            job_id=uuid.uuid4().hex,
+            filename=filename,
+            vectorstore_id=vectorstore_id,
+            created_at=now,
+            updated_at=now
+        )
+
+        if self.document_processor.registry.exists(vectorstore_id):
+            # Already indexed, nothing to queue
+            os.unlink(temp_file_path)
+            self._update(job, status="completed", stage="done", progress=100)
+            self._summarize_later(job)
+        else:
+            try:
+                self.check_capacity(owner)
+            except IngestionQueueFullError:
+                os.unlink(temp_file_path)
+                raise
+            self._pending.setdefault(owner, deque()).append((job.job_id, temp_file_path))
+            self._pending_count += 1
+            self._owner_jobs[owner] = self._owner_jobs.get(owner, 0) + 1
+            self._ready.release()
+
+        self._remember(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Return the job with the given id, if it is still tracked"""
+        return self._jobs.get(job_id)
+
+    def is_full(self, owner: Optional[str] = None) -> bool:
+        """Whether the backlog, or ``owner``'s share of it, has no room for another job"""
+        if self._pending_count >= self.max_pending:
+            return True
+        return (
+            owner is not None
+            and self.max_pending_per_owner is not None
+            and self._owner_jobs.get(owner, 0) >= self.max_pending_per_owner
+        )
+
+    def queue_depth(self) -> int:
+        return self._pending_count
+
+    async def close(self):
+        """Stop the workers and summary tasks; jobs still queued are abandoned"""
+        tasks = self._worker_tasks + list(self._summary_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._summary_tasks.clear()
+
+    def _ensure_workers(self):
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+    def check_capacity(self, owner: str):
+        """Raise ``IngestionQueueFullError`` if a job from ``owner`` would be refused"""
+        if self._pending_count >= self.max_pending:
+            raise IngestionQueueFullError("Too many documents are being processed, try again shortly")
+        if self.is_full(owner):
+            raise IngestionQuotaExceededError(
+                f"You already have {self.max_pending_per_owner} documents processing, "
+                "wait for them to finish"
+            )
+
+    def _next_pending(self) -> Tuple[str, str, str]:
+        owner, jobs = next(iter(self._pending.items()))
+        job_id, temp_file_path = jobs.popleft()
+        self._pending_count -= 1
+        if jobs:
+            self._pending.move_to_end(owner)
+        else:
+            del self._pending[owner]
+        return owner, job_id, temp_file_path
+
+    async def _work(self):
+        while True:
+            await self._ready.acquire()
+            owner, job_id, temp_file_path = self._next_pending()
+            job = self._jobs[job_id]
+            try:
+                self._update(job, status="running", stage="extracting")
+                await self.document_processor.process_saved_file(
+                    temp_file_path,
+                    job.filename,
+                    job.vectorstore_id,
+                    progress=lambda stage, percent: self._update(job, stage=stage, progress=percent)
+                )
+                self._update(job, status="completed", stage="done", progress=100)
+            except Exception as e:
+                self._update(job, status="failed", error=str(e))
+            else:
+                self._summarize_later(job)
+            finally:
+                self._owner_jobs[owner] -= 1
+                if not self._owner_jobs[owner]:
+                    del self._owner_jobs[owner]
+
+    def _summarize_later(self, job: IngestionJob):
+        if self.document_processor.summarizer is None:
+            return
+        self._update(job, summary_status="pending")
+        task = asyncio.create_task(self._summarize(job))
+        self._summary_tasks.add(task)
+        task.add_done_callback(self._summary_tasks.discard)
+
+    async def _summarize(self, job: IngestionJob):
+        async with self._summary_slots:
+            self._update(job, summary_status="running")
+            try:
+                built = await self.document_processor.build_summaries(
+                    job.vectorstore_id,
+                    progress=lambda fraction: self._update(job, summary_progress=100 * fraction)
+                )
+            except Exception as e:
+                # The chunk index is already searchable, so the job stays completed
+                logger.warning("Summary tree for %s failed: %s", job.vectorstore_id, e)
+                self._update(job, summary_status="failed")
+            else:
+                if built:
+                    self._update(job, summary_status="completed", summary_progress=100)
+                else:
+                    self._update(job, summary_status="skipped")
+
+    def _update(self, job: IngestionJob, **changes):
+        for field, value in changes.items():
+            setattr(job, field, value)
+        job.updated_at = datetime.now()
+
+    def _remember(self, job: IngestionJob):
+        self._jobs[job.job_id] = job
+        # Forget the oldest finished jobs once we track too many
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in ("completed", "failed"):
+                del self._jobs[job_id]
@@ -0,0 +1,238 @@
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import time
+
+from app.core.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = 1
+
+# HTTP statuses worth retrying: quota, upstream errors and timeouts
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 1000
+
+class TokenBucket:
+    """Async token bucket refilled at ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class LLMGateway:
+    """Shared, rate-limited access to a Gemini model
+
+    Upstream calls are capped at ``max_concurrency`` at a time; waiting callers
+    are served by priority, so interactive chat goes ahead of batch work. Each
+    attempt takes a token from a bucket refilled at ``requests_per_minute``.
+    Quota and transient upstream errors are retried with exponential backoff
+    and full jitter. Identical prompts already in flight share one call
+    (streams are never shared).
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = "gemini-pro",
+        model=None,
+        requests_per_minute: float = 60,
+        burst: Optional[int] = None,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0
+    ):
+        if model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+        self.model = model
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._bucket = TokenBucket(
+            rate=requests_per_minute / 60,
+            capacity=burst or max(1, max_concurrency)
+        )
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Shared upstream call per prompt, with the number of callers awaiting it
+        self._in_flight: Dict[str, List] = {}
+        self._queue_waits: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._upstream_latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._counters = {"requests": 0, "deduplicated": 0, "retries": 0, "failures": 0}
+
+    async def generate(self, prompt: str, priority: int = INTERACTIVE_PRIORITY) -> str:
+        """Return the model's full answer to the prompt
+
+        The upstream call runs as its own task, so a caller that is cancelled
+        does not fail others waiting on the same prompt; it is only cancelled
+        once every caller has gone.
+        """
+        self._counters["requests"] += 1
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        shared = self._in_flight.get(key)
+        if shared is None:
+            shared = self._in_flight[key] = [asyncio.create_task(self._call(prompt, priority)), 0]
+            shared[0].add_done_callback(lambda task: self._finish_shared(key, shared))
+        else:
+            self._counters["deduplicated"] += 1
+
+        task = shared[0]
+        shared[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            shared[1] -= 1
+            if not shared[1] and not task.done():
+                # Nobody is left to read the answer
+                task.cancel()
+
+    def _finish_shared(self, key: str, shared: List):
+        if self._in_flight.get(key) is shared:
+            del self._in_flight[key]
+        task = shared[0]
+        if not task.cancelled():
+            # Waiters see any error; don't warn that nobody retrieved it
+            task.exception()
+
+    async def stream(self, prompt: str, priority: int = INTERACTIVE_PRIORITY) -> AsyncIterator[str]:
+        """Yield the model's answer as it is generated
+
+        Failures are retried only until the first chunk has been yielded.
+        """
+        self._counters["requests"] += 1
+        await self._acquire_slot(priority)
+        try:
+            for attempt in itertools.count():
+                await self._bucket.acquire()
+                started = time.monotonic()
+                yielded = False
+                try:
+                    response = await self.model.generate_content_async(prompt, stream=True)
+                    async for chunk in response:
+                        if not yielded:
+                            self._record_upstream(started)
+                            yielded = True
+                        yield chunk.text
+                    return
+                except Exception as e:
+                    if yielded or not await self._should_retry(e, attempt):
+                        raise
+        finally:
+            self._release_slot()
+
+    async def check_connection(self):
+        """Verify the API key and model by fetching the model's metadata"""
+        import google.generativeai as genai
+
+        await asyncio.to_thread(genai.get_model, f"models/{self.model_name}")
+
+    def stats(self) -> dict:
+        """Return concurrency, queueing, retry and latency figures"""
+        return {
+            **self._counters,
+            "in_flight": self._active,
+            "queued": len(self._waiters),
+            "queue_wait_ms": self._percentiles(self._queue_waits),
+            "upstream_latency_ms": self._percentiles(self._upstream_latencies)
+        }
+
+    async def _call(self, prompt: str, priority: int) -> str:
+        await self._acquire_slot(priority)
+        try:
+            for attempt in itertools.count():
+                await self._bucket.acquire()
+                started = time.monotonic()
+                try:
+                    response = await self.model.generate_content_async(prompt)
+                    text = response.text
+                except Exception as e:
+                    if not await self._should_retry(e, attempt):
+                        raise
+                    continue
+                self._record_upstream(started)
+                return text
+        finally:
+            self._release_slot()
+
+    async def _should_retry(self, error: Exception, attempt: int) -> bool:
+        """Back off before the next attempt, or return False if the error is final"""
+        status = getattr(error, "code", None)
+        retryable = status in RETRYABLE_STATUS_CODES or isinstance(error, asyncio.TimeoutError)
+        if not retryable or attempt >= self.max_retries:
+            self._counters["failures"] += 1
+            return False
+        self._counters["retries"] += 1
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        logger.warning("Gemini call failed (%s), retrying in %.2fs", error, delay)
+        await asyncio.sleep(delay)
+        return True
+
+    async def _acquire_slot(self, priority: int):
+        started = time.monotonic()
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # A slot handed over just as we were cancelled must be passed on
+                if waiter.done() and not waiter.cancelled():
+                    self._release_slot()
+                raise
+        wait = time.monotonic() - started
+        self._queue_waits.append(wait)
+        record_stage("llm", "queue_wait", time.perf_counter() - wait, wait)
+
+    def _record_upstream(self, started: float):
+        latency = time.monotonic() - started
+        self._upstream_latencies.append(latency)
+        record_stage("llm", "upstream", time.perf_counter() - latency, latency)
+
+    def _release_slot(self):
+        # The slot passes straight to the next waiter, so _active stays unchanged
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @staticmethod
+    def _percentiles(samples: Deque[float]) -> dict:
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0}
+        ordered = sorted(samples)
+        return {
+            "p50": ordered[len(ordered) // 2] * 1000,
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+        }
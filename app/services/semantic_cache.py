@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import itertools
+import threading
+import time
+
+from app.core.metrics import CACHE_LOOKUPS
+
+Scope = Tuple[str, str]
+
+class CachedAnswer(NamedTuple):
+    scope: Scope
+    vector: "object"
+    question: str
+    answer: str
+    created_at: float
+
+class SemanticAnswerCache:
+    """Reuses answers to near-duplicate questions asked against the same document and level
+
+    Questions are embedded and compared by cosine similarity with earlier
+    questions in the same scope. Entries expire after ``ttl`` seconds and the
+    least recently used ones are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, embeddings, threshold: float = 0.92, ttl: float = 86400, max_entries: int = 5000):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._scopes: Dict[Scope, List[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope(vectorstore_id: Optional[str], level: Optional[str]) -> Scope:
+        return (vectorstore_id or "", (level or "").strip().lower())
+
+    def embed(self, question: str):
+        """Return the normalized embedding used for lookups"""
+        return self.normalize(self.embeddings.embed_query(question))
+
+    @staticmethod
+    def normalize(embedding):
+        """Turn a query embedding from the cache's model into a lookup vector"""
+        import numpy as np
+
+        vector = np.asarray(embedding, dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector, scope: Scope) -> Optional[str]:
+        """Return the answer to the most similar cached question above the threshold"""
+        import numpy as np
+
+        now = time.time()
+        with self._lock:
+            ids = [
+                entry_id for entry_id in self._scopes.get(scope, [])
+                if now - self._entries[entry_id].created_at <= self.ttl
+            ]
+            best_id = None
+            if ids:
+                similarities = np.stack([self._entries[entry_id].vector for entry_id in ids]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    best_id = ids[best]
+
+            if best_id is None:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(cache="answers", result="miss")
+                return None
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="answers", result="hit")
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id].answer
+
+    def store(self, vector, scope: Scope, question: str, answer: str):
+        """Cache an answer for the given question embedding"""
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = CachedAnswer(scope, vector, question, answer, time.time())
+            self._scopes.setdefault(scope, []).append(entry_id)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _evict(self):
+        now = time.time()
+        expired = [
+            entry_id for entry_id, entry in self._entries.items()
+            if now - entry.created_at > self.ttl
+        ]
+        for entry_id in expired:
+            self._remove(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        scope_ids = self._scopes[entry.scope]
+        scope_ids.remove(entry_id)
+        if not scope_ids:
+            del self._scopes[entry.scope]
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Tuple
+import os
+import threading
+import uuid
+
+from app.models.chat import ConversationTurn
+
+class SessionNotFoundError(KeyError):
+    """Raised when a chat session id is unknown"""
+
+class SessionStore:
+    """Chat sessions persisted with SQLAlchemy, with an LRU of recently active sessions in memory
+
+    The database is the source of truth; cached histories are only extended
+    with newer turns read from it.
+    """
+
+    def __init__(self, database_url: str, max_cached_sessions: int = 256):
+        # SQLAlchemy is heavy to import, so load it when the store is built
+        from sqlalchemy import (
+            Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, create_engine
+        )
+
+        self.max_cached_sessions = max_cached_sessions
+        # Session id -> (id of the last cached turn, turns)
+        self._cache: "OrderedDict[str, Tuple[int, List[ConversationTurn]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        metadata = MetaData()
+        self._sessions = Table(
+            "chat_sessions",
+            metadata,
+            Column("id", String(32), primary_key=True),
+            Column("created_at", DateTime, nullable=False),
+            Column("updated_at", DateTime, nullable=False)
+        )
+        self._turns = Table(
+            "chat_turns",
+            metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("session_id", String(32), ForeignKey("chat_sessions.id"), index=True, nullable=False),
+            Column("role", String(16), nullable=False),
+            Column("content", Text, nullable=False),
+            Column("created_at", DateTime, nullable=False)
+        )
+
+        connect_args = {}
+        if database_url.startswith("sqlite:///"):
+            connect_args = {"check_same_thread": False}
+            directory = os.path.dirname(database_url[len("sqlite:///"):])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._engine = create_engine(database_url, connect_args=connect_args)
+        metadata.create_all(self._engine)
+
+    def create_session(self) -> str:
+        """Create an empty session and return its id"""
+        session_id = uuid.uuid4().hex
+        now = datetime.now()
+        with self._engine.begin() as connection:
+            connection.execute(
+                self._sessions.insert().values(id=session_id, created_at=now, updated_at=now)
+            )
+        self._remember(session_id, 0, [])
+        return session_id
+
+    def get_history(self, session_id: str) -> List[ConversationTurn]:
+        """Return the session's turns, oldest first
+
+        A cached session only reads the turns added since it was cached, so
+        turns written by other workers or concurrent requests are never missed.
+        """
+        from sqlalchemy import select
+
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None:
+                self._cache.move_to_end(session_id)
+
+        with self._engine.connect() as connection:
+            if cached is None:
+                exists = connection.execute(
+                    select(self._sessions.c.id).where(self._sessions.c.id == session_id)
+                ).first()
+                if exists is None:
+                    raise SessionNotFoundError(f"Unknown session: {session_id}")
+            last_id, turns = cached or (0, [])
+            rows = connection.execute(
+                select(self._turns.c.id, self._turns.c.role, self._turns.c.content)
+                .where(self._turns.c.session_id == session_id, self._turns.c.id > last_id)
+                .order_by(self._turns.c.id)
+            ).all()
+
+        if rows:
+            turns = turns + [ConversationTurn(role=row.role, content=row.content) for row in rows]
+            last_id = rows[-1].id
+        self._remember(session_id, last_id, turns)
+        return list(turns)
+
+    def append_turns(self, session_id: str, turns: List[ConversationTurn]):
+        """Persist new turns at the end of a session"""
+        now = datetime.now()
+        with self._engine.begin() as connection:
+            updated = connection.execute(
+                self._sessions.update()
+                .where(self._sessions.c.id == session_id)
+                .values(updated_at=now)
+            )
+            if not updated.rowcount:
+                raise SessionNotFoundError(f"Unknown session: {session_id}")
+            connection.execute(
+                self._turns.insert(),
+                [
+                    {"session_id": session_id, "role": turn.role, "content": turn.content, "created_at": now}
+                    for turn in turns
+                ]
+            )
+        # The cached prefix stays valid; the next read picks the new turns up from the database
+
+    def close(self):
+        self._engine.dispose()
+
+    def _remember(self, session_id: str, last_id: int, turns: List[ConversationTurn]):
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None and cached[0] > last_id:
+                # A concurrent read already cached a longer history
+                return
+            self._cache[session_id] = (last_id, turns)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.max_cached_sessions:
+                self._cache.popitem(last=False)
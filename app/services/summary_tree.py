@@ -0,0 +1,142 @@
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Sequence
+import asyncio
+import math
+import re
+
+from app.services.llm_gateway import BATCH_PRIORITY
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+SECTION_PROMPT = (
+    "Summarize the following consecutive passages of a study document in at most {words} words. "
+    "Keep headings, key terms, definitions and the order of ideas.\n\n{text}"
+)
+GROUP_PROMPT = (
+    "Combine these summaries of consecutive parts of a study document into one summary "
+    "of at most {words} words. Keep headings, key terms and the order of ideas.\n\n{text}"
+)
+
+# Overview questions are answered from summaries rather than a handful of raw chunks
+BROAD_QUESTION = re.compile(
+    r"\b(summar(y|ies|ize|ise)|overview|outline|gist|tl;?dr"
+    r"|(main|key) (ideas?|points?|themes?|takeaways?|arguments?)"
+    r"|what('s| is) (this|the|it) (\w+ )?about)\b",
+    re.IGNORECASE
+)
+
+def is_broad_question(message: str) -> bool:
+    """Return whether a question asks about a document as a whole or a large part of it"""
+    return bool(BROAD_QUESTION.search(message))
+
+def summary_index_id(vectorstore_id: str) -> str:
+    """Return the registry id under which a document's summary index is stored"""
+    return f"{vectorstore_id}summaries"
+
+def ordered_chunks(vectorstore: "FAISS") -> List[str]:
+    """Return the chunks of an index built from a document, in document order"""
+    return [
+        vectorstore.docstore.search(vectorstore.index_to_docstore_id[position]).page_content
+        for position in range(len(vectorstore.index_to_docstore_id))
+    ]
+
+class Summary(NamedTuple):
+    kind: str  # "section", "part" or "document"
+    first_chunk: int
+    last_chunk: int
+    text: str
+
+    @property
+    def metadata(self) -> dict:
+        return {"kind": self.kind, "first_chunk": self.first_chunk, "last_chunk": self.last_chunk}
+
+class SummaryTreeBuilder:
+    """Summarizes long documents bottom-up at ingest time
+
+    Runs of ``section_chunks`` consecutive chunks are summarized into sections,
+    then every ``fan_in`` summaries are summarized again until a single
+    document summary remains. Calls go through the LLM gateway at batch
+    priority, at most ``concurrency`` at a time. Documents with fewer than
+    ``min_chunks`` chunks are left alone, since their raw chunks already fit
+    a prompt.
+    """
+
+    def __init__(
+        self,
+        gateway,
+        section_chunks: int = 8,
+        fan_in: int = 8,
+        min_chunks: int = 16,
+        concurrency: int = 4,
+        section_words: int = 150,
+        document_words: int = 300
+    ):
+        if fan_in < 2:
+            # Each level must combine at least two summaries or the tree never reaches a root
+            raise ValueError(f"fan_in must be at least 2, got {fan_in}")
+        self.gateway = gateway
+        self.section_chunks = section_chunks
+        self.fan_in = fan_in
+        self.min_chunks = min_chunks
+        self.concurrency = concurrency
+        self.section_words = section_words
+        self.document_words = document_words
+
+    async def summarize(
+        self,
+        chunks: Sequence[str],
+        progress: Optional[Callable[[float], None]] = None
+    ) -> List[Summary]:
+        """Return the document summary followed by every section and part summary
+
+        ``progress`` is called with the fraction of summaries written so far.
+        """
+        if not chunks:
+            return []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        total = self._call_count(len(chunks))
+        written = 0
+
+        async def write(prompt: str) -> str:
+            nonlocal written
+            async with semaphore:
+                text = await self.gateway.generate(prompt, priority=BATCH_PRIORITY)
+            written += 1
+            if progress is not None:
+                progress(written / total)
+            return text.strip()
+
+        async def section(start: int) -> Summary:
+            end = min(start + self.section_chunks, len(chunks)) - 1
+            text = "\n\n".join(chunks[start:end + 1])
+            return Summary(
+                "section", start, end,
+                await write(SECTION_PROMPT.format(words=self.section_words, text=text))
+            )
+
+        async def combine(group: List[Summary], kind: str) -> Summary:
+            text = "\n\n".join(summary.text for summary in group)
+            return Summary(
+                kind, group[0].first_chunk, group[-1].last_chunk,
+                await write(GROUP_PROMPT.format(words=self.document_words, text=text))
+            )
+
+        level = list(await asyncio.gather(
+            *(section(start) for start in range(0, len(chunks), self.section_chunks))
+        ))
+        summaries = list(level)
+        while len(level) > 1:
+            groups = [level[i:i + self.fan_in] for i in range(0, len(level), self.fan_in)]
+            kind = "document" if len(groups) == 1 else "part"
+            level = list(await asyncio.gather(*(combine(group, kind) for group in groups)))
+            summaries.extend(level)
+
+        root = level[0]._replace(kind="document")
+        return [root] + summaries[:-1]
+
+    def _call_count(self, chunk_count: int) -> int:
+        count = level = math.ceil(chunk_count / self.section_chunks)
+        while level > 1:
+            level = math.ceil(level / self.fan_in)
+            count += level
+        return count
@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import re
+import time
+import uuid
+
+from app.core.metrics import BYTES_PROCESSED
+from app.models.document import UploadSession
+
+# One-shot multipart upload routes; the form is read in full before the endpoint runs
+ONE_SHOT_UPLOAD_PATH = re.compile(r"/(upload-document|documents/upload)$")
+# Room for multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Completed files wait here for the ingestion queue; anything this old was orphaned by a crash
+COMPLETED_FILE_TTL = 24 * 60 * 60
+
+class UploadTooLargeError(ValueError):
+    """Raised as soon as an upload grows past the size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File size exceeds {max_bytes // (1024 * 1024)}MB limit")
+
+class UploadNotFoundError(KeyError):
+    """Raised for unknown, expired or completed resumable uploads"""
+
+class UploadConflictError(Exception):
+    """Raised when a part does not start at the upload's current offset"""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+def _write_chunk(f: BinaryIO, hasher, chunk: bytes):
+    # Written and hashed together so the digest always matches the file
+    f.write(chunk)
+    hasher.update(chunk)
+
+async def stream_to_file(
+    chunks: AsyncIterator[bytes],
+    f: BinaryIO,
+    hasher,
+    max_bytes: int
+) -> int:
+    """Write chunks to an open file while hashing them, returning the bytes written
+
+    Only one chunk is held at a time, and ``UploadTooLargeError`` is raised
+    the moment more than ``max_bytes`` arrive.
+    """
+    written = 0
+    async for chunk in chunks:
+        written += len(chunk)
+        if written > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+        await asyncio.to_thread(_write_chunk, f, hasher, chunk)
+        BYTES_PROCESSED.inc(len(chunk), component="upload")
+    return written
+
+class ResumableUploadStore:
+    """Uploads sent as a sequence of parts that survive dropped connections
+
+    Each part is appended at the upload's current offset and hashed as it
+    streams to disk; after a failure the client asks for the offset and sends
+    the rest from there. Upload state lives in this process, so a deployment
+    with several workers needs sticky routing for resumable uploads.
+    Abandoned uploads are removed after ``ttl`` seconds; at startup only
+    part files idle for that long are removed, since other workers may share
+    ``upload_dir``. Completed files are moved to ``completed/`` before they
+    are handed over.
+    """
+
+    def __init__(
+        self,
+        upload_dir: str,
+        max_size: int,
+        chunk_size: int = 1024 * 1024,
+        ttl: float = 3600
+    ):
+        self.upload_dir = upload_dir
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self._uploads: Dict[str, UploadSession] = {}
+        self._hashers: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.completed_dir = os.path.join(upload_dir, "completed")
+        os.makedirs(self.completed_dir, exist_ok=True)
+        self._remove_stale(upload_dir, ".part", ttl)
+        self._remove_stale(self.completed_dir, ".upload", COMPLETED_FILE_TTL)
+
+    def create(self, filename: str, size: Optional[int] = None) -> UploadSession:
+        """Start an upload, rejecting it up front if the declared size is too large"""
+        self.expire()
+        if size is not None and size > self.max_size:
+            raise UploadTooLargeError(self.max_size)
+        now = datetime.now()
+        upload = UploadSession(
+            upload_id=uuid.uuid4().hex,
+            filename=filename,
+            size=size,
+            chunk_size=self.chunk_size,
+            max_size=self.max_size,
+            created_at=now,
+            updated_at=now
+        )
+        open(self._path(upload.upload_id), "wb").close()
+        self._uploads[upload.upload_id] = upload
+        self._hashers[upload.upload_id] = hashlib.sha256()
+        self._locks[upload.upload_id] = asyncio.Lock()
+        return upload
+
+    def get(self, upload_id: str) -> UploadSession:
+        upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise UploadNotFoundError(upload_id)
+        return upload
+
+    async def append(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        length: Optional[int] = None
+    ) -> UploadSession:
+        """Append a part starting at ``offset``; bytes received before a failure are kept
+
+        A part whose declared ``length`` would pass the limit is refused before
+        any of it is read.
+        """
+        upload = self.get(upload_id)
+        lock = self._locks[upload_id]
+        if lock.locked() or offset != upload.offset:
+            # A part is still streaming, or the client missed where the last one ended
+            raise UploadConflictError(upload.offset)
+        limit = self.max_size if upload.size is None else min(upload.size, self.max_size)
+        if length is not None and offset + length > limit:
+            self.discard(upload_id)
+            raise UploadTooLargeError(self.max_size)
+
+        async with lock:
+            f = open(self._path(upload_id), "ab")
+            try:
+                await stream_to_file(chunks, f, self._hashers[upload_id], limit - upload.offset)
+            except UploadTooLargeError:
+                f.close()
+                self.discard(upload_id)
+                raise
+            finally:
+                if not f.closed:
+                    f.flush()
+                    upload.offset = f.tell()
+                    f.close()
+                upload.updated_at = datetime.now()
+        return upload
+
+    def complete(self, upload_id: str) -> Tuple[str, str, str]:
+        """Finish an upload and hand over its file path, filename and SHA-256
+
+        The caller owns the file from here on.
+        """
+        upload = self.get(upload_id)
+        if self._locks[upload_id].locked():
+            raise UploadConflictError(upload.offset)
+        if upload.size is not None and upload.offset != upload.size:
+            raise ValueError(f"Upload incomplete: {upload.offset} of {upload.size} bytes received")
+        digest = self._hashers[upload_id].hexdigest()
+        self._forget(upload_id)
+        # Out of the parts directory, so no part cleanup can remove it while it waits to be ingested
+        path = os.path.join(self.completed_dir, f"{upload_id}.upload")
+        os.replace(self._path(upload_id), path)
+        return path, upload.filename, digest
+
+    def discard(self, upload_id: str):
+        """Drop an upload and its partial file"""
+        self._forget(upload_id)
+        try:
+            os.unlink(self._path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    def expire(self):
+        """Discard uploads idle for longer than the ttl"""
+        cutoff = datetime.now() - timedelta(seconds=self.ttl)
+        for upload_id, upload in list(self._uploads.items()):
+            if upload.updated_at < cutoff and not self._locks[upload_id].locked():
+                self.discard(upload_id)
+
+    def _forget(self, upload_id: str):
+        self._uploads.pop(upload_id, None)
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+    @staticmethod
+    def _remove_stale(directory: str, suffix: str, max_age: float):
+        # Upload state is in memory, so files left by a process that has gone cannot be resumed
+        cutoff = time.time() - max_age
+        for entry in os.scandir(directory):
+            try:
+                if entry.name.endswith(suffix) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _path(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir, f"{upload_id}.part")
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware that stops one-shot uploads at the size limit
+
+    Routes taking an ``UploadFile`` receive and spool the whole form before
+    the endpoint can check its size, so the limit is enforced here instead:
+    on ``Content-Length`` before anything is read, and on the bytes received
+    for bodies sent without one. Large files belong on the resumable upload
+    routes, which stream each part to disk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not ONE_SHOT_UPLOAD_PATH.search(scope["path"]):
+            return await self.app(scope, receive, send)
+        from app.core.config import get_settings
+
+        max_size = get_settings().MAX_FILE_SIZE
+        limit = max_size + MULTIPART_OVERHEAD
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            return await self._reject(scope, receive, send, max_size)
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLargeError(max_size)
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                # Whatever error the app made of the aborted body is replaced by a 413
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            pass
+        if exceeded and not started:
+            await self._reject(scope, receive, send, max_size)
+
+    @staticmethod
+    async def _reject(scope, receive, send, max_size: int):
+        from fastapi.responses import JSONResponse
+
+        response = JSONResponse({"detail": str(UploadTooLargeError(max_size))}, status_code=413)
+        await response(scope, receive, send)
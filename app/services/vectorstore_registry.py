@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.faiss_index import load_vectorstore
+
+if TYPE_CHECKING:
+    from langchain.vectorstores import FAISS
+
+
+class VectorStoreRegistry:
+    """Content-addressed store of FAISS indexes, persisted to disk with an in-memory LRU"""
+
+    def __init__(self, embeddings, storage_dir: str, max_cached: int = 8, mmap: bool = True):
+        self.embeddings = embeddings
+        self.storage_dir = storage_dir
+        self.max_cached = max_cached
+        self.mmap = mmap
+        self._cache: "OrderedDict[str, FAISS]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, asyncio.Lock] = {}
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+    @staticmethod
+    def compute_id(content: bytes) -> str:
+        """Return the vectorstore id for the given document bytes"""
+        return hashlib.sha256(content).hexdigest()
+
+    def _path(self, vectorstore_id: str) -> str:
+        if not vectorstore_id.isalnum():
+            raise ValueError(f"Invalid vectorstore id: {vectorstore_id}")
+        return os.path.join(self.storage_dir, vectorstore_id)
+
+    def exists(self, vectorstore_id: str) -> bool:
+        """Check whether an index is registered under the given id"""
+        with self._lock:
+            if vectorstore_id in self._cache:
+                return True
+        return os.path.isdir(self._path(vectorstore_id))
+
+    def get(self, vectorstore_id: str) -> Optional["FAISS"]:
+        """Return the index for the given id, loading it from disk if needed"""
+        with self._lock:
+            if vectorstore_id in self._cache:
+                self._cache.move_to_end(vectorstore_id)
+                return self._cache[vectorstore_id]
+
+        path = self._path(vectorstore_id)
+        if not os.path.isdir(path):
+            return None
+
+        vectorstore = load_vectorstore(path, self.embeddings, mmap=self.mmap)
+        self._remember(vectorstore_id, vectorstore)
+        return vectorstore
+
+    def put(self, vectorstore_id: str, vectorstore: "FAISS"):
+        """Persist an index under the given id and keep it hot in memory"""
+        path = self._path(vectorstore_id)
+        if not os.path.isdir(path):
+            # Save into a scratch directory first so readers never see a partial index
+            temp_path = tempfile.mkdtemp(dir=self.storage_dir, prefix=".tmp-")
+            try:
+                vectorstore.save_local(temp_path)
+                os.replace(temp_path, path)
+            except OSError:
+                shutil.rmtree(temp_path, ignore_errors=True)
+                if not os.path.isdir(path):
+                    raise
+        self._remember(vectorstore_id, vectorstore)
+
+    async def get_or_build(
+        self,
+        vectorstore_id: str,
+        build: Callable[[], Awaitable["FAISS"]]
+    ) -> "FAISS":
+        """Return the registered index, building it at most once for concurrent callers
+
+        Loading and saving indexes happen in a worker thread, so a cold index
+        does not stall the event loop.
+        """
+        vectorstore = await self._get_async(vectorstore_id)
+        if vectorstore is not None:
+            CACHE_LOOKUPS.inc(cache="vectorstores", result="hit")
+            return vectorstore
+
+        lock = self._build_locks.setdefault(vectorstore_id, asyncio.Lock())
+        async with lock:
+            try:
+                vectorstore = await self._get_async(vectorstore_id)
+                CACHE_LOOKUPS.inc(cache="vectorstores", result="miss" if vectorstore is None else "hit")
+                if vectorstore is None:
+                    vectorstore = await build()
+                    await asyncio.to_thread(self.put, vectorstore_id, vectorstore)
+                return vectorstore
+            finally:
+                self._build_locks.pop(vectorstore_id, None)
+
+    async def _get_async(self, vectorstore_id: str) -> Optional["FAISS"]:
+        # Hits in memory are answered inline; only disk loads go to a thread
+        with self._lock:
+            if vectorstore_id in self._cache:
+                self._cache.move_to_end(vectorstore_id)
+                return self._cache[vectorstore_id]
+        return await asyncio.to_thread(self.get, vectorstore_id)
+
+    def _remember(self, vectorstore_id: str, vectorstore: "FAISS"):
+        with self._lock:
+            self._cache[vectorstore_id] = vectorstore
+            self._cache.move_to_end(vectorstore_id)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
@@ -1,27 +1,84 @@
-from duckduckgo_search import DDGS
-from typing import List, Optional
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import re
+import threading
+
+from app.core.metrics import CACHE_LOOKUPS, stage
+from app.utils.cache_utils import TTLCache
 
 class WebSearchTool:
-    def __init__(self, max_results: int = 3):
+    def __init__(
+        self,
+        max_results: int = 3,
+        cache_ttl: float = 600,
+        cache_size: int = 1024,
+        cache_path: Optional[str] = None
+    ):
+        from duckduckgo_search import DDGS
+
         self.max_results = max_results
         self.ddgs = DDGS()
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl, path=cache_path)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
 
     def search(self, query: str) -> List[dict]:
         """
         Perform a web search using DuckDuckGo
         
+        Results are cached by normalized query, and identical queries that
+        arrive while a search is in flight wait for that search instead of
+        issuing their own.
+        
         Args:
             query (str): Search query
             
         Returns:
             List[dict]: List of search results with 'title', 'link', and 'snippet' keys
         """
+        key = f"{self.max_results}:{self.normalize_query(query)}"
+        cached = self.cache.get(key)
+        CACHE_LOOKUPS.inc(cache="search", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            with stage("search", "upstream"):
+                results = self._search_upstream(query)
+            if results:
+                self.cache.set(key, results)
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            # Followers must never be left waiting on a leader that failed
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase a query and strip punctuation and repeated whitespace"""
+        return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+    def _search_upstream(self, query: str) -> List[dict]:
         try:
             results = list(self.ddgs.text(query, max_results=self.max_results))
             formatted_results = [
                 {
                     'title': result['title'],
-                    'link': result['link'],
+                    'link': result.get('href', result.get('link')),
                     'snippet': result['body']
                 }
                 for result in results
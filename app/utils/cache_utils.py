@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds
+
+    When ``path`` is given, entries are also written to a SQLite file so they
+    survive restarts. Persisted values must be JSON serializable.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 600, path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, created_at REAL, value TEXT)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    self._evict()
+                    self._db.commit()
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        entry = (time.time(), value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, created_at, value) VALUES (?, ?, ?)",
+                    (key, entry[0], json.dumps(value))
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        """Close the backing SQLite file, if any"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (evicted,))
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        row = self._db.execute(
+            "SELECT created_at, value FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _delete(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._db.commit()
@@ -0,0 +1,37 @@
+from html import escape
+from typing import Sequence
+
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Efiko chat export</title>
+<style>
+body { font-family: sans-serif; max-width: 48em; margin: 2em auto; }
+.message { white-space: pre-wrap; margin-bottom: 1em; }
+.user { color: blue; }
+.assistant { color: green; text-align: right; }
+</style>
+</head>
+<body>
+"""
+HTML_FOOTER = "</body>\n</html>\n"
+
+def write_markdown_from_chat(messages: Sequence[dict], output_path: str):
+    """Write chat messages as a Markdown transcript"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("# Efiko chat export\n\n")
+        for message in messages:
+            f.write(f"**{message['role'].title()}:** {message['content']}\n\n")
+
+def write_html_from_chat(messages: Sequence[dict], output_path: str):
+    """Write chat messages as a standalone HTML page"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(HTML_HEADER)
+        for message in messages:
+            role = "user" if message["role"] == "user" else "assistant"
+            f.write(
+                f'<div class="message {role}"><strong>{escape(message["role"].title())}:</strong> '
+                f'{escape(message["content"])}</div>\n'
+            )
+        f.write(HTML_FOOTER)
@@ -2,14 +2,15 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_RIGHT
+from functools import lru_cache
 from io import BytesIO
+from typing import BinaryIO, List, Sequence, Union
+from xml.sax.saxutils import escape
 
-def create_pdf_from_chat(messages: list) -> bytes:
-    """Create a PDF document from chat messages"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
+@lru_cache(maxsize=1)
+def _chat_styles():
+    """Build the chat stylesheet once per process"""
     styles = getSampleStyleSheet()
-    story = []
 
     # Create custom styles
     styles.add(ParagraphStyle(
@@ -25,14 +26,40 @@ def create_pdf_from_chat(messages: list) -> bytes:
         textColor='green',
         alignment=TA_RIGHT
     ))
+    return styles
 
+def _chat_story(messages: Sequence[dict]) -> list:
+    styles = _chat_styles()
+    story = []
     for message in messages:
         style = styles['User'] if message['role'] == 'user' else styles['Assistant']
+        # Paragraph parses its text as markup; model output may contain stray tags
         story.append(Paragraph(
-            f"{message['role'].title()}: {message['content']}",
+            f"{message['role'].title()}: {escape(message['content'])}".replace("\n", "<br/>"),
             style
         ))
         story.append(Spacer(1, 12))
+    return story
+
+def write_pdf_from_chat(messages: Sequence[dict], output: Union[str, BinaryIO]):
+    """Render chat messages as a PDF into a file path or binary file"""
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    doc.build(_chat_story(messages))
 
-    doc.build(story)
+def create_pdf_from_chat(messages: list) -> bytes:
+    """Create a PDF document from chat messages"""
+    buffer = BytesIO()
+    write_pdf_from_chat(messages, buffer)
     return buffer.getvalue()
+
+def merge_pdfs(paths: List[str], output_path: str):
+    """Concatenate PDF files page by page into ``output_path``"""
+    from PyPDF2 import PdfMerger
+
+    merger = PdfMerger()
+    try:
+        for path in paths:
+            merger.append(path)
+        merger.write(output_path)
+    finally:
+        merger.close()
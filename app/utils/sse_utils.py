@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+import json
+
+def format_sse(data: dict, event: Optional[str] = None) -> str:
+    """Format a payload as a server-sent event"""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+async def stream_text_events(
+    chunks: AsyncIterator[str],
+    metadata: Optional[dict] = None
+) -> AsyncIterator[str]:
+    """Wrap streamed text chunks as server-sent events, ending with a done or error event
+
+    ``metadata`` is read once the stream is exhausted and merged into the done event.
+    """
+    try:
+        async for chunk in chunks:
+            if chunk:
+                yield format_sse({"content": chunk})
+        yield format_sse(
+            {"timestamp": datetime.now().isoformat(), **(metadata or {})},
+            event="done"
+        )
+    except Exception as e:
+        yield format_sse({"detail": str(e)}, event="error")
+
+async def stream_result_events(results: AsyncIterator) -> AsyncIterator[str]:
+    """Send each result model as a result event as soon as it is produced, ending with a done or error event"""
+    count = 0
+    try:
+        async for result in results:
+            count += 1
+            yield format_sse(result.model_dump(), event="result")
+        yield format_sse({"timestamp": datetime.now().isoformat(), "results": count}, event="done")
+    except Exception as e:
+        yield format_sse({"detail": str(e)}, event="error")
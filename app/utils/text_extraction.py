@@ -0,0 +1,20 @@
+from typing import List
+
+# These functions run in worker processes, so they must stay importable at module level
+
+def count_pdf_pages(file_path: str) -> int:
+    """Return the number of pages in a PDF"""
+    from PyPDF2 import PdfReader
+    return len(PdfReader(file_path).pages)
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages ``start`` to ``end`` (exclusive) of a PDF"""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file_path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, end)]
+
+def extract_docx_paragraphs(file_path: str) -> List[str]:
+    """Extract the paragraph texts of a DOCX file"""
+    import docx
+    document = docx.Document(file_path)
+    return [paragraph.text for paragraph in document.paragraphs]
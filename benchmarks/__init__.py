@@ -0,0 +1 @@
+"""Micro-benchmarks and load scenarios that run offline against local fakes"""
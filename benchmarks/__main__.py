@@ -0,0 +1,49 @@
+import argparse
+import sys
+
+from benchmarks.report import compare, load_baselines, print_table, save_baselines
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run micro-benchmarks and load scenarios and compare them to stored baselines"
+    )
+    parser.add_argument("suite", nargs="?", choices=["micro", "load", "all"], default="all")
+    parser.add_argument("--repeat", type=int, default=10, help="Iterations per micro-benchmark")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent users in load scenarios")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per user in load scenarios")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the fake Gemini takes")
+    parser.add_argument("--base-url", help="Load-test a running server instead of an in-process app")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression vs baseline")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.suite in ("micro", "all"):
+        from benchmarks.micro import run_micro
+        micro = run_micro(args.repeat)
+        print_table("Micro-benchmarks", micro)
+        results.update(micro)
+    if args.suite in ("load", "all"):
+        from benchmarks.load import run_load
+        load = run_load(args.users, args.requests, args.base_url, args.llm_latency)
+        print_table(f"Load ({args.users} users x {args.requests} requests)", load)
+        results.update(load)
+
+    if args.update_baselines:
+        save_baselines(results)
+        print("\nBaselines updated")
+        return 0
+
+    baselines = load_baselines()
+    if not baselines:
+        # Timings only compare on the same machine, so baselines are never shipped
+        print("\nNo local baselines; run with --update-baselines to record them")
+        return 0
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
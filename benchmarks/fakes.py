@@ -0,0 +1,154 @@
+"""Deterministic stand-ins for Gemini, DuckDuckGo and HuggingFace embeddings
+
+Every fake returns the same output for the same input and sleeps for a
+configurable latency, so benchmarks measure our code rather than the network.
+"""
+from contextlib import contextmanager
+from typing import Iterator, List
+from unittest import mock
+import asyncio
+import hashlib
+import time
+import warnings
+
+WORDS = (
+    "cells energy light water plants membrane gradient osmosis protein enzyme "
+    "reaction equation force mass velocity theorem proof function variable graph"
+).split()
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+def _sentence(text: str, words: int) -> str:
+    digest = _digest(text)
+    return " ".join(WORDS[digest[i % len(digest)] % len(WORDS)] for i in range(words))
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeStream:
+    """Async iterator over response chunks, pausing ``delay`` seconds before each"""
+
+    def __init__(self, chunks: List[str], delay: float):
+        self._chunks = iter(chunks)
+        self._delay = delay
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> FakeChunk:
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+        await asyncio.sleep(self._delay)
+        return FakeChunk(chunk)
+
+class FakeGenerativeModel:
+    """Stand-in for ``genai.GenerativeModel`` answering after ``latency`` seconds"""
+
+    def __init__(self, model_name: str = "gemini-pro", latency: float = 0.05, chunks: int = 4, words: int = 60):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunks = chunks
+        self.words = words
+
+    def answer(self, prompt: str) -> str:
+        return _sentence(prompt, self.words)
+
+    def generate_content(self, prompt: str):
+        time.sleep(self.latency)
+        return FakeChunk(self.answer(prompt))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        answer = self.answer(prompt)
+        if stream:
+            words = answer.split(" ")
+            size = max(1, len(words) // self.chunks)
+            parts = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+            # Time to first chunk plus the rest spread across the stream
+            await asyncio.sleep(self.latency / 2)
+            return FakeStream(parts, self.latency / 2 / len(parts))
+        await asyncio.sleep(self.latency)
+        return FakeChunk(answer)
+
+class FakeDDGS:
+    """Stand-in for ``duckduckgo_search.DDGS`` returning canned results"""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+
+    def text(self, query: str, max_results: int = 3) -> Iterator[dict]:
+        time.sleep(self.latency)
+        for rank in range(max_results):
+            yield {
+                "title": f"Result {rank + 1} for {query}",
+                "href": f"https://example.org/{_digest(query).hex()[:8]}/{rank}",
+                "body": _sentence(f"{query}:{rank}", 30)
+            }
+
+class FakeEmbeddings:
+    """Stand-in for ``HuggingFaceEmbeddings`` producing unit vectors seeded by the text
+
+    Each call sleeps ``batch_latency`` plus ``text_latency`` per text, which
+    models the fixed and per-item cost of a real model forward pass.
+    """
+
+    def __init__(self, size: int = 768, batch_latency: float = 0.005, text_latency: float = 0.0005):
+        self.size = size
+        self.batch_latency = batch_latency
+        self.text_latency = text_latency
+        self.model_name = f"fake-embeddings-{size}"
+
+    def _vector(self, text: str) -> List[float]:
+        import numpy as np
+
+        rng = np.random.default_rng(int.from_bytes(_digest(text)[:8], "little"))
+        vector = rng.standard_normal(self.size).astype("float32")
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.batch_latency + self.text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+@contextmanager
+def install_fakes(
+    llm_latency: float = 0.05,
+    search_latency: float = 0.02,
+    embedding_batch_latency: float = 0.005,
+    embedding_size: int = 768
+):
+    """Patch the Gemini, DuckDuckGo and HuggingFace entry points with the fakes"""
+    import duckduckgo_search
+    import google.generativeai as genai
+    import langchain.embeddings
+
+    patches = [
+        mock.patch.object(genai, "configure", lambda **kwargs: None),
+        mock.patch.object(genai, "get_model", lambda name: {"name": name}),
+        mock.patch.object(
+            genai, "GenerativeModel",
+            lambda model_name="gemini-pro", **kwargs: FakeGenerativeModel(model_name, latency=llm_latency)
+        ),
+        mock.patch.object(duckduckgo_search, "DDGS", lambda *args, **kwargs: FakeDDGS(search_latency)),
+        mock.patch.object(
+            langchain.embeddings, "HuggingFaceEmbeddings",
+            lambda *args, **kwargs: FakeEmbeddings(embedding_size, batch_latency=embedding_batch_latency)
+        )
+    ]
+    with warnings.catch_warnings():
+        # langchain.embeddings warns about deprecated re-exports on attribute access
+        warnings.simplefilter("ignore")
+        for patch in patches:
+            patch.start()
+    try:
+        yield
+    finally:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for patch in reversed(patches):
+                patch.stop()
@@ -0,0 +1,123 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.fakes import _sentence, install_fakes
+from benchmarks.report import summarize
+
+@asynccontextmanager
+async def local_app(workdir: str) -> AsyncIterator["httpx.AsyncClient"]:
+    """Start the backend in-process on the fakes and yield a client for it"""
+    import httpx
+
+    os.environ.update({
+        "GEMINI_API_KEY": "benchmark",
+        "HUGGINGFACEHUB_API_TOKEN": "benchmark",
+        "SECRET_KEY": "benchmark",
+        "VECTORSTORE_DIR": os.path.join(workdir, "vectorstores"),
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'efiko.db')}",
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.db"),
+        "EXPORT_CACHE_DIR": os.path.join(workdir, "exports"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        # Every question is distinct, but keep the cache out of the measurements
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "LLM_REQUESTS_PER_MINUTE": "100000",
+        # Synthetic users share one address, so per-user quotas would throttle them
+        "ADMISSION_ENABLED": "false",
+        "INGESTION_MAX_PENDING_PER_USER": "1000"
+    })
+    from app.core.config import get_settings
+    get_settings.cache_clear()
+    from app.backend import app
+
+    async with app.router.lifespan_context(app):
+        await asyncio.wait_for(app.state.services_ready.wait(), timeout=60)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            yield client
+
+async def _run_users(users: int, requests_per_user: int, request) -> Dict[str, float]:
+    latencies = []
+    errors = 0
+
+    async def user(user_index: int):
+        nonlocal errors
+        for request_index in range(requests_per_user):
+            started = time.perf_counter()
+            try:
+                await request(user_index * requests_per_user + request_index)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(index) for index in range(users)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+async def chat_scenario(client, users: int, requests_per_user: int) -> Dict[str, float]:
+    async def ask(index: int):
+        response = await client.post("/api/chat", json={
+            "content": f"Question {index}: explain {_sentence(str(index), 6)}",
+            "conversation_history": []
+        })
+        response.raise_for_status()
+
+    return await _run_users(users, requests_per_user, ask)
+
+async def upload_scenario(client, users: int, requests_per_user: int) -> Dict[str, float]:
+    async def upload(index: int):
+        # Distinct content per upload, so nothing is served from the registry
+        text = "\n\n".join(_sentence(f"upload {index} paragraph {p}", 120) for p in range(40))
+        response = await client.post(
+            "/api/upload-document",
+            files={"file": (f"notes-{index}.txt", text.encode("utf-8"), "text/plain")}
+        )
+        response.raise_for_status()
+        job = response.json()
+        while job["status"] not in ("completed", "failed"):
+            await asyncio.sleep(0.01)
+            status = await client.get(f"/api/upload-status/{job['job_id']}")
+            status.raise_for_status()
+            job = status.json()
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+
+    return await _run_users(users, requests_per_user, upload)
+
+async def _run_load(users: int, requests_per_user: int, base_url: Optional[str], llm_latency: float):
+    if base_url:
+        import httpx
+
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            return await _scenarios(client, users, requests_per_user)
+
+    with install_fakes(llm_latency=llm_latency), tempfile.TemporaryDirectory() as workdir:
+        async with local_app(workdir) as client:
+            return await _scenarios(client, users, requests_per_user)
+
+async def _scenarios(client, users: int, requests_per_user: int) -> Dict[str, Dict[str, float]]:
+    # Results are only comparable at the same concurrency, so it is part of the name
+    upload_users = max(1, users // 4)
+    return {
+        f"load.chat[{users}x{requests_per_user}]": await chat_scenario(client, users, requests_per_user),
+        f"load.upload[{upload_users}x{requests_per_user}]": await upload_scenario(
+            client, upload_users, requests_per_user
+        )
+    }
+
+def run_load(
+    users: int = 16,
+    requests_per_user: int = 5,
+    base_url: Optional[str] = None,
+    llm_latency: float = 0.05
+) -> Dict[str, Dict[str, float]]:
+    """Run the concurrent chat and upload scenarios
+
+    By default the backend runs in-process on the fakes; with ``base_url`` the
+    scenarios target a running server instead (its own services are used).
+    """
+    return asyncio.run(_run_load(users, requests_per_user, base_url, llm_latency))
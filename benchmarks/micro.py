@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.fakes import FakeEmbeddings, _sentence
+from benchmarks.report import summarize
+
+def _measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+def _write_pdf(path: str, pages: int):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for page in range(pages):
+        for line in range(40):
+            pdf.drawString(40, 750 - line * 18, _sentence(f"page {page} line {line}", 12))
+        pdf.showPage()
+    pdf.save()
+
+def bench_pdf_extraction(workdir: str, repeat: int) -> Dict[str, float]:
+    from app.utils.text_extraction import extract_pdf_pages
+
+    path = os.path.join(workdir, "handout.pdf")
+    _write_pdf(path, pages=20)
+    return _measure(lambda: extract_pdf_pages(path, 0, 20), repeat)
+
+def bench_splitting(workdir: str, repeat: int) -> Dict[str, float]:
+    from app.services.document_service import DocumentProcessor
+    from app.services.vectorstore_registry import VectorStoreRegistry
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    processor = DocumentProcessor(
+        registry=VectorStoreRegistry(FakeEmbeddings(size=8), storage_dir=os.path.join(workdir, "split")),
+        extraction_pool=pool
+    )
+    pages = [" ".join(_sentence(f"page {page} para {p}", 80) for p in range(12)) for page in range(50)]
+
+    async def split():
+        async def page_iter():
+            for page in pages:
+                yield page
+        return [chunk async for chunk in processor._split_incrementally(page_iter())]
+
+    try:
+        return _measure(lambda: asyncio.run(split()), repeat)
+    finally:
+        pool.shutdown()
+
+def bench_embedding_batching(workdir: str, repeat: int) -> Dict[str, float]:
+    from app.services.embedding_service import EmbeddingService
+
+    service = EmbeddingService(FakeEmbeddings(size=384), max_batch_size=64, max_wait_ms=5)
+    latencies = []
+
+    def query(index: int):
+        started = time.perf_counter()
+        service.embed_query(f"question {index}")
+        latencies.append(time.perf_counter() - started)
+
+    # Concurrent callers are what micro-batching is meant to absorb
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        list(pool.map(query, range(repeat * 32)))
+    elapsed = time.perf_counter() - started
+    service.close()
+    return summarize(latencies, elapsed)
+
+def bench_faiss_search(index_type: str, repeat: int) -> Dict[str, float]:
+    import numpy as np
+
+    from app.services.faiss_index import IndexPolicy
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((20_000, 384)).astype("float32")
+    index = IndexPolicy(index_type=index_type).build_index(vectors)
+    queries = vectors[rng.choice(len(vectors), repeat * 20)]
+    rows = iter(queries)
+    return _measure(lambda: index.search(next(rows)[None, :], 24), len(queries))
+
+def bench_pdf_export(workdir: str, repeat: int) -> Dict[str, float]:
+    from app.utils.pdf_utils import create_pdf_from_chat
+
+    messages = [
+        {"role": "user" if turn % 2 == 0 else "assistant", "content": _sentence(f"turn {turn}", 80)}
+        for turn in range(50)
+    ]
+    return _measure(lambda: create_pdf_from_chat(messages), repeat)
+
+def run_micro(repeat: int = 10) -> Dict[str, Dict[str, float]]:
+    """Run every micro-benchmark and return its summary by name"""
+    with tempfile.TemporaryDirectory() as workdir:
+        return {
+            "micro.pdf_extraction": bench_pdf_extraction(workdir, repeat),
+            "micro.splitting": bench_splitting(workdir, repeat),
+            "micro.embedding_batching": bench_embedding_batching(workdir, repeat),
+            "micro.faiss_search_flat": bench_faiss_search("flat", repeat),
+            "micro.faiss_search_hnsw_sq": bench_faiss_search("hnsw_sq", repeat),
+            "micro.pdf_export": bench_pdf_export(workdir, repeat)
+        }
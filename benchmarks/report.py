@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional
+import json
+import os
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """Return latency percentiles (ms) and throughput (per second) for one benchmark"""
+    import numpy as np
+
+    samples = np.asarray(latencies or [0.0]) * 1000
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    }
+
+def print_table(title: str, results: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"{'benchmark':<28}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per s':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<28}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['throughput']:>10.1f}"
+        )
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_baselines(results: Dict[str, Dict[str, float]], path: str = BASELINES_PATH):
+    baselines = load_baselines(path)
+    baselines.update({
+        name: {"p95_ms": row["p95_ms"], "throughput": row["throughput"]}
+        for name, row in results.items()
+    })
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baselines: Dict[str, Dict[str, float]],
+    tolerance: float = 0.25
+) -> List[str]:
+    """Return a description of every benchmark that regressed beyond ``tolerance``"""
+    regressions = []
+    for name, row in results.items():
+        baseline: Optional[Dict[str, float]] = baselines.get(name)
+        if baseline is None:
+            continue
+        if row["errors"]:
+            regressions.append(f"{name}: {row['errors']} errors")
+        if row["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {row['p95_ms']:.2f}ms vs baseline {baseline['p95_ms']:.2f}ms")
+        if row["throughput"] < baseline["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {row['throughput']:.1f}/s vs baseline {baseline['throughput']:.1f}/s"
+            )
+    return regressions
@@ -1,18 +1,29 @@
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
-from app.core.config import Settings
+from benchmarks.fakes import install_fakes
+from app.core.config import get_settings
 
 @pytest.fixture
-def test_settings():
-    return Settings(
-        GEMINI_API_KEY="test_key",
-        SECRET_KEY="test_secret",
-        TESTING=True
-    )
+def test_settings(tmp_path, monkeypatch):
+    for name, value in {
+        "GEMINI_API_KEY": "test_key",
+        "HUGGINGFACEHUB_API_TOKEN": "test_token",
+        "SECRET_KEY": "test_secret",
+        "VECTORSTORE_DIR": str(tmp_path / "vectorstores"),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'efiko.db'}",
+        "EMBEDDING_CACHE_PATH": str(tmp_path / "embeddings.db"),
+        "EXPORT_CACHE_DIR": str(tmp_path / "exports"),
+        "UPLOAD_DIR": str(tmp_path / "uploads")
+    }.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
 
 @pytest.fixture
 def client(test_settings):
-    app.dependency_overrides[Settings] = lambda: test_settings
-    with TestClient(app) as test_client:
-        yield test_client
+    # Gemini, DuckDuckGo and the embedding model are replaced by local fakes
+    with install_fakes(llm_latency=0, search_latency=0, embedding_batch_latency=0):
+        from app.main import app
+        with TestClient(app) as test_client:
+            yield test_client
@@ -0,0 +1,163 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fakes import install_fakes
+from app.core.config import get_settings
+from app.core.security import create_access_token
+from app.services.admission import (
+    BATCH, CHAT, INGEST, AdmissionController, AdmissionRejectedError, WorkClass, classify
+)
+
+def test_long_batches_do_not_get_interactive_chat_shed():
+    async def scenario():
+        controller = AdmissionController(
+            [
+                WorkClass(CHAT, weight=4, latency_target=5.0, user_concurrency=2, user_per_minute=600, user_burst=10),
+                WorkClass(BATCH, weight=1, latency_target=600, user_concurrency=1, user_per_minute=600, user_burst=10)
+            ],
+            max_concurrency=1
+        )
+        await controller.acquire("alice", CHAT)
+        controller.release("alice", CHAT, service_time=1.0)
+        # An earlier batch took two minutes; the next one holds the only slot
+        await controller.acquire("bob", BATCH)
+        controller.release("bob", BATCH, service_time=120.0)
+        await controller.acquire("bob", BATCH)
+
+        chat = asyncio.create_task(controller.acquire("alice", CHAT))
+        await asyncio.sleep(0)
+        assert not chat.done()
+        controller.release("bob", BATCH, service_time=120.0)
+        await asyncio.wait_for(chat, 1)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert classify("POST", "/api/v1/chat/batch") == (BATCH, True)
+    assert classify("POST", "/api/v1/chat/stream") == (CHAT, True)
+    assert controller.classes[CHAT].service_time == 1.0
+    assert controller.classes[BATCH].service_time == 120.0
+
+@pytest.fixture
+def admission_client(test_settings, monkeypatch):
+    monkeypatch.setenv("ADMISSION_ENABLED", "true")
+    # TestClient requests come from the address "testclient", standing in for the frontend server
+    monkeypatch.setenv("ADMISSION_TRUSTED_PROXIES", '["testclient"]')
+    get_settings.cache_clear()
+    with install_fakes(llm_latency=0, search_latency=0, embedding_batch_latency=0):
+        from app.main import app
+        with TestClient(app) as test_client:
+            yield test_client
+
+def _controller(**overrides) -> AdmissionController:
+    options = {"max_concurrency": 1, "max_queued_per_user": 8}
+    options.update(overrides)
+    return AdmissionController(
+        [
+            WorkClass(CHAT, weight=3, latency_target=60, user_concurrency=1, user_per_minute=600, user_burst=10),
+            WorkClass(INGEST, weight=1, latency_target=60, user_concurrency=1, user_per_minute=600, user_burst=10)
+        ],
+        **options
+    )
+
+def test_user_over_concurrency_cap_waits_while_others_run():
+    async def scenario():
+        controller = _controller(max_concurrency=4)
+        await controller.acquire("alice", CHAT)
+        second = asyncio.create_task(controller.acquire("alice", CHAT))
+        await asyncio.sleep(0)
+        assert not second.done()
+
+        await controller.acquire("bob", CHAT)
+        controller.release("alice", CHAT)
+        await asyncio.wait_for(second, 1)
+
+    asyncio.run(scenario())
+
+def test_freed_slots_are_shared_by_weight():
+    async def scenario():
+        controller = _controller()
+        order = []
+        await controller.acquire("holder", CHAT)
+
+        async def request(user, work_class):
+            await controller.acquire(user, work_class)
+            order.append(work_class)
+            await asyncio.sleep(0)
+            controller.release(user, work_class)
+
+        tasks = [asyncio.create_task(request(f"chat-{i}", CHAT)) for i in range(6)]
+        tasks += [asyncio.create_task(request(f"ingest-{i}", INGEST)) for i in range(6)]
+        await asyncio.sleep(0)
+        controller.release("holder", CHAT)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    # Three chat requests for every ingestion while both are backlogged
+    assert order[:8].count(CHAT) == 6
+    assert order[:8].count(INGEST) == 2
+
+def test_quota_and_shedding_rejections():
+    async def scenario():
+        controller = AdmissionController(
+            [WorkClass(CHAT, latency_target=1.0, user_concurrency=4, user_per_minute=60, user_burst=1)],
+            max_concurrency=1
+        )
+        await controller.acquire("alice", CHAT)
+        with pytest.raises(AdmissionRejectedError) as rate_limited:
+            await controller.acquire("alice", CHAT)
+        assert rate_limited.value.status_code == 429
+        assert rate_limited.value.retry_after == 1
+
+        # Slow requests ahead: queueing would blow the latency target, so shed at once
+        controller.classes[CHAT].service_time = 5.0
+        with pytest.raises(AdmissionRejectedError) as shed:
+            await controller.acquire("bob", CHAT)
+        assert shed.value.status_code == 503
+        assert shed.value.retry_after >= 5
+
+    asyncio.run(scenario())
+
+def test_chat_quota_is_per_token_subject(admission_client: TestClient, test_settings):
+    client = admission_client
+
+    def headers(subject):
+        return {"Authorization": f"Bearer {create_access_token({'sub': subject}, test_settings)}"}
+
+    statuses = [
+        client.post("/api/v1/chat", json={"content": f"Question {i}"}, headers=headers("alice")).status_code
+        for i in range(test_settings.ADMISSION_CHAT_USER_BURST + 1)
+    ]
+    assert statuses[:-1] == [200] * test_settings.ADMISSION_CHAT_USER_BURST
+    assert statuses[-1] == 429
+
+    rejected = client.post("/api/v1/chat", json={"content": "Again"}, headers=headers("alice"))
+    assert "Retry-After" in rejected.headers
+    assert client.post("/api/v1/chat", json={"content": "Hi"}, headers=headers("bob")).status_code == 200
+    assert client.get("/admission").json()["enabled"] is True
+
+def test_users_without_tokens_behind_one_proxy_are_told_apart(admission_client: TestClient, test_settings):
+    burst = test_settings.ADMISSION_CHAT_USER_BURST
+
+    def chat(headers):
+        return admission_client.post("/api/v1/chat", json={"content": "Hi"}, headers=headers).status_code
+
+    # Two browser sessions of the frontend, which sends each its own client id
+    assert [chat({"X-Client-Id": "session-a"}) for _ in range(burst + 1)][-1] == 429
+    assert chat({"X-Client-Id": "session-b"}) == 200
+
+    # Without a client id the forwarded address is used, skipping trusted hops
+    assert [chat({"X-Forwarded-For": "10.0.0.1"}) for _ in range(burst + 1)][-1] == 429
+    assert chat({"X-Forwarded-For": "10.0.0.2, testclient"}) == 200
+
+def test_forwarded_identity_is_ignored_from_untrusted_clients(test_settings, monkeypatch):
+    from app.services.admission import resolve_user
+
+    scope = {"client": ("203.0.113.9", 5000), "headers": [(b"x-client-id", b"session-a"), (b"x-forwarded-for", b"10.0.0.1")]}
+    assert resolve_user(scope) == "address:203.0.113.9"
+    monkeypatch.setenv("ADMISSION_TRUSTED_PROXIES", '["203.0.113.9"]')
+    get_settings.cache_clear()
+    assert resolve_user(scope) == "client:session-a"
+
+def test_admission_is_off_by_default(client: TestClient):
+    assert client.get("/admission").json() == {"enabled": False}
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from langchain.vectorstores import FAISS
+from benchmarks.fakes import FakeEmbeddings
+from app.services.chat_service import ChatService
+from app.services.embedding_service import EmbeddingService
+from app.services.llm_gateway import BATCH_PRIORITY
+from app.services.semantic_cache import SemanticAnswerCache
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+CHUNKS = [f"Chapter {i}: cells divide by mitosis and meiosis." for i in range(12)]
+
+class FakeGateway:
+    model_name = "fake"
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.priorities = []
+
+    async def generate(self, prompt: str, priority: int = 0) -> str:
+        self.priorities.append(priority)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if "unanswerable" in prompt:
+                raise RuntimeError("upstream error")
+            return f"answer {prompt.count('Chapter')}"
+        finally:
+            self.active -= 1
+
+def test_batch_embeds_once_and_bounds_generation(tmp_path):
+    embeddings = EmbeddingService(
+        FakeEmbeddings(size=8, batch_latency=0, text_latency=0), max_wait_ms=50, symmetric=True
+    )
+    registry = VectorStoreRegistry(embeddings, storage_dir=str(tmp_path))
+    vectorstore_id = registry.compute_id(b"worksheet")
+    registry.put(vectorstore_id, FAISS.from_texts(CHUNKS, embeddings))
+    answer_cache = SemanticAnswerCache(embeddings)
+    gateway = FakeGateway()
+    chat_service = ChatService(
+        api_key="test_key",
+        registry=registry,
+        answer_cache=answer_cache,
+        gateway=gateway,
+        batch_concurrency=3,
+        batch_max_questions=20
+    )
+    questions = [f"Question {i} about cell division" for i in range(10)] + ["An unanswerable question"]
+    answer_cache.store(
+        answer_cache.embed(questions[0]), answer_cache.scope(vectorstore_id, None), questions[0], "cached answer"
+    )
+
+    async def run():
+        return [result async for result in chat_service.answer_batch(questions, vectorstore_id)]
+
+    try:
+        batches_before = embeddings.stats()["batches"]
+        results = asyncio.run(run())
+        # All questions were embedded together rather than one model call each
+        assert embeddings.stats()["batches"] == batches_before + 1
+    finally:
+        embeddings.close()
+
+    assert sorted(result.index for result in results) == list(range(len(questions)))
+    assert results[0].cached and results[0].content == "cached answer"
+    failed = [result for result in results if result.error]
+    assert [result.index for result in failed] == [10]
+    assert all(result.content.startswith("answer") for result in results[1:] if not result.error)
+    assert gateway.peak == 3
+    assert set(gateway.priorities) == {BATCH_PRIORITY}
+    assert len(gateway.priorities) == len(questions) - 1
+
+def test_batch_endpoint_streams_results(client: TestClient, test_settings):
+    # Any service-backed request waits for startup to finish
+    client.get("/api/v1/chat/cache-stats")
+    registry = client.app.state.services.vectorstore_registry
+    vectorstore_id = registry.compute_id(b"worksheet")
+    registry.put(vectorstore_id, FAISS.from_texts(CHUNKS, registry.embeddings))
+
+    questions = ["What is mitosis?", "What is meiosis?", "How do cells divide?"]
+    response = client.post("/api/v1/chat/batch", json={"questions": questions, "vectorstore_id": vectorstore_id})
+    assert response.status_code == 200
+    events = [
+        (block.split("\n")[0], json.loads(block.split("data: ", 1)[1]))
+        for block in response.text.strip().split("\n\n")
+    ]
+    results = [data for event, data in events if event == "event: result"]
+    assert sorted(result["question"] for result in results) == sorted(questions)
+    assert all(result["content"] for result in results)
+    assert events[-1][0] == "event: done"
+    assert events[-1][1]["results"] == len(questions)
+
+    too_many = ["Why?"] * (test_settings.BATCH_MAX_QUESTIONS + 1)
+    response = client.post("/api/v1/chat/batch", json={"questions": too_many, "vectorstore_id": vectorstore_id})
+    assert response.status_code == 400
+    response = client.post("/api/v1/chat/batch", json={"questions": questions, "vectorstore_id": "missing"})
+    assert response.status_code == 404
@@ -0,0 +1,19 @@
+from benchmarks.fakes import FakeEmbeddings, FakeGenerativeModel
+from benchmarks.report import compare, summarize
+
+def test_fakes_are_deterministic():
+    embeddings = FakeEmbeddings(size=16, batch_latency=0, text_latency=0)
+    model = FakeGenerativeModel(latency=0)
+
+    assert embeddings.embed_query("osmosis") == embeddings.embed_documents(["osmosis"])[0]
+    assert embeddings.embed_query("osmosis") != embeddings.embed_query("mitosis")
+    assert model.generate_content("prompt").text == model.generate_content("prompt").text
+
+def test_regressions_beyond_tolerance_are_reported():
+    baselines = {"load.chat[1x1]": {"p95_ms": 100.0, "throughput": 50.0}}
+    steady = summarize([0.09, 0.11], elapsed=0.04)
+    slow = summarize([0.2, 0.3], elapsed=0.5)
+
+    assert compare({"load.chat[1x1]": steady}, baselines) == []
+    assert len(compare({"load.chat[1x1]": slow}, baselines)) == 2
+    assert compare({"unknown": slow}, baselines) == []
@@ -0,0 +1,32 @@
+import asyncio
+from app.services.chat_service import ChatService
+
+def test_slow_context_source_is_dropped():
+    chat_service = ChatService(api_key="test_key", source_timeout=0.05, context_deadline=1.0)
+
+    async def fast():
+        return "fast context"
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "slow context"
+
+    results, timings = asyncio.run(
+        chat_service._gather_context({"search": fast, "document": slow})
+    )
+
+    assert results == {"search": "fast context"}
+    statuses = {timing.source: timing.status for timing in timings}
+    assert statuses == {"search": "ok", "document": "timeout"}
+
+def test_context_deadline_bounds_total_wait():
+    chat_service = ChatService(api_key="test_key", source_timeout=1.0, context_deadline=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "slow context"
+
+    results, timings = asyncio.run(chat_service._gather_context({"search": slow}))
+
+    assert results == {}
+    assert timings[0].status == "deadline"
@@ -0,0 +1,107 @@
+import asyncio
+import time
+import pytest
+from langchain.embeddings import FakeEmbeddings
+from langchain.vectorstores import FAISS
+from app.services.chat_service import ChatService
+from app.services.collection_store import CollectionNotFoundError, CollectionStore
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+def test_membership_changes_persist(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'efiko.db'}"
+    store = CollectionStore(database_url)
+    collection = store.create_collection("Biology 101", ["a", "b", "a"])
+    store.add_document(collection.collection_id, "c")
+    store.remove_document(collection.collection_id, "a")
+    store.close()
+
+    reloaded = CollectionStore(database_url).get_collection(collection.collection_id)
+
+    assert reloaded.name == "Biology 101"
+    assert reloaded.vectorstore_ids == ["b", "c"]
+
+def test_other_workers_changes_are_seen_after_the_ttl(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'efiko.db'}"
+    worker_a = CollectionStore(database_url, cache_ttl=0.05)
+    worker_b = CollectionStore(database_url, cache_ttl=0.05)
+    collection = worker_a.create_collection("Biology", ["a"])
+
+    worker_b.add_document(collection.collection_id, "b")
+    time.sleep(0.06)
+    assert worker_a.get_collection(collection.collection_id).vectorstore_ids == ["a", "b"]
+
+    # Writes read through, so a stale cache never turns a re-add into a no-op
+    worker_b.remove_document(collection.collection_id, "b")
+    worker_a.add_document(collection.collection_id, "b")
+    time.sleep(0.06)
+    assert worker_b.get_collection(collection.collection_id).vectorstore_ids == ["a", "b"]
+
+def test_collection_queries_merge_results_across_documents(tmp_path):
+    embeddings = FakeEmbeddings(size=8)
+    registry = VectorStoreRegistry(embeddings, storage_dir=str(tmp_path / "stores"))
+    registry.put("cells", FAISS.from_texts(["cells divide", "mitosis"], embeddings))
+    registry.put("plants", FAISS.from_texts(["photosynthesis"], embeddings))
+    store = CollectionStore(f"sqlite:///{tmp_path / 'efiko.db'}")
+    collection = store.create_collection("Biology", ["cells", "plants", "missing"])
+    chat_service = ChatService(api_key="test_key", registry=registry, collection_store=store)
+
+    async def gather():
+        document_ids = await chat_service._resolve_documents(None, collection.collection_id)
+        return await chat_service._get_collection_context(document_ids, "question", k=2)
+
+    chunks = asyncio.run(gather())
+
+    assert len(chunks) == 2
+    assert set(chunks) <= {"cells divide", "mitosis", "photosynthesis"}
+
+def test_malformed_document_ids_are_rejected(client):
+    created = client.post("/api/v1/collections", json={"name": "Biology", "vectorstore_ids": ["abc-def"]})
+    assert created.status_code == 400
+
+    collection = client.post("/api/v1/collections", json={"name": "Biology"}).json()
+    response = client.put(f"/api/v1/collections/{collection['collection_id']}/documents/abc-def")
+    assert response.status_code == 400
+    assert client.put(f"/api/v1/collections/{collection['collection_id']}/documents/abcdef").status_code == 404
+
+def test_collections_belong_to_their_creator(client, test_settings):
+    from app.core.security import create_access_token
+
+    def headers(subject):
+        return {"Authorization": f"Bearer {create_access_token({'sub': subject}, test_settings)}"}
+
+    collection = client.post("/api/v1/collections", json={"name": "Mine"}, headers=headers("alice")).json()
+    url = f"/api/v1/collections/{collection['collection_id']}"
+    assert client.get(url, headers=headers("alice")).status_code == 200
+
+    # Someone else who learns the id cannot read, change, delete or chat over it
+    assert client.get(url, headers=headers("bob")).status_code == 404
+    assert client.delete(f"{url}/documents/abc", headers=headers("bob")).status_code == 404
+    assert client.delete(url, headers=headers("bob")).status_code == 404
+    chat = client.post(
+        "/api/v1/chat",
+        json={"content": "Hi", "collection_id": collection["collection_id"]},
+        headers=headers("bob")
+    )
+    assert chat.status_code == 404
+    assert client.delete(url, headers=headers("alice")).status_code == 204
+
+def test_databases_without_owners_are_upgraded(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    database_url = f"sqlite:///{tmp_path / 'efiko.db'}"
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE collections (id VARCHAR(32) PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+        ))
+        connection.execute(text(
+            "INSERT INTO collections VALUES ('old', 'Old', '2024-01-01 00:00:00', '2024-01-01 00:00:00')"
+        ))
+    engine.dispose()
+
+    store = CollectionStore(database_url)
+    assert store.get_collection("old").name == "Old"
+    with pytest.raises(CollectionNotFoundError):
+        store.get_collection("old", owner="user:alice")
+    assert store.get_collection(store.create_collection("New", owner="user:alice").collection_id, owner="user:alice")
@@ -0,0 +1,29 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from benchmarks.fakes import install_fakes
+from app.core.container import ServiceContainer, lifespan
+
+def test_lifespan_builds_services_and_releases_them(test_settings):
+    app = FastAPI()
+
+    async def run() -> ServiceContainer:
+        async with lifespan(app):
+            await asyncio.wait_for(app.state.services_ready.wait(), timeout=30)
+            services = app.state.services
+            assert isinstance(services, ServiceContainer)
+            assert app.state.startup_profile.as_dict()["ready"]
+            # Start the ingestion workers so shutdown has something to stop
+            services.ingestion_queue._ensure_workers()
+            workers = list(services.ingestion_queue._worker_tasks)
+        return services, workers
+
+    with install_fakes(llm_latency=0, search_latency=0, embedding_batch_latency=0):
+        services, workers = asyncio.run(run())
+
+    assert workers and all(task.done() for task in workers)
+    assert services.ingestion_queue._worker_tasks == []
+    with pytest.raises(RuntimeError):
+        services.embedding_service.embed_query("after shutdown")
+    with pytest.raises(RuntimeError):
+        services.extraction_pool.submit(print)
@@ -0,0 +1,47 @@
+from app.models.chat import ConversationTurn
+from app.services.context_assembler import ContextAssembler, deduplicate_chunks
+
+def make_history(turns: int):
+    return [
+        ConversationTurn(
+            role="user" if index % 2 == 0 else "assistant",
+            content=f"Turn {index}. " + "Detail about cells and energy. " * 40
+        )
+        for index in range(turns)
+    ]
+
+def test_prompt_stays_within_budget_for_long_sessions():
+    assembler = ContextAssembler(token_budget=1500, recent_turns=4)
+
+    prompt, tokens = assembler.assemble(
+        "You are Efiko.",
+        "What did we cover?",
+        make_history(200),
+        search_results=[{"title": "Cells", "link": "https://example.com", "snippet": "x" * 5000}],
+        document_chunks=["chunk " * 800]
+    )
+
+    assert tokens["total"] <= 1500
+    assert "Turn 199." in prompt
+    assert "Earlier in this conversation" in prompt
+
+def test_session_summary_only_summarizes_new_turns():
+    summarized = []
+
+    def summarizer(summary, turns):
+        summarized.append(len(turns))
+        return summary + "".join(f"[{turn.content[:6]}]" for turn in turns)
+
+    assembler = ContextAssembler(token_budget=4000, recent_turns=2, summarizer=summarizer)
+    history = make_history(10)
+
+    assembler.assemble("sys", "q", history[:6], session_id="s1")
+    prompt, _ = assembler.assemble("sys", "q", history, session_id="s1")
+
+    assert summarized == [4, 4]
+    assert "[Turn 0][Turn 1]" in prompt
+
+def test_contained_chunks_are_deduplicated():
+    chunks = ["Mitosis has four phases.", "mitosis has   four phases.", "Meiosis halves chromosomes."]
+
+    assert deduplicate_chunks(chunks) == ["Mitosis has four phases.", "Meiosis halves chromosomes."]
@@ -11,5 +11,10 @@ def test_document_upload(client: TestClient):
             files={"file": ("test.pdf", f, "application/pdf")}
         )
     
-    assert response.status_code == 200
-    assert response.json()["message"] == "Document processed successfully" 
\ No newline at end of file
+    assert response.status_code == 202
+    assert response.json()["message"] == "Document queued for processing"
+
+    job_id = response.json()["job_id"]
+    status = client.get(f"/api/v1/documents/jobs/{job_id}")
+    assert status.status_code == 200
+    assert status.json()["status"] in ("queued", "running", "completed") 
\ No newline at end of file
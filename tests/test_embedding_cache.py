@@ -0,0 +1,50 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from langchain.embeddings import FakeEmbeddings
+from app.services.document_service import DocumentProcessor
+from app.services.embedding_cache import ChunkEmbeddingCache
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+class CountingEmbeddings(FakeEmbeddings):
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+def test_cache_is_scoped_to_model(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    cache = ChunkEmbeddingCache(path, model_id="model-a")
+    cache.put_many(["chunk"], [[0.5, 0.25]])
+    cache.close()
+
+    assert ChunkEmbeddingCache(path, model_id="model-a").get_many(["chunk", "other"]) == [[0.5, 0.25], None]
+    assert ChunkEmbeddingCache(path, model_id="model-b").get_many(["chunk"]) == [None]
+
+def test_reupload_only_embeds_changed_chunks(tmp_path):
+    embeddings = CountingEmbeddings(size=8)
+    processor = DocumentProcessor(
+        registry=VectorStoreRegistry(embeddings, storage_dir=str(tmp_path / "stores")),
+        extraction_pool=ThreadPoolExecutor(max_workers=1),
+        embedding_cache=ChunkEmbeddingCache(str(tmp_path / "embeddings.db"), model_id="fake")
+    )
+    paragraphs = [f"Paragraph {i}. " + "Photosynthesis converts light. " * 25 for i in range(20)]
+
+    def ingest(text):
+        path = tmp_path / "notes.txt"
+        path.write_text(text)
+        content = path.read_bytes()
+        return asyncio.run(processor.process_saved_file(
+            str(path), "notes.txt", processor.registry.compute_id(content)
+        ))
+
+    ingest("\n\n".join(paragraphs))
+    first_count = len(embeddings.embedded)
+    embeddings.embedded.clear()
+
+    paragraphs[10] = "Paragraph 10 was rewritten by the teacher."
+    vectorstore_id = ingest("\n\n".join(paragraphs))
+
+    assert first_count >= 20
+    assert 0 < len(embeddings.embedded) <= 2
+    assert processor.registry.get(vectorstore_id).index.ntotal == first_count - 1
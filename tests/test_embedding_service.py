@@ -0,0 +1,64 @@
+import threading
+import time
+from app.services.embedding_service import EmbeddingService
+
+class RecordingEmbeddings:
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        self.release.wait(timeout=5)
+        self.batches.append(("documents", list(texts)))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        self.batches.append(("query", [text]))
+        return [float(len(text))]
+
+def _wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met before the deadline"
+        time.sleep(0.001)
+
+def test_concurrent_callers_share_batches():
+    embeddings = RecordingEmbeddings()
+    embeddings.release.set()
+    service = EmbeddingService(embeddings, max_batch_size=8, max_wait_ms=50)
+    results = {}
+
+    def ingest(name, texts):
+        results[name] = service.embed_documents(texts)
+
+    threads = [
+        threading.Thread(target=ingest, args=("a", ["one", "three"])),
+        threading.Thread(target=ingest, args=("b", ["fives"]))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service.close()
+
+    assert results == {"a": [[3.0], [5.0]], "b": [[5.0]]}
+    assert len(embeddings.batches) == 1
+    assert service.stats()["texts_embedded"] == 3
+
+def test_queries_overtake_queued_ingestion():
+    embeddings = RecordingEmbeddings()
+    service = EmbeddingService(embeddings, max_batch_size=1, max_wait_ms=0)
+
+    # The first batch blocks the only worker while more work queues up
+    ingestion = threading.Thread(target=service.embed_documents, args=(["a", "b", "c"],))
+    ingestion.start()
+    _wait_until(lambda: service.stats()["document_queue_depth"] <= 2)
+    query = threading.Thread(target=service.embed_query, args=("question",))
+    query.start()
+    _wait_until(lambda: service.stats()["query_queue_depth"] > 0)
+    embeddings.release.set()
+    ingestion.join()
+    query.join()
+    service.close()
+
+    assert [kind for kind, _ in embeddings.batches] == ["documents", "query", "documents", "documents"]
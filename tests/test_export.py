@@ -0,0 +1,78 @@
+import asyncio
+import os
+from fastapi.testclient import TestClient
+from PyPDF2 import PdfReader
+from app.services import export_service
+from app.services.export_service import ConversationExporter
+from app.utils.pdf_utils import write_pdf_from_chat
+
+def _messages(count: int) -> list:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} <b>with markup</b>"}
+        for i in range(count)
+    ]
+
+def test_exports_are_cached_by_content(tmp_path):
+    exporter = ConversationExporter(str(tmp_path))
+    messages = _messages(4)
+
+    first = asyncio.run(exporter.export(messages, "markdown"))
+    assert asyncio.run(exporter.export(list(messages), "markdown")) == first
+    assert asyncio.run(exporter.export(messages + _messages(1), "markdown")) != first
+    with open(first, encoding="utf-8") as f:
+        assert "**Assistant:** Message 1 <b>with markup</b>" in f.read()
+
+    html = asyncio.run(exporter.export(messages, "html"))
+    with open(html, encoding="utf-8") as f:
+        assert "Message 1 &lt;b&gt;with markup&lt;/b&gt;" in f.read()
+
+def test_long_pdf_reuses_rendered_segments(tmp_path, monkeypatch):
+    rendered = []
+
+    def counting_writer(messages, output):
+        rendered.append(len(messages))
+        write_pdf_from_chat(messages, output)
+
+    monkeypatch.setattr(export_service, "write_pdf_from_chat", counting_writer)
+    exporter = ConversationExporter(str(tmp_path), segment_messages=10)
+    path = asyncio.run(exporter.export(_messages(25), "pdf"))
+    assert sorted(rendered) == [5, 10, 10]
+    assert len(os.listdir(exporter.segment_dir)) == 2
+    first_pages = len(PdfReader(path).pages)
+
+    # Only the grown tail is rendered again; the complete segments are reused
+    rendered.clear()
+    longer = asyncio.run(exporter.export(_messages(29), "pdf"))
+    assert rendered == [9]
+    assert len(PdfReader(longer).pages) >= first_pages
+    assert not [name for name in os.listdir(tmp_path) if name.endswith((".tmp", ".tail"))]
+
+def test_cache_is_bounded(tmp_path):
+    exporter = ConversationExporter(str(tmp_path), max_bytes=1, min_age=0)
+    first = asyncio.run(exporter.export(_messages(2), "markdown"))
+    second = asyncio.run(exporter.export(_messages(3), "markdown"))
+    assert os.path.exists(second)
+    assert not os.path.exists(first)
+
+def test_recently_served_exports_are_not_evicted(tmp_path):
+    exporter = ConversationExporter(str(tmp_path), max_bytes=1)
+    first = asyncio.run(exporter.export(_messages(2), "markdown"))
+    asyncio.run(exporter.export(_messages(3), "markdown"))
+    # A response may still be about to send it
+    assert os.path.exists(first)
+
+def test_export_endpoint_formats(client: TestClient):
+    session_id = client.post("/api/v1/sessions").json()["session_id"]
+    client.post("/api/v1/chat", json={"content": "What is osmosis?", "session_id": session_id})
+
+    response = client.get(f"/api/v1/sessions/{session_id}/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")
+
+    response = client.get(f"/api/v1/sessions/{session_id}/export", params={"format": "markdown"})
+    assert response.status_code == 200
+    assert "What is osmosis?" in response.text
+    assert 'filename="chat_' in response.headers["content-disposition"]
+
+    assert client.get(f"/api/v1/sessions/{session_id}/export", params={"format": "docx"}).status_code == 422
@@ -0,0 +1,54 @@
+import numpy as np
+from langchain.embeddings import FakeEmbeddings
+from app.services.faiss_index import IndexPolicy, recall_latency_report
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+def test_index_type_follows_corpus_size():
+    policy = IndexPolicy(flat_max_vectors=100, pq_min_vectors=10_000)
+
+    assert policy.choose(50) == "flat"
+    assert policy.choose(5_000) == "hnsw_sq"
+    assert policy.choose(50_000) == "ivf_pq"
+    assert IndexPolicy(index_type="ivf_sq").choose(50) == "ivf_sq"
+    assert policy.factory_string("ivf_pq", 1_000_000, 768) == "IVF4000,PQ192x8"
+
+def test_quantized_store_round_trips_through_memory_mapped_load(tmp_path):
+    embeddings = FakeEmbeddings(size=16)
+    texts = [f"chunk {i}" for i in range(2_000)]
+    vectors = np.random.default_rng(0).normal(size=(len(texts), 16)).astype("float32")
+    vectorstore = IndexPolicy(index_type="ivf_sq").build_vectorstore(texts, vectors, embeddings)
+
+    registry = VectorStoreRegistry(embeddings, storage_dir=str(tmp_path), max_cached=0)
+    registry.put("abc", vectorstore)
+    loaded = registry.get("abc")
+
+    assert type(loaded.index).__name__ == "IndexIVFScalarQuantizer"
+    assert loaded.similarity_search_by_vector(vectors[7].tolist(), k=1)[0].page_content == "chunk 7"
+    assert loaded.max_marginal_relevance_search_by_vector(vectors[7].tolist(), k=2)
+
+def test_flat_store_loads_without_copying_its_vectors(tmp_path):
+    import faiss
+
+    embeddings = FakeEmbeddings(size=16)
+    texts = [f"chunk {i}" for i in range(500)]
+    vectors = np.random.default_rng(2).normal(size=(len(texts), 16)).astype("float32")
+    vectorstore = IndexPolicy().build_vectorstore(texts, vectors, embeddings)
+
+    registry = VectorStoreRegistry(embeddings, storage_dir=str(tmp_path), max_cached=0)
+    registry.put("flat", vectorstore)
+    loaded = registry.get("flat")
+    index = faiss.downcast_index(loaded.index)
+
+    assert type(index).__name__ == "IndexFlatL2"
+    # The codes are a view of the mapped file, not a copy owned by this process
+    assert not index.codes.is_owned
+    assert loaded.similarity_search_by_vector(vectors[3].tolist(), k=1)[0].page_content == "chunk 3"
+
+def test_report_measures_recall_against_exact_search():
+    vectors = np.random.default_rng(1).normal(size=(1_000, 8))
+
+    report = recall_latency_report(vectors, vectors[:20], k=5, index_types=["flat", "hnsw_sq"])
+
+    assert [row["index_type"] for row in report] == ["flat", "hnsw_sq"]
+    assert report[0]["recall_at_k"] == 1.0
+    assert 0 < report[1]["recall_at_k"] <= 1.0
@@ -0,0 +1,32 @@
+import threading
+import time
+from fastapi.testclient import TestClient
+from benchmarks.fakes import install_fakes
+from app.core import container
+
+def test_readiness_follows_service_startup(test_settings, monkeypatch):
+    release = threading.Event()
+    build = container.ServiceContainer
+
+    def slow_build(settings, profile=None):
+        release.wait(timeout=10)
+        return build(settings, profile)
+
+    monkeypatch.setattr(container, "ServiceContainer", slow_build)
+    with install_fakes(llm_latency=0, search_latency=0, embedding_batch_latency=0):
+        from app.main import app
+        with TestClient(app) as client:
+            assert client.get("/health/live").json() == {"status": "alive"}
+            starting = client.get("/health/ready")
+            assert starting.status_code == 503
+            assert starting.json()["status"] == "starting"
+            assert starting.headers["Retry-After"] == "5"
+            assert client.get("/health/startup").json()["ready"] is False
+
+            release.set()
+            deadline = time.monotonic() + 10
+            while (ready := client.get("/health/ready")).status_code != 200:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert ready.json() == {"status": "ready"}
+            assert client.get("/health/startup").json()["ready"] is True
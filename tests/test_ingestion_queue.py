@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from app.services.ingestion_queue import IngestionQueue, IngestionQueueFullError, IngestionQuotaExceededError
+
+class FakeUpload:
+    def __init__(self, filename: str):
+        self.filename = filename
+
+class FakeRegistry:
+    def __init__(self):
+        self.ids = set()
+
+    def exists(self, vectorstore_id):
+        return vectorstore_id in self.ids
+
+class FakeProcessor:
+    summarizer = None
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.registry = FakeRegistry()
+        self.release = asyncio.Event()
+
+    async def save_upload(self, file):
+        path = self.tmp_path / file.filename
+        path.write_text("notes")
+        return str(path), f"id-{file.filename}"
+
+    async def process_saved_file(self, path, filename, vectorstore_id, progress=None):
+        progress("extracting", 40)
+        await self.release.wait()
+        self.registry.ids.add(vectorstore_id)
+        return vectorstore_id
+
+def test_upload_returns_job_before_processing(tmp_path):
+    async def scenario():
+        processor = FakeProcessor(tmp_path)
+        ingestion_queue = IngestionQueue(processor, workers=1)
+
+        job = await ingestion_queue.submit(FakeUpload("notes.txt"))
+        assert job.status == "queued"
+
+        await asyncio.sleep(0)
+        assert ingestion_queue.get(job.job_id).stage == "extracting"
+        assert ingestion_queue.get(job.job_id).progress == 40
+
+        processor.release.set()
+        await asyncio.sleep(0.01)
+        assert ingestion_queue.get(job.job_id).status == "completed"
+
+        # The same document again completes without queueing
+        repeat = await ingestion_queue.submit(FakeUpload("notes.txt"))
+        assert repeat.status == "completed"
+        await ingestion_queue.close()
+
+    asyncio.run(scenario())
+
+def test_full_queue_rejects_uploads(tmp_path):
+    async def scenario():
+        processor = FakeProcessor(tmp_path)
+        ingestion_queue = IngestionQueue(processor, workers=1, max_pending=1)
+
+        await ingestion_queue.submit(FakeUpload("a.txt"))
+        await asyncio.sleep(0)
+        await ingestion_queue.submit(FakeUpload("b.txt"))
+        with pytest.raises(IngestionQueueFullError):
+            await ingestion_queue.submit(FakeUpload("c.txt"))
+        await ingestion_queue.close()
+
+    asyncio.run(scenario())
+
+def test_owners_take_turns_and_have_quotas(tmp_path):
+    async def scenario():
+        processor = FakeProcessor(tmp_path)
+        processor.release.set()
+        ingestion_queue = IngestionQueue(processor, workers=1, max_pending_per_owner=3)
+        started = []
+        process = processor.process_saved_file
+
+        async def record(path, filename, vectorstore_id, progress=None):
+            started.append(filename)
+            return await process(path, filename, vectorstore_id, progress)
+
+        processor.process_saved_file = record
+        for name in ("a1.txt", "a2.txt", "a3.txt"):
+            await ingestion_queue.submit(FakeUpload(name), owner="alice")
+        with pytest.raises(IngestionQuotaExceededError):
+            await ingestion_queue.submit(FakeUpload("a4.txt"), owner="alice")
+        await ingestion_queue.submit(FakeUpload("b1.txt"), owner="bob")
+
+        await asyncio.sleep(0.05)
+        await ingestion_queue.close()
+        return started
+
+    # Bob's only document does not wait behind all of Alice's
+    assert asyncio.run(scenario()) == ["a1.txt", "b1.txt", "a2.txt", "a3.txt"]
+
+def test_summaries_run_after_the_job_completes(tmp_path):
+    class SummarizingProcessor(FakeProcessor):
+        summarizer = object()
+
+        def __init__(self, tmp_path):
+            super().__init__(tmp_path)
+            self.summaries_release = asyncio.Event()
+            self.summarizing = []
+
+        async def build_summaries(self, vectorstore_id, progress=None):
+            self.summarizing.append(vectorstore_id)
+            progress(0.5)
+            await self.summaries_release.wait()
+            if vectorstore_id == "id-broken.txt":
+                raise RuntimeError("upstream error")
+            return vectorstore_id != "id-short.txt"
+
+    async def scenario():
+        processor = SummarizingProcessor(tmp_path)
+        processor.release.set()
+        ingestion_queue = IngestionQueue(processor, workers=1, summary_workers=1)
+        jobs = [await ingestion_queue.submit(FakeUpload(name)) for name in ("long.txt", "short.txt", "broken.txt")]
+        await asyncio.sleep(0.01)
+
+        # Every job is searchable while the first summary is still being written
+        assert [job.status for job in jobs] == ["completed"] * 3
+        assert [job.summary_status for job in jobs] == ["running", "pending", "pending"]
+        assert jobs[0].summary_progress == 50
+        assert processor.summarizing == ["id-long.txt"]
+
+        processor.summaries_release.set()
+        await asyncio.sleep(0.01)
+        await ingestion_queue.close()
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert [job.summary_status for job in jobs] == ["completed", "skipped", "failed"]
+    assert [job.status for job in jobs] == ["completed"] * 3
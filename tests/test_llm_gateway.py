@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from app.services.llm_gateway import BATCH_PRIORITY, INTERACTIVE_PRIORITY, LLMGateway
+
+class QuotaError(Exception):
+    code = 429
+
+class FakeModel:
+    def __init__(self, failures=0, delay=0.0, error=QuotaError):
+        self.failures = failures
+        self.delay = delay
+        self.error = error
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise self.error("quota exceeded")
+        return type("Response", (), {"text": f"answer to {prompt}"})()
+
+def make_gateway(model, **options):
+    return LLMGateway(model=model, requests_per_minute=60_000, base_delay=0.001, **options)
+
+def test_quota_errors_are_retried_with_backoff():
+    model = FakeModel(failures=2)
+    gateway = make_gateway(model)
+
+    assert asyncio.run(gateway.generate("q")) == "answer to q"
+    assert len(model.prompts) == 3
+    assert gateway.stats()["retries"] == 2
+
+def test_non_retryable_errors_fail_fast():
+    model = FakeModel(failures=1, error=ValueError)
+    gateway = make_gateway(model)
+
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.generate("q"))
+    assert len(model.prompts) == 1
+
+def test_identical_in_flight_prompts_share_one_call():
+    model = FakeModel(delay=0.05)
+    gateway = make_gateway(model)
+
+    async def burst():
+        return await asyncio.gather(*(gateway.generate("same") for _ in range(5)))
+
+    assert asyncio.run(burst()) == ["answer to same"] * 5
+    assert model.prompts == ["same"]
+    assert gateway.stats()["deduplicated"] == 4
+
+def test_cancelled_leader_does_not_fail_followers():
+    model = FakeModel(delay=0.05)
+    gateway = make_gateway(model)
+
+    async def scenario():
+        leader = asyncio.create_task(gateway.generate("same"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(gateway.generate("same", priority=BATCH_PRIORITY))
+        await asyncio.sleep(0)
+        # The leader's client disconnects while the call is in flight
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "answer to same"
+    assert model.prompts == ["same"]
+
+def test_upstream_call_is_cancelled_once_every_caller_leaves():
+    model = FakeModel(delay=10)
+    gateway = make_gateway(model)
+
+    async def scenario():
+        callers = [asyncio.create_task(gateway.generate("same")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return gateway.stats()
+
+    stats = asyncio.run(scenario())
+    assert gateway._in_flight == {}
+    assert stats["in_flight"] == 0
+
+def test_waiting_interactive_calls_go_before_batch_work():
+    model = FakeModel(delay=0.02)
+    gateway = make_gateway(model, max_concurrency=1)
+
+    async def run():
+        first = asyncio.create_task(gateway.generate("first"))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(gateway.generate("batch", priority=BATCH_PRIORITY))
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(gateway.generate("chat", priority=INTERACTIVE_PRIORITY))
+        await asyncio.gather(first, batch, chat)
+
+    asyncio.run(run())
+
+    assert model.prompts == ["first", "chat", "batch"]
+    assert gateway.stats()["queue_wait_ms"]["p95"] > 0
+
+def test_token_bucket_limits_request_rate():
+    model = FakeModel()
+    gateway = LLMGateway(model=model, requests_per_minute=600, burst=1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(gateway.generate(f"q{i}") for i in range(3)))
+        return loop.time() - started
+
+    # One token up front, then one every 0.1s
+    assert asyncio.run(run()) >= 0.18
@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.endpoints import metrics
+from app.core.metrics import Histogram, TimingMiddleware, stage
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+
+    lines = histogram.render()
+
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="a"} 3' in lines
+
+def test_middleware_tags_requests_and_traces_stages():
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware, sample_rate=1.0)
+    app.include_router(metrics.router)
+
+    @app.get("/work/{item}")
+    async def work(item: str):
+        with stage("test", "work"):
+            return {"item": item}
+
+    client = TestClient(app)
+    response = client.get("/work/1", headers={"X-Request-ID": "abc123"})
+    exported = client.get("/metrics").text
+    traces = client.get("/traces").json()
+
+    assert response.headers["x-request-id"] == "abc123"
+    assert 'efiko_http_requests_total{method="GET",route="/work/{item}",status="200"}' in exported
+    assert 'efiko_stage_duration_seconds_count{component="test",stage="work"}' in exported
+    trace = next(trace for trace in traces if trace["request_id"] == "abc123")
+    assert [span["stage"] for span in trace["spans"]] == ["work"]
@@ -0,0 +1,72 @@
+import time
+
+from app.services.semantic_cache import SemanticAnswerCache
+
+class KeywordEmbeddings:
+    """Embeds text by counting a fixed vocabulary, so rephrasings stay close"""
+
+    VOCABULARY = ["photosynthesis", "plants", "light", "energy", "gravity", "mass"]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(sum(word.startswith(term) for word in words)) for term in self.VOCABULARY]
+
+def test_near_duplicate_question_hits_within_scope():
+    cache = SemanticAnswerCache(KeywordEmbeddings(), threshold=0.9)
+    scope = cache.scope("doc-1", "Beginner")
+    cache.store(cache.embed("How do plants use light in photosynthesis"), scope, "q", "answer")
+
+    assert cache.lookup(cache.embed("photosynthesis: how plants use light?"), scope) == "answer"
+    assert cache.lookup(cache.embed("what is gravity"), scope) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_scope_separates_documents_and_levels():
+    cache = SemanticAnswerCache(KeywordEmbeddings(), threshold=0.9)
+    vector = cache.embed("plants light photosynthesis")
+    cache.store(vector, cache.scope("doc-1", "beginner"), "q", "answer")
+
+    assert cache.lookup(vector, cache.scope("doc-1", " BEGINNER ")) == "answer"
+    assert cache.lookup(vector, cache.scope("doc-2", "beginner")) is None
+    assert cache.lookup(vector, cache.scope("doc-1", "advanced")) is None
+
+def test_expired_and_evicted_entries_are_not_returned():
+    cache = SemanticAnswerCache(KeywordEmbeddings(), ttl=0.05, max_entries=1)
+    scope = cache.scope(None, None)
+    first = cache.embed("gravity mass")
+    cache.store(first, scope, "q1", "old")
+    cache.store(cache.embed("plants light"), scope, "q2", "new")
+    assert cache.lookup(first, scope) is None
+    assert cache.stats()["size"] == 1
+
+    time.sleep(0.06)
+    assert cache.lookup(cache.embed("plants light"), scope) is None
+
+def test_chat_service_reuses_cached_answer():
+    import asyncio
+    from app.services.chat_service import ChatService
+
+    class CountingModel:
+        calls = 0
+
+        async def generate_content_async(self, prompt):
+            CountingModel.calls += 1
+            return type("Response", (), {"text": "Plants turn light into energy."})()
+
+    chat_service = ChatService(
+        api_key="test_key",
+        answer_cache=SemanticAnswerCache(KeywordEmbeddings(), threshold=0.9)
+    )
+    chat_service.gateway.model = CountingModel()
+
+    async def no_search(query):
+        return []
+    chat_service._get_search_results = no_search
+
+    first = asyncio.run(chat_service.get_response("How do plants use light?", [], level="beginner"))
+    second = asyncio.run(chat_service.get_response("plants: how use light", [], level="beginner"))
+
+    assert not first.cached
+    assert second.cached
+    assert second.content == first.content
+    assert CountingModel.calls == 1
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from app.models.chat import ConversationTurn
+from app.services.session_store import SessionNotFoundError, SessionStore
+
+def test_session_history_survives_restart(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'sessions.db'}"
+    store = SessionStore(database_url)
+    session_id = store.create_session()
+    store.append_turns(session_id, [
+        ConversationTurn(role="user", content="What is osmosis?"),
+        ConversationTurn(role="assistant", content="Water moving across a membrane.")
+    ])
+    store.close()
+
+    restarted = SessionStore(database_url)
+    history = restarted.get_history(session_id)
+
+    assert [turn.role for turn in history] == ["user", "assistant"]
+    assert history[0].content == "What is osmosis?"
+
+def test_unknown_session_raises(tmp_path):
+    store = SessionStore(f"sqlite:///{tmp_path / 'sessions.db'}")
+
+    with pytest.raises(SessionNotFoundError):
+        store.get_history("missing")
+    with pytest.raises(SessionNotFoundError):
+        store.append_turns("missing", [ConversationTurn(role="user", content="Hi")])
+
+def test_cached_history_sees_turns_from_other_writers(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'sessions.db'}"
+    worker_a = SessionStore(database_url)
+    worker_b = SessionStore(database_url)
+    session_id = worker_a.create_session()
+    worker_a.append_turns(session_id, [ConversationTurn(role="user", content="First")])
+    assert len(worker_a.get_history(session_id)) == 1
+
+    # Another worker and a concurrent request on this one both append
+    worker_b.append_turns(session_id, [ConversationTurn(role="assistant", content="Second")])
+    threads = [
+        threading.Thread(
+            target=worker_a.append_turns,
+            args=(session_id, [ConversationTurn(role="user", content=f"Tab {i}")])
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    history = [turn.content for turn in worker_a.get_history(session_id)]
+    assert history[:2] == ["First", "Second"]
+    assert sorted(history[2:]) == [f"Tab {i}" for i in range(4)]
+    assert [turn.content for turn in worker_b.get_history(session_id)] == history
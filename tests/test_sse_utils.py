@@ -0,0 +1,27 @@
+import asyncio
+import json
+from app.utils.sse_utils import format_sse, stream_text_events
+
+async def collect(chunks):
+    return [event async for event in stream_text_events(chunks)]
+
+def test_stream_text_events_ends_with_done():
+    async def chunks():
+        yield "Photo"
+        yield "synthesis"
+
+    events = asyncio.run(collect(chunks()))
+
+    assert events[:2] == [format_sse({"content": "Photo"}), format_sse({"content": "synthesis"})]
+    assert events[-1].startswith("event: done\n")
+
+def test_stream_text_events_reports_errors():
+    async def chunks():
+        yield "partial"
+        raise RuntimeError("quota exceeded")
+
+    events = asyncio.run(collect(chunks()))
+
+    assert events[-1].startswith("event: error\n")
+    payload = json.loads(events[-1].split("data: ", 1)[1])
+    assert payload["detail"] == "quota exceeded"
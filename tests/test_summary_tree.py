@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fakes import FakeEmbeddings
+from app.services.chat_service import ChatService
+from app.services.document_service import DocumentProcessor
+from app.services.embedding_service import EmbeddingService
+from app.services.llm_gateway import BATCH_PRIORITY
+from app.services.summary_tree import SummaryTreeBuilder, is_broad_question, summary_index_id
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+class FakeGateway:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.priorities = []
+
+    async def generate(self, prompt: str, priority: int = 0) -> str:
+        self.priorities.append(priority)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.001)
+        self.active -= 1
+        return f"summary of {len(prompt)} characters"
+
+def test_tree_reduces_sections_to_one_document_summary():
+    gateway = FakeGateway()
+    builder = SummaryTreeBuilder(gateway, section_chunks=4, fan_in=2, concurrency=2)
+    progress = []
+    summaries = asyncio.run(builder.summarize([f"chunk {i}" for i in range(20)], progress.append))
+
+    # 5 sections, then 3, 2 and 1 combined summaries
+    kinds = [summary.kind for summary in summaries]
+    assert kinds[0] == "document"
+    assert (summaries[0].first_chunk, summaries[0].last_chunk) == (0, 19)
+    assert kinds.count("section") == 5 and kinds.count("part") == 5
+    assert [(s.first_chunk, s.last_chunk) for s in summaries if s.kind == "section"][-1] == (16, 19)
+    assert len(gateway.priorities) == len(summaries) == 11
+    assert set(gateway.priorities) == {BATCH_PRIORITY}
+    assert gateway.peak == 2
+    assert progress[-1] == 1.0
+
+def test_broad_questions_are_answered_from_summaries(tmp_path):
+    embeddings = EmbeddingService(FakeEmbeddings(size=8, batch_latency=0, text_latency=0), max_wait_ms=1)
+    registry = VectorStoreRegistry(embeddings, storage_dir=str(tmp_path / "stores"))
+    processor = DocumentProcessor(
+        registry=registry,
+        extraction_pool=ThreadPoolExecutor(max_workers=1),
+        summarizer=SummaryTreeBuilder(FakeGateway(), section_chunks=4, min_chunks=8)
+    )
+    path = tmp_path / "long.txt"
+    path.write_text("\n\n".join(f"Paragraph {i}. " + "Cells grow and divide. " * 40 for i in range(20)))
+    try:
+        vectorstore_id = asyncio.run(processor.process_saved_file(str(path), "long.txt", "longdocument"))
+        # Ingestion leaves the summary tree to a separate background step
+        assert not registry.exists(summary_index_id(vectorstore_id))
+        assert asyncio.run(processor.build_summaries(vectorstore_id)) is True
+        assert registry.exists(summary_index_id(vectorstore_id))
+
+        chat_service = ChatService(api_key="test_key", registry=registry)
+        overview = chat_service._search_document(vectorstore_id, "What is this document about?", k=4)
+        detail = chat_service._search_document(vectorstore_id, "How do cells grow?", k=4)
+    finally:
+        processor.extraction_pool.shutdown()
+        embeddings.close()
+
+    assert overview[0].startswith("Summary of the whole document")
+    assert 1 < len(overview) <= 4
+    assert all("summary of" in context for context in overview)
+    assert all("Cells grow and divide." in context for context in detail)
+
+def test_fan_in_must_combine_summaries():
+    for fan_in in (1, 0, -2):
+        with pytest.raises(ValueError):
+            SummaryTreeBuilder(FakeGateway(), fan_in=fan_in)
+
+def test_broad_question_detection():
+    assert is_broad_question("Summarize chapter 3")
+    assert is_broad_question("what is this document about")
+    assert is_broad_question("What are the key points?")
+    assert not is_broad_question("What is osmosis?")
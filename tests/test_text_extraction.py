@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain.embeddings import FakeEmbeddings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from app.services import document_service
+from app.services.document_service import DocumentProcessor
+from app.services.vectorstore_registry import VectorStoreRegistry
+from app.utils.text_extraction import count_pdf_pages, extract_pdf_pages
+
+PAGE_COUNT = 11
+
+def _write_pdf(path) -> list:
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    for page in range(PAGE_COUNT):
+        for line in range(30):
+            pdf.drawString(40, 800 - line * 20, f"Page {page} line {line}: cells divide by mitosis.")
+        pdf.showPage()
+    pdf.save()
+    return extract_pdf_pages(str(path), 0, PAGE_COUNT)
+
+def _processor(tmp_path, workers: int = 2) -> DocumentProcessor:
+    return DocumentProcessor(
+        registry=VectorStoreRegistry(FakeEmbeddings(size=8), storage_dir=str(tmp_path / "stores")),
+        extraction_pool=ThreadPoolExecutor(max_workers=workers)
+    )
+
+def test_pdf_pages_extract_in_order_and_split_like_one_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_service, "PDF_PAGES_PER_TASK", 3)
+    path = tmp_path / "handout.pdf"
+    expected_pages = _write_pdf(path)
+    assert count_pdf_pages(str(path)) == PAGE_COUNT
+    processor = _processor(tmp_path)
+
+    async def run():
+        pages = [page async for page in processor._iter_text(str(path), "handout.pdf", lambda *_: None)]
+
+        async def replay():
+            for page in pages:
+                yield page
+
+        chunks = [chunk async for chunk in processor._split_incrementally(replay())]
+        return pages, chunks
+
+    try:
+        pages, chunks = asyncio.run(run())
+    finally:
+        processor.extraction_pool.shutdown()
+
+    # Page ranges parse in parallel but come back in document order
+    assert pages == expected_pages
+    assert chunks == processor.text_splitter.split_text("\n".join(expected_pages))
+
+def test_abandoned_extraction_cancels_remaining_page_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_service, "PDF_PAGES_PER_TASK", 1)
+    path = tmp_path / "handout.pdf"
+    _write_pdf(path)
+    started = []
+    release = threading.Event()
+
+    def slow_extract(file_path, start, end):
+        started.append(start)
+        release.wait(timeout=5)
+        return extract_pdf_pages(file_path, start, end)
+
+    monkeypatch.setattr(document_service, "extract_pdf_pages", slow_extract)
+    processor = _processor(tmp_path, workers=1)
+
+    async def run():
+        pages = processor._iter_text(str(path), "handout.pdf", lambda *_: None)
+        release.set()
+        first = await pages.__anext__()
+        await pages.aclose()
+        return first
+
+    try:
+        first = asyncio.run(run())
+    finally:
+        processor.extraction_pool.shutdown(wait=True)
+
+    assert first.startswith("Page 0")
+    # Ranges still queued behind the single worker never ran
+    assert len(started) < PAGE_COUNT
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from langchain.embeddings import FakeEmbeddings
+from app.services.document_service import DocumentProcessor
+from app.services.upload_store import (
+    ResumableUploadStore, UploadConflictError, UploadNotFoundError, UploadTooLargeError
+)
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+async def _dropped_after(part: bytes):
+    yield part
+    raise ConnectionError("client went away")
+
+def test_resumed_upload_keeps_received_bytes(tmp_path):
+    store = ResumableUploadStore(str(tmp_path), max_size=1024)
+
+    async def run():
+        upload = store.create("notes.txt", size=12)
+        with pytest.raises(ConnectionError):
+            await store.append(upload.upload_id, 0, _dropped_after(b"hello "))
+        assert store.get(upload.upload_id).offset == 6
+
+        with pytest.raises(UploadConflictError) as conflict:
+            await store.append(upload.upload_id, 0, _chunks(b"hello world!"))
+        assert conflict.value.offset == 6
+
+        await store.append(upload.upload_id, 6, _chunks(b"wor", b"ld!"))
+        return store.complete(upload.upload_id)
+
+    path, filename, digest = asyncio.run(run())
+    with open(path, "rb") as f:
+        assert f.read() == b"hello world!"
+    assert filename == "notes.txt"
+    assert digest == hashlib.sha256(b"hello world!").hexdigest()
+
+def test_oversized_uploads_are_rejected_early(tmp_path):
+    store = ResumableUploadStore(str(tmp_path), max_size=10)
+    with pytest.raises(UploadTooLargeError):
+        store.create("big.pdf", size=11)
+
+    async def run():
+        declared = store.create("big.pdf")
+        with pytest.raises(UploadTooLargeError):
+            await store.append(declared.upload_id, 0, _chunks(b"x"), length=11)
+        streamed = store.create("big.pdf")
+        with pytest.raises(UploadTooLargeError):
+            await store.append(streamed.upload_id, 0, _chunks(b"x" * 6, b"x" * 6))
+        return declared.upload_id, streamed.upload_id
+
+    for upload_id in asyncio.run(run()):
+        with pytest.raises(UploadNotFoundError):
+            store.get(upload_id)
+    assert os.listdir(tmp_path) == ["completed"]
+
+def test_startup_keeps_live_parts_and_completed_files(tmp_path):
+    first = ResumableUploadStore(str(tmp_path), max_size=1024, ttl=60)
+
+    async def run():
+        live = first.create("live.txt")
+        await first.append(live.upload_id, 0, _chunks(b"still sending"))
+        done = first.create("done.txt")
+        await first.append(done.upload_id, 0, _chunks(b"queued"))
+        return live.upload_id, first.complete(done.upload_id)[0]
+
+    live_id, completed_path = asyncio.run(run())
+    stale = tmp_path / "abandoned.part"
+    stale.write_bytes(b"old")
+    os.utime(stale, (0, 0))
+
+    # A second worker sharing the directory only removes parts idle past the ttl
+    ResumableUploadStore(str(tmp_path), max_size=1024, ttl=60)
+    assert not stale.exists()
+    assert os.path.exists(first._path(live_id))
+    assert os.path.dirname(completed_path) == str(tmp_path / "completed")
+    with open(completed_path, "rb") as f:
+        assert f.read() == b"queued"
+
+def test_save_upload_streams_and_aborts_past_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    processor = DocumentProcessor(
+        registry=VectorStoreRegistry(FakeEmbeddings(size=8), storage_dir=str(tmp_path / "stores")),
+        extraction_pool=ThreadPoolExecutor(max_workers=1),
+        max_file_size=64
+    )
+    try:
+        path, vectorstore_id = asyncio.run(processor.save_upload(UploadFile(io.BytesIO(b"a" * 64), filename="a.txt")))
+        assert vectorstore_id == processor.registry.compute_id(b"a" * 64)
+        os.unlink(path)
+
+        # No size is known up front, so the limit is enforced while streaming
+        with pytest.raises(UploadTooLargeError):
+            asyncio.run(processor.save_upload(UploadFile(io.BytesIO(b"a" * 65), filename="b.txt")))
+        assert [name for name in os.listdir(tmp_path) if name != "stores"] == []
+    finally:
+        processor.extraction_pool.shutdown()
+
+def test_resumable_upload_endpoints(client: TestClient):
+    content = b"Photosynthesis turns light into chemical energy.\n" * 20
+    upload = client.post("/api/v1/documents/uploads", json={"filename": "notes.txt", "size": len(content)}).json()
+    url = f"/api/v1/documents/uploads/{upload['upload_id']}"
+
+    response = client.patch(url, content=content[:100], headers={"Upload-Offset": "0"})
+    assert response.json()["offset"] == 100
+    response = client.patch(url, content=content[100:], headers={"Upload-Offset": "0"})
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "100"
+    client.patch(url, content=content[100:], headers={"Upload-Offset": "100"})
+    assert client.get(url).json()["offset"] == len(content)
+
+    job = client.post(f"{url}/complete").json()
+    assert job["vectorstore_id"] == hashlib.sha256(content).hexdigest()
+    assert client.get(url).status_code == 404
+
+    too_big = client.post("/api/v1/documents/uploads", json={"filename": "big.pdf", "size": 10 ** 9})
+    assert too_big.status_code == 413
+
+def test_client_gives_up_on_repeated_offset_conflicts(monkeypatch):
+    import requests
+    from app.frontend.utils.api_client import APIClient
+
+    class Response:
+        def __init__(self, status_code, body=None, headers=None):
+            self.status_code = status_code
+            self.body = body
+            self.headers = headers or {}
+
+        def json(self):
+            return self.body
+
+        def raise_for_status(self):
+            if self.status_code >= 400:
+                raise requests.HTTPError(f"{self.status_code}")
+
+    class File:
+        name = "notes.txt"
+
+        def getvalue(self):
+            return b"x" * 10
+
+    client = APIClient("http://backend")
+    patches = []
+    delays = []
+    monkeypatch.setattr("time.sleep", delays.append)
+    monkeypatch.setattr(client.session, "post", lambda *a, **k: Response(200, {"upload_id": "u", "chunk_size": 4}))
+    # A server stuck reporting the offset the client already sent from
+    monkeypatch.setattr(client.session, "patch", lambda *a, **k: patches.append(1) or Response(409, headers={"Upload-Offset": "0"}))
+    try:
+        with pytest.raises(requests.HTTPError):
+            client.upload_document(File(), max_part_failures=3)
+    finally:
+        client.close()
+    assert len(patches) == 4
+    assert delays == [1.0, 2.0, 4.0]
+
+def test_oversized_one_shot_uploads_are_cut_off(client: TestClient, test_settings, monkeypatch):
+    monkeypatch.setattr(test_settings, "MAX_FILE_SIZE", 1024)
+    body = b"x" * 256 * 1024
+
+    declared = client.post("/api/v1/documents/upload", files={"file": ("big.txt", body, "text/plain")})
+    assert declared.status_code == 413
+
+    def unsized():
+        for start in range(0, len(body), 16 * 1024):
+            yield body[start:start + 16 * 1024]
+
+    # Without a Content-Length the body is counted as it arrives and abandoned past the limit
+    streamed = client.post(
+        "/api/v1/documents/upload",
+        content=unsized(),
+        headers={"Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert streamed.status_code == 413
+    assert "exceeds" in streamed.json()["detail"]
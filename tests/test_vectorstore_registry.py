@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import pytest
+from langchain.embeddings import FakeEmbeddings
+from langchain.vectorstores import FAISS
+from app.services.vectorstore_registry import VectorStoreRegistry
+
+@pytest.fixture
+def registry(tmp_path):
+    return VectorStoreRegistry(FakeEmbeddings(size=8), storage_dir=str(tmp_path), max_cached=1)
+
+def test_identical_content_is_built_once(registry):
+    vectorstore_id = registry.compute_id(b"same handout")
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return FAISS.from_texts(["chunk one", "chunk two"], registry.embeddings)
+
+    async def upload_twice():
+        await asyncio.gather(
+            registry.get_or_build(vectorstore_id, build),
+            registry.get_or_build(vectorstore_id, build)
+        )
+
+    asyncio.run(upload_twice())
+
+    assert len(builds) == 1
+    assert registry.exists(vectorstore_id)
+    assert vectorstore_id == registry.compute_id(b"same handout")
+
+def test_evicted_index_is_reloaded_from_disk(registry):
+    first_id = registry.compute_id(b"first")
+    second_id = registry.compute_id(b"second")
+    registry.put(first_id, FAISS.from_texts(["first"], registry.embeddings))
+    registry.put(second_id, FAISS.from_texts(["second"], registry.embeddings))
+
+    vectorstore = registry.get(first_id)
+
+    assert vectorstore is not None
+    assert vectorstore.similarity_search("first", k=1)[0].page_content == "first"
+    assert registry.get(registry.compute_id(b"missing")) is None
+
+def test_disk_loads_and_saves_run_off_the_event_loop(registry, monkeypatch):
+    from app.services import vectorstore_registry
+
+    vectorstore_id = registry.compute_id(b"big handout")
+    threads = {}
+    load = vectorstore_registry.load_vectorstore
+    put = registry.put
+
+    def record_load(*args, **kwargs):
+        threads["load"] = threading.current_thread()
+        return load(*args, **kwargs)
+
+    def record_put(*args):
+        threads["put"] = threading.current_thread()
+        return put(*args)
+
+    monkeypatch.setattr(vectorstore_registry, "load_vectorstore", record_load)
+    monkeypatch.setattr(registry, "put", record_put)
+
+    async def build():
+        return FAISS.from_texts(["chunk one"], registry.embeddings)
+
+    async def scenario():
+        await registry.get_or_build(vectorstore_id, build)
+        # Push it out of memory so the next lookup loads from disk
+        await registry.get_or_build(registry.compute_id(b"other"), build)
+        return await registry.get_or_build(vectorstore_id, build)
+
+    loaded = asyncio.run(scenario())
+    assert loaded.docstore.search(loaded.index_to_docstore_id[0]).page_content == "chunk one"
+    assert threads["load"] is not threading.main_thread()
+    assert threads["put"] is not threading.main_thread()
@@ -0,0 +1,92 @@
+import threading
+import time
+from app.services.web_search import WebSearchTool
+from app.utils.cache_utils import TTLCache
+
+class FakeDDGS:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = 0
+
+    def text(self, query, max_results=3):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [{"title": "Photosynthesis", "href": "https://example.com", "body": query}]
+
+def test_normalized_queries_share_cache_entry():
+    search_tool = WebSearchTool()
+    search_tool.ddgs = FakeDDGS()
+
+    first = search_tool.search("What is photosynthesis?")
+    second = search_tool.search("  what is PHOTOSYNTHESIS ")
+
+    assert first == second
+    assert first[0]["link"] == "https://example.com"
+    assert search_tool.ddgs.calls == 1
+
+def test_concurrent_identical_queries_are_coalesced():
+    search_tool = WebSearchTool()
+    search_tool.ddgs = FakeDDGS(delay=0.1)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(search_tool.search("cell division")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 5
+    assert search_tool.ddgs.calls == 1
+
+def test_followers_see_the_leaders_failure():
+    search_tool = WebSearchTool()
+    search_tool.ddgs = FakeDDGS(delay=0.1)
+
+    def broken_set(key, value):
+        raise OSError("database is locked")
+
+    search_tool.cache.set = broken_set
+    errors = []
+
+    def search():
+        try:
+            search_tool.search("cell division")
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == 3
+    assert search_tool.ddgs.calls == 1
+
+def test_cache_survives_restart(tmp_path):
+    cache_path = str(tmp_path / "search.db")
+    search_tool = WebSearchTool(cache_path=cache_path)
+    search_tool.ddgs = FakeDDGS()
+    search_tool.search("mitosis")
+
+    restarted = WebSearchTool(cache_path=cache_path)
+    restarted.ddgs = FakeDDGS()
+
+    assert restarted.search("Mitosis")[0]["snippet"] == "mitosis"
+    assert restarted.ddgs.calls == 0
+
+def test_entries_loaded_from_disk_respect_max_size(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = TTLCache(max_size=10, path=path)
+    for i in range(10):
+        writer.set(f"key {i}", i)
+    writer.close()
+
+    reader = TTLCache(max_size=3, path=path)
+    assert [reader.get(f"key {i}") for i in range(10)] == list(range(10))
+    assert reader.stats()["size"] == 3
+    assert reader.get("key 9") == 9